@@ -3,10 +3,18 @@ from django.shortcuts import get_object_or_404
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
 from django.utils.formats import date_format
-from django.db.models import Q
+from django.db.models import Count, Prefetch
+
+from apps.courses.models import Teaching
+
+from .autocomplete import autocomplete_users
+from .search import search_user_ids
 
 User = get_user_model()
 
+# Autocomplete result cap (keeps the chat search UI snappy)
+USER_SEARCH_LIMIT = 15
+
 def get_user_data_payload(user):
     """Unified data structure for search results and profile view."""
     data = {
@@ -23,19 +31,42 @@ def get_user_data_payload(user):
 
     if user.is_teacher:
         # Access through the 'teachings' related_name on the Teaching model
+        teachings = getattr(user, "course_teachings", None)
+        if teachings is None:
+            teachings = user.teachings.all().select_related('course')
         data["teaching_courses"] = [
             {"id": t.course.id, "title": t.course.title} 
-            for t in user.teachings.all().select_related('course')
+            for t in teachings
         ]
         data["enrolled_courses"] = None
     else:
         # For students, count via 'enrollments' related_name
-        data["enrolled_courses"] = user.enrollments.count()
+        enrolled_total = getattr(user, "enrolled_total", None)
+        data["enrolled_courses"] = enrolled_total if enrolled_total is not None else user.enrollments.count()
         data["teaching_courses"] = None
         
     return data
 
 
+def get_user_data_payloads(user_ids):
+    """
+    Payloads for many users in a fixed number of queries: enrollment counts
+    are annotated and teachings prefetched with their courses. Keeps the
+    order of user_ids.
+    """
+    users = (
+        User.objects.filter(id__in=user_ids)
+        .annotate(enrolled_total=Count("enrollments"))
+        .prefetch_related(Prefetch(
+            "teachings",
+            queryset=Teaching.objects.select_related("course"),
+            to_attr="course_teachings",
+        ))
+    )
+    by_id = {u.id: u for u in users}
+    return [get_user_data_payload(by_id[uid]) for uid in user_ids if uid in by_id]
+
+
 # =========================
 # User Profile API
 # =========================
@@ -55,22 +86,37 @@ def user_search(request):
     # Default to an empty string instead of "STUDENT"
     role = request.GET.get("role", "").upper()
 
-    # Start with all active users
-    users = User.objects.filter(is_active=True)
-
     # Only filter by role if the frontend specifically asked for one
-    if role and role != "ALL":
-        users = users.filter(role=role)
+    if role == "ALL":
+        role = ""
 
-    # Apply the text search
+    # Apply the text search (indexed prefix match, see accounts/search.py)
     if query:
-        users = users.filter(
-            Q(full_name__icontains=query) | 
-            Q(username__icontains=query) | 
-            Q(email__icontains=query)
-        )
-
-    # Limit results to 15 to keep the chat search UI snappy
-    results = [get_user_data_payload(u) for u in users[:15]]
+        user_ids = search_user_ids(query, role=role, limit=USER_SEARCH_LIMIT)
+    else:
+        users = User.objects.filter(is_active=True)
+        if role:
+            users = users.filter(role=role)
+        user_ids = list(users.values_list("id", flat=True)[:USER_SEARCH_LIMIT])
+
+    results = get_user_data_payloads(user_ids)
     
     return JsonResponse({"results": results})
+
+
+# =========================
+# User Autocomplete
+# =========================
+@login_required
+def user_autocomplete(request):
+    """
+    Search-as-you-type variant of user_search: same result shape, but
+    answered from a short-lived per-process cache where possible (see
+    accounts/autocomplete.py).
+    """
+    query = request.GET.get("q", "").strip()
+    role = request.GET.get("role", "").upper()
+    if role == "ALL":
+        role = ""
+
+    return JsonResponse({"results": autocomplete_users(query, role=role)})
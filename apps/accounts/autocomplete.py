@@ -0,0 +1,124 @@
+"""
+Cached user autocomplete for the search modal and the chat "new message" box.
+
+Typing "jo", "joh", "john" sends one request per prefix. Results are kept
+in a small per-process cache keyed by (normalized prefix, role), which
+expires entries after AUTOCOMPLETE_CACHE_TTL seconds and evicts the least
+recently used entry past AUTOCOMPLETE_CACHE_SIZE entries.
+
+When a shorter prefix's cached entry holds *every* match (not just the
+first page), a longer prefix is answered by filtering it in memory.
+
+Every lookup sends the `autocomplete_lookup` signal with outcome "hit",
+"narrowed" or "miss", for metrics or logging.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.dispatch import Signal
+
+from .search import normalize_search_text, search_user_matches
+
+AUTOCOMPLETE_CACHE_TTL = 30
+AUTOCOMPLETE_CACHE_SIZE = 1024
+AUTOCOMPLETE_LIMIT = 15
+
+OUTCOME_HIT = "hit"
+OUTCOME_NARROWED = "narrowed"
+OUTCOME_MISS = "miss"
+
+# Sent with outcome, prefix and role after every lookup
+autocomplete_lookup = Signal()
+
+
+class AutocompleteCache:
+    """
+    Thread-safe TTL + LRU cache. Values are entries of the form
+    {"matches": [(payload, terms), ...], "complete": bool}.
+    """
+
+    def __init__(self, max_entries=AUTOCOMPLETE_CACHE_SIZE, ttl=AUTOCOMPLETE_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, entry)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            expires_at, entry = item
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, entry)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def find_complete_prefix(self, prefix, role):
+        """The longest cached shorter prefix whose entry holds every match, or None."""
+        for end in range(len(prefix) - 1, 0, -1):
+            entry = self.get((prefix[:end], role))
+            if entry is not None and entry["complete"]:
+                return entry
+        return None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_cache = AutocompleteCache()
+
+
+def _narrow(entry, prefix):
+    """Filters a complete entry down to the users with a term starting with prefix."""
+    matches = []
+    for payload, terms in entry["matches"]:
+        narrowed = [term for term in terms if term.startswith(prefix)]
+        if narrowed:
+            matches.append((payload, narrowed))
+    # Keep the database order: by first matching term, then user id
+    matches.sort(key=lambda match: (match[1][0], match[0]["id"]))
+    return {"matches": matches, "complete": True}
+
+
+def autocomplete_users(query, role=None, limit=AUTOCOMPLETE_LIMIT, cache=_cache):
+    """Up to `limit` user payloads matching the query, best first."""
+    # Imported here: api.py imports this module for its view
+    from .api import get_user_data_payloads
+
+    prefix = normalize_search_text(query)
+    if not prefix:
+        return []
+
+    key = (prefix, role or "")
+    entry = cache.get(key)
+    outcome = OUTCOME_HIT
+
+    if entry is None:
+        shorter = cache.find_complete_prefix(prefix, role or "")
+        if shorter is not None:
+            entry = _narrow(shorter, prefix)
+            outcome = OUTCOME_NARROWED
+        else:
+            matches, complete = search_user_matches(prefix, role=role, limit=limit)
+            terms_by_id = dict(matches)
+            payloads = get_user_data_payloads(list(terms_by_id))
+            entry = {
+                "matches": [(payload, terms_by_id[payload["id"]]) for payload in payloads],
+                "complete": complete,
+            }
+            outcome = OUTCOME_MISS
+        cache.set(key, entry)
+
+    autocomplete_lookup.send(sender=AutocompleteCache, outcome=outcome, prefix=prefix, role=role or "")
+    return [payload for payload, _ in entry["matches"][:limit]]
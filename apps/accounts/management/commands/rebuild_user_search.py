@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from apps.accounts.search import rebuild_user_search
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the prefix search terms used by user search.'
+
+    def handle(self, *args, **options):
+        self.stdout.write("Rebuilding user search terms...")
+        indexed = rebuild_user_search()
+
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} user(s)."))
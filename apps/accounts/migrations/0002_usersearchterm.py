@@ -0,0 +1,72 @@
+# Generated by Django 4.2.27 on 2026-10-18 02:10
+
+import re
+import unicodedata
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# A frozen copy of apps.accounts.search.user_search_terms as of this
+# migration, so later changes to the live helper can't change what it does
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+_SPACE_RE = re.compile(r'\s+')
+_TERM_MAX_LENGTH = 254
+
+
+def _normalize(text):
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return _SPACE_RE.sub(' ', text.casefold()).strip()
+
+
+def _search_terms(full_name, username, email):
+    terms = set()
+    for value in (full_name, username):
+        value = _normalize(value)
+        if value:
+            terms.add(value)
+            terms.update(_WORD_RE.findall(value))
+
+    email = _normalize(email)
+    if email:
+        terms.add(email)
+
+    return {term[:_TERM_MAX_LENGTH] for term in terms}
+
+
+def backfill_search_terms(apps, schema_editor):
+    User = apps.get_model('accounts', 'User')
+    UserSearchTerm = apps.get_model('accounts', 'UserSearchTerm')
+
+    rows = []
+    for user in User.objects.only('id', 'full_name', 'username', 'email').iterator():
+        rows.extend(
+            UserSearchTerm(user_id=user.id, term=term)
+            for term in _search_terms(user.full_name, user.username, user.email)
+        )
+    UserSearchTerm.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserSearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=254)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['term', 'user'], name='accounts_search_term_idx')],
+                'unique_together': {('user', 'term')},
+            },
+        ),
+        migrations.RunPython(backfill_search_terms, migrations.RunPython.noop),
+    ]
@@ -44,4 +44,24 @@ class User(AbstractUser):
         return self.role == self.Role.TEACHER
 
     def __str__(self):
-        return f"{self.full_name} (@{self.username})"
\ No newline at end of file
+        return f"{self.full_name} (@{self.username})"
+
+
+class UserSearchTerm(models.Model):
+    """
+    One normalized word (or whole name, username or email) of a user per
+    row. user_search turns a query into an indexed prefix range scan over
+    `term` instead of icontains across every user. Kept in sync by
+    accounts/signals.py; rebuild with `python manage.py rebuild_user_search`.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="search_terms")
+    term = models.CharField(max_length=254)
+
+    class Meta:
+        unique_together = ("user", "term")
+        indexes = [
+            models.Index(fields=["term", "user"], name="accounts_search_term_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.term} -> {self.user_id}"
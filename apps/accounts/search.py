@@ -0,0 +1,130 @@
+"""
+Prefix search over users, backed by the UserSearchTerm table.
+
+Each user is indexed under the words of their full name and username,
+plus the whole full name, username and email, all lowercased with accents
+stripped. A query matches any term it is a prefix of, so "jo", "john d",
+"jdoe" and "jdoe@exam" all find John Doe (@jdoe, jdoe@example.com).
+"""
+import re
+import unicodedata
+
+from django.db import transaction
+
+from .models import User, UserSearchTerm
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_SPACE_RE = re.compile(r"\s+")
+
+# Upper bound for a prefix range scan: sorts after any real continuation
+_PREFIX_END = "\U0010ffff"
+
+# Matching rows fetched per wanted user, since one user can match several of their terms
+TERM_OVERFETCH = 4
+
+_TERM_MAX_LENGTH = UserSearchTerm._meta.get_field("term").max_length
+
+
+def normalize_search_text(text):
+    """Lowercases, strips accents and collapses whitespace."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return _SPACE_RE.sub(" ", text.casefold()).strip()
+
+
+def user_search_terms(full_name, username, email):
+    terms = set()
+    for value in (full_name, username):
+        value = normalize_search_text(value)
+        if value:
+            terms.add(value)
+            terms.update(_WORD_RE.findall(value))
+
+    email = normalize_search_text(email)
+    if email:
+        terms.add(email)
+
+    return {term[:_TERM_MAX_LENGTH] for term in terms}
+
+
+def index_users(users):
+    """Replaces the search terms of the given users."""
+    users = list(users)
+    with transaction.atomic():
+        UserSearchTerm.objects.filter(user__in=users).delete()
+        UserSearchTerm.objects.bulk_create(
+            [
+                UserSearchTerm(user=user, term=term)
+                for user in users
+                for term in user_search_terms(user.full_name, user.username, user.email)
+            ],
+            batch_size=1000,
+        )
+
+
+def rebuild_user_search(batch_size=1000):
+    count = 0
+    users = User.objects.only("id", "full_name", "username", "email").order_by("id")
+    batch = []
+    for user in users.iterator(chunk_size=batch_size):
+        batch.append(user)
+        if len(batch) >= batch_size:
+            index_users(batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        index_users(batch)
+        count += len(batch)
+    return count
+
+
+def _prefix_terms(prefix):
+    """Search terms starting with an already normalized prefix: one range scan on (term, user_id)."""
+    return UserSearchTerm.objects.filter(term__gte=prefix, term__lt=prefix + _PREFIX_END)
+
+
+def search_user_matches(query, role=None, limit=15):
+    """
+    Returns (matches, complete) for active users matching the query.
+
+    matches is a list of (user_id, matching_terms) ordered by the first
+    matching term, so exact words come before longer ones. complete is
+    True when every matching term was read, in which case matches holds
+    every matching user (possibly more than `limit`). This is one indexed
+    range query on (term, user_id).
+    """
+    prefix = normalize_search_text(query)[:_TERM_MAX_LENGTH]
+    if not prefix:
+        return [], True
+
+    terms = _prefix_terms(prefix).filter(user__is_active=True)
+    if role:
+        terms = terms.filter(user__role=role)
+
+    max_rows = limit * TERM_OVERFETCH
+    rows = list(terms.order_by("term", "user_id").values_list("user_id", "term")[:max_rows])
+    complete = len(rows) < max_rows
+
+    matches = {}
+    for user_id, term in rows:
+        matches.setdefault(user_id, []).append(term)
+
+    matches = list(matches.items())
+    if not complete:
+        matches = matches[:limit]
+    return matches, complete
+
+
+def search_user_ids(query, role=None, limit=15):
+    """Ids of up to `limit` active users matching the query, best first."""
+    matches, _ = search_user_matches(query, role=role, limit=limit)
+    return [user_id for user_id, _ in matches[:limit]]
+
+
+def matching_user_ids(query):
+    """
+    Ids of every user (active or not) matching the query, as an unevaluated
+    queryset for use in a `user_id__in=` filter.
+    """
+    prefix = normalize_search_text(query)[:_TERM_MAX_LENGTH]
+    return _prefix_terms(prefix).values("user_id")
@@ -0,0 +1,16 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import User
+from .search import index_users
+
+
+# =========================
+# User Search Index Sync
+# =========================
+@receiver(post_save, sender=User)
+def index_user_for_search(sender, instance, created, update_fields=None, **kwargs):
+    # Logins save only last_login; skip anything that doesn't touch searchable text
+    if update_fields and not {"full_name", "username", "email"} & set(update_fields):
+        return
+    index_users([instance])
@@ -1,3 +1,177 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase, TestCase
+
+from .autocomplete import (
+    OUTCOME_HIT, OUTCOME_MISS, OUTCOME_NARROWED, AutocompleteCache, autocomplete_lookup, autocomplete_users,
+)
+from apps.courses.models import Course, CourseFeedback, CourseMaterial, Enrollment, Teaching
+
+from .models import User
+from .utils import _get_teacher_profile_data
+
+
+class AutocompleteCacheTests(SimpleTestCase):
+    def test_entries_expire_after_the_ttl(self):
+        cache = AutocompleteCache(ttl=30)
+        with mock.patch("apps.accounts.autocomplete.time.monotonic", return_value=100):
+            cache.set(("jo", ""), {"matches": [], "complete": True})
+        with mock.patch("apps.accounts.autocomplete.time.monotonic", return_value=129):
+            self.assertIsNotNone(cache.get(("jo", "")))
+        with mock.patch("apps.accounts.autocomplete.time.monotonic", return_value=130):
+            self.assertIsNone(cache.get(("jo", "")))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = AutocompleteCache(max_entries=2)
+        cache.set("a", {"matches": [], "complete": True})
+        cache.set("b", {"matches": [], "complete": True})
+        cache.get("a")
+        cache.set("c", {"matches": [], "complete": True})
+
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNotNone(cache.get("c"))
+
+
+class AutocompleteUsersTests(TestCase):
+    def setUp(self):
+        self.cache = AutocompleteCache()
+        self.outcomes = []
+
+        def record(sender, outcome, prefix, role, **kwargs):
+            self.outcomes.append((outcome, prefix))
+
+        autocomplete_lookup.connect(record)
+        self.addCleanup(autocomplete_lookup.disconnect, record)
+
+    def make_user(self, full_name, username, role=User.Role.STUDENT):
+        return User.objects.create_user(username=username, password="x", full_name=full_name, role=role)
+
+    def names(self, results):
+        return [r["username"] for r in results]
+
+    def test_hit_and_narrowed_lookups_skip_the_database(self):
+        self.make_user("John Doe", "jdoe")
+        self.make_user("Johnny Cash", "jcash")
+        self.make_user("Joan Baez", "jbaez")
+        self.make_user("Mary Jones", "mjones")
+
+        self.assertEqual(len(autocomplete_users("jo", cache=self.cache)), 4)
+        with self.assertNumQueries(0):
+            self.assertEqual(len(autocomplete_users("Jo ", cache=self.cache)), 4)
+            narrowed = autocomplete_users("joh", cache=self.cache)
+
+        # Same users in the same order as asking the database
+        self.assertEqual(self.names(narrowed), ["jdoe", "jcash"])
+        self.assertEqual(narrowed, autocomplete_users("joh", cache=AutocompleteCache()))
+        self.assertEqual(
+            self.outcomes[:3],
+            [(OUTCOME_MISS, "jo"), (OUTCOME_HIT, "jo"), (OUTCOME_NARROWED, "joh")],
+        )
+
+    def test_truncated_prefix_is_not_narrowed(self):
+        # Two terms each ("joN" and "joN smith"), so "jo" fills limit * TERM_OVERFETCH rows early
+        for i in range(5):
+            self.make_user(f"Jo{i} Smith", f"user{i}")
+
+        self.assertEqual(self.names(autocomplete_users("jo", limit=1, cache=self.cache)), ["user0"])
+        # "jo4" wasn't among the rows read for "jo", so it has to go to the database
+        self.assertEqual(self.names(autocomplete_users("jo4", limit=1, cache=self.cache)), ["user4"])
+        self.assertEqual(self.outcomes, [(OUTCOME_MISS, "jo"), (OUTCOME_MISS, "jo4")])
+
+    def test_roles_are_cached_apart(self):
+        self.make_user("John Doe", "jdoe")
+        self.make_user("John Teacher", "jteach", role=User.Role.TEACHER)
+
+        self.assertEqual(len(autocomplete_users("john", cache=self.cache)), 2)
+        self.assertEqual(self.names(autocomplete_users("john", role="TEACHER", cache=self.cache)), ["jteach"])
+        self.assertEqual([o for o, _ in self.outcomes], [OUTCOME_MISS, OUTCOME_MISS])
+
+
+class UserSearchTests(TestCase):
+    def setUp(self):
+        self.john = User.objects.create_user(
+            username="jdoe", password="x", full_name="John Doe", email="jdoe@example.com"
+        )
+        self.client.force_login(self.john)
+
+    def search(self, query, role=""):
+        response = self.client.get("/users/search/", {"q": query, "role": role})
+        return [r["username"] for r in response.json()["results"]]
+
+    def test_matches_the_start_of_any_word_name_username_or_email(self):
+        for query in ("jo", "DOE", "john d", "jdo", "jdoe@exam"):
+            with self.subTest(query=query):
+                self.assertEqual(self.search(query), ["jdoe"])
+        for query in ("ohn", "oe", "example.com"):
+            with self.subTest(query=query):
+                self.assertEqual(self.search(query), [])
+
+    def test_accents_and_case_are_ignored(self):
+        User.objects.create_user(username="jbrule", password="x", full_name="José Brûlé")
+        self.assertEqual(self.search("jose BRULE"), ["jbrule"])
+        self.assertEqual(self.search("brûl"), ["jbrule"])
+
+    def test_exact_words_rank_before_longer_ones(self):
+        User.objects.create_user(username="zed", password="x", full_name="Jo Smith")
+        self.assertEqual(self.search("jo"), ["zed", "jdoe"])
+
+    def test_inactive_users_and_other_roles_are_left_out(self):
+        User.objects.create_user(username="johanna", password="x", full_name="Johanna", is_active=False)
+        User.objects.create_user(username="johnt", password="x", full_name="John T", role=User.Role.TEACHER)
+
+        self.assertEqual(self.search("joh"), ["jdoe", "johnt"])
+        self.assertEqual(self.search("joh", role="teacher"), ["johnt"])
+
+    def test_renamed_user_is_found_by_the_new_name_only(self):
+        self.john.full_name = "Jonathan Smith"
+        self.john.save(update_fields=["full_name"])
+
+        self.assertEqual(self.search("jonathan"), ["jdoe"])
+        self.assertEqual(self.search("john"), [])
+
+
+class TeacherDashboardStatsTests(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user(username="teacher", password="x", role=User.Role.TEACHER)
+
+    def test_totals_over_the_teachers_courses(self):
+        capped = Course.objects.create(course_id="C1", title="Capped", max_students=10)
+        open_course = Course.objects.create(course_id="C2", title="Open")
+        elsewhere = Course.objects.create(course_id="C3", title="Someone else's")
+        for course in (capped, open_course):
+            Teaching.objects.create(teacher=self.teacher, course=course)
+
+        students = [User.objects.create_user(username=f"student{i}", password="x") for i in range(3)]
+        # student0 takes both courses: enrolled twice, one distinct student
+        for course, student in ((capped, students[0]), (capped, students[1]), (open_course, students[0]),
+                                (elsewhere, students[2])):
+            Enrollment.objects.create(course=course, student=student)
+        CourseMaterial.objects.create(course=capped, file="notes.pdf")
+        CourseFeedback.objects.create(course=capped, student=students[0], rating=5)
+        CourseFeedback.objects.create(course=open_course, student=students[0], rating=2)
+        CourseFeedback.objects.create(course=elsewhere, student=students[2], rating=1)
+
+        with self.assertNumQueries(2):
+            _, stats = _get_teacher_profile_data(self.teacher, is_own_profile=True)
+
+        self.assertEqual(
+            {key: stats[key] for key in (
+                "courses_created", "total_enrolled", "total_students", "total_materials",
+                "capacity_total", "capped_enrolled", "teacher_review_count", "teacher_avg_rating",
+            )},
+            {
+                "courses_created": 2, "total_enrolled": 3, "total_students": 2, "total_materials": 1,
+                "capacity_total": 10, "capped_enrolled": 2, "teacher_review_count": 2, "teacher_avg_rating": 3.5,
+            },
+        )
+
+    def test_no_courses_yet(self):
+        _, stats = _get_teacher_profile_data(self.teacher, is_own_profile=True)
+        self.assertEqual((stats["courses_created"], stats["total_enrolled"], stats["total_students"]), (0, 0, 0))
+        self.assertEqual((stats["teacher_review_count"], stats["teacher_avg_rating"]), (0, 0.0))
+
+    def test_visitors_get_no_private_stats(self):
+        with self.assertNumQueries(0):
+            _, stats = _get_teacher_profile_data(self.teacher, is_own_profile=False)
+        self.assertEqual(stats, {})
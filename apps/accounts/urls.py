@@ -27,5 +27,6 @@ urlpatterns = [
 
     # API for User's data
     path("users/search/", api.user_search, name="user_search"),
+    path("users/autocomplete/", api.user_autocomplete, name="user_autocomplete"),
     path("api/users/<str:username>/", api.user_profile_api, name="user_profile_api")
 ]
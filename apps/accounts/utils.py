@@ -1,32 +1,37 @@
-from django.db.models import Avg, Count, Sum
+from django.db.models import Count, Q, Sum
 from apps.courses.models import *
+from apps.courses.utils import _annotate_course_stats
 
 
 def _get_teacher_profile_data(teacher, is_own_profile):
     """Fetches teacher courses, and optionally private stats if it's their own dashboard."""
     
     # Base Query (Visible to everyone)
+    # Teaching is unique per (teacher, course), so the filter can't produce duplicates
     my_courses = (
-        Course.objects
-        .filter(teachings__teacher=teacher)
-        .annotate(
-            students_total=Count("enrollments", distinct=True),
-            materials_total=Count("materials", distinct=True),
-            course_avg_rating=Avg("feedback__rating"),
-            course_rating_count=Count("feedback", distinct=True)
-        )
+        _annotate_course_stats(Course.objects.filter(teachings__teacher=teacher))
         .order_by("-updated_at", "-created_at", "title")
-        .distinct()
     )
 
     stats = {}
 
     # Strictly private to the owner
     if is_own_profile:
-        courses_created = my_courses.count()
-        
-        total_enrolled = Enrollment.objects.filter(course__teachings__teacher=teacher).count()
-        
+        # Every per-course counter comes from the denormalized CourseStats
+        # rows, so the whole dashboard is one aggregate over the teacher's
+        # courses plus the distinct-students count
+        totals = Course.objects.filter(teachings__teacher=teacher).aggregate(
+            courses_created=Count("id"),
+            total_enrolled=Sum("stats__students_total"),
+            total_materials=Sum("stats__materials_total"),
+            review_count=Sum("stats__rating_count"),
+            rating_sum=Sum("stats__rating_sum"),
+            # Capacity logic
+            capacity_total=Sum("max_students"),
+            capped_enrolled=Sum("stats__students_total", filter=Q(max_students__isnull=False)),
+        )
+
+        # A student in several of the teacher's courses counts once
         total_students = (
             Enrollment.objects
             .filter(course__teachings__teacher=teacher)
@@ -35,32 +40,19 @@ def _get_teacher_profile_data(teacher, is_own_profile):
             .count()
         )
 
-        rating_data = CourseFeedback.objects.filter(
-            course__teachings__teacher=teacher
-        ).aggregate(
-            global_avg=Avg('rating'),
-            total_reviews=Count('id')
-        )
-        
-        total_materials = CourseMaterial.objects.filter(course__teachings__teacher=teacher).count()
-
-        # Capacity logic
-        capped_qs = my_courses.filter(max_students__isnull=False)
-        capacity_total = capped_qs.aggregate(total=Sum("max_students"))["total"] or 0
-        capped_enrolled = Enrollment.objects.filter(
-            course__teachings__teacher=teacher, 
-            course__max_students__isnull=False
-        ).count()
+        review_count = totals["review_count"] or 0
 
         stats = {
-            "courses_created": courses_created,
-            "active_courses": courses_created, # Update this later when add an archived flag later
-            "total_enrolled": total_enrolled,
+            "courses_created": totals["courses_created"],
+            "active_courses": totals["courses_created"], # Update this later when add an archived flag later
+            "total_enrolled": totals["total_enrolled"] or 0,
             "total_students": total_students,
-            "total_materials": total_materials,
+            "total_materials": totals["total_materials"] or 0,
+            "capacity_total": totals["capacity_total"] or 0,
+            "capped_enrolled": totals["capped_enrolled"] or 0,
             "category_choices": Course.CATEGORY_CHOICES, # For the create modal,
-            "teacher_avg_rating": rating_data['global_avg'] or 0.0,
-            "teacher_review_count": rating_data['total_reviews'],
+            "teacher_avg_rating": (totals["rating_sum"] or 0) / review_count if review_count else 0.0,
+            "teacher_review_count": review_count,
         }
 
     return my_courses, stats
\ No newline at end of file
@@ -10,7 +10,8 @@ from django.urls import reverse
 from django.http import JsonResponse
 
 from apps.courses.models import *
-from apps.courses.utils import _get_enrolled_courses_data, _get_all_courses_catalog
+from apps.courses.utils import _get_enrolled_courses_data, _get_all_courses_catalog, _annotate_course_stats
+from apps.courses.search import search_courses
 from apps.status.utils import get_feed_queryset
 
 from ..utils import _get_teacher_profile_data
@@ -61,12 +62,22 @@ def user_profile(request, username):
 
     else:
         # Student Logic 
-        enrolled_courses, enrolled_course_ids = _get_enrolled_courses_data(profile_user)
+        before = request.GET.get("before", "").strip() or None
+        try:
+            enrolled_courses, next_cursor = _get_enrolled_courses_data(profile_user, before=before)
+        except ValueError:
+            # Malformed cursor: start from the most recent enrollment
+            before = None
+            enrolled_courses, next_cursor = _get_enrolled_courses_data(profile_user)
         context["enrolled_courses"] = enrolled_courses
-        context["enrolled_count"] = len(enrolled_courses)
+        context["enrolled_count"] = Enrollment.objects.filter(student=profile_user).count()
+        context["enrolled_next_cursor"] = next_cursor
+        context["enrolled_is_first_page"] = before is None
         
-        # Deadlines Base Query
-        deadlines = Deadline.objects.filter(course_id__in=enrolled_course_ids)
+        # Deadlines Base Query (the enrolled course ids stay a subquery)
+        deadlines = Deadline.objects.filter(
+            course_id__in=Enrollment.objects.filter(student=profile_user).values("course_id")
+        )
 
     # Apply deadline filters (Done once for whoever is logged in)
     if not show_overdue:
@@ -80,29 +91,25 @@ def user_profile(request, username):
     if is_own_profile and tab == "all_courses":
         
         # Optimize query and attach 'is_enrolled' boolean to every course
-        catalog_qs = Course.objects.prefetch_related('teachings__teacher').annotate(
-            students_total=Count('enrollments', distinct=True),
+        catalog_qs = _annotate_course_stats(
+            Course.objects.prefetch_related('teachings__teacher')
+        ).annotate(
             is_enrolled=Exists(
                 Enrollment.objects.filter(course=OuterRef('pk'), student=request.user)
-            ),
-            avg_rating=Avg('feedback__rating'), 
-            rating_count=Count('feedback', distinct=True)
+            )
         )
         
-        # Search Filter
+        # Search Filter (full-text index, best matches first)
         search_query = request.GET.get('q', '').strip()
         if search_query:
-            catalog_qs = catalog_qs.filter(
-                Q(title__icontains=search_query) | 
-                Q(description__icontains=search_query)
-            )
+            catalog_qs = search_courses(catalog_qs, search_query)
             
         # Category Filter
         category_filter = request.GET.get('category', '').strip()
         if category_filter:
             catalog_qs = catalog_qs.filter(category=category_filter)
             
-        catalog_qs = catalog_qs.order_by('-created_at')
+        catalog_qs = catalog_qs.order_by('-search_rank', '-created_at') if search_query else catalog_qs.order_by('-created_at')
         
         # Pagination Setup (12 courses per page)
         paginator = Paginator(catalog_qs, 12)
@@ -13,6 +13,13 @@ class MessageInline(admin.TabularInline):
     ordering = ("-created_at",)
 
 
+class ConversationMembershipInline(admin.TabularInline):
+    model = ConversationMembership
+    extra = 0
+    fields = ("user", "cleared_up_to")
+    autocomplete_fields = ("user",)
+
+
 # -----------------------------
 # Conversation Admin
 # -----------------------------
@@ -33,9 +40,7 @@ class ConversationAdmin(admin.ModelAdmin):
 
     list_filter = ("created_at",)
 
-    filter_horizontal = ("participants",)
-
-    inlines = [MessageInline]
+    inlines = [ConversationMembershipInline, MessageInline]
 
     ordering = ("-created_at",)
 
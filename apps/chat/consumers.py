@@ -1,7 +1,6 @@
-import json
 from django.utils import timezone
+from django.db import IntegrityError, transaction
 from django.db.models import Q
-from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 from django.contrib.auth import get_user_model
 
@@ -9,146 +8,161 @@ from .models import *
 
 User = get_user_model()
 
-class InboxConsumer(AsyncWebsocketConsumer):
+# Outcomes of send_chat_message
+SEND_OK = "ok"
+SEND_FORBIDDEN = "forbidden"
+SEND_BLOCKED = "blocked"
+
+
+class ChatSocketMixin:
     """
-    Single socket per user.
-    - Joins: user_<user_id>
-    - Client sends: { "type": "send", "conversation_id": 123, "message": "hi" }
+    Chat half of the per-session socket (see apps/core/consumers.SessionConsumer).
+    - Client sends: { "type": "send", "conversation_id": 123, "message": "hi", "client_id": "..." }
+    - Server pushes: { "type": "inbox_message", ... } to every participant
+      and { "type": "ack", ... } back to the sender.
+
+    Participant ids and block state are cached per connection in
+    self.chat_access (conversation_id -> {"participant_ids", "blocked"}),
+    so a warm send is one thread hop and two writes. The cache is dropped
+    by "chat_access_changed" events (see chat/signals.py).
     """
 
-    async def connect(self):
-        self.user = self.scope["user"]
-        if not self.user or self.user.is_anonymous:
-            await self.close()
+    async def receive_send(self, data):
+        message = (data.get("message") or "").strip()
+        client_id = data.get("client_id")
+
+        try:
+            conversation_id = int(data.get("conversation_id"))
+        except (TypeError, ValueError):
+            return
+
+        if not message:
             return
 
-        self.user_group = f"user_{self.user.id}"
-        await self.channel_layer.group_add(self.user_group, self.channel_name)
-        await self.accept()
+        if not hasattr(self, "chat_access"):
+            self.chat_access = {}
 
-    async def disconnect(self, close_code):
-        if hasattr(self, "user_group"):
-            await self.channel_layer.group_discard(self.user_group, self.channel_name)
+        # Membership, block check, insert and updated_at bump in one DB call
+        status, access, msg_obj = await self.send_chat_message(
+            conversation_id, message, self.chat_access.get(conversation_id)
+        )
 
-    async def receive(self, text_data):
-        try:
-            data = json.loads(text_data or "{}")
-        except json.JSONDecodeError:
+        if access is not None:
+            self.chat_access[conversation_id] = access
+        else:
+            self.chat_access.pop(conversation_id, None)
+
+        if status == SEND_FORBIDDEN:
+            return
+
+        # Security Check: Are these users blocking each other?
+        if status == SEND_BLOCKED:
+            # Send an error back to the sender only
+            await self.send_frame(
+                "error",
+                error="You cannot send messages to this user.",
+                conversation_id=conversation_id,
+                client_id=client_id,
+            )
             return
 
-        msg_type = data.get("type")
-
-        if msg_type == "send":
-            conversation_id = data.get("conversation_id")
-            message = (data.get("message") or "").strip()
-            
-            if not conversation_id or not message:
-                return
-
-            # Ensure user is actually in this chat
-            allowed = await self.user_in_conversation(conversation_id)
-            if not allowed:
-                return
-
-            # Security Check: Are these users blocking each other?
-            is_blocked = await self.check_if_blocked(conversation_id)
-            if is_blocked:
-                # Silently reject, or send an error back to the sender
-                await self.send(text_data=json.dumps({
-                    "error": "You cannot send messages to this user.",
-                    "conversation_id": conversation_id
-                }))
-                return
-
-            # 3. Save to database
-            msg_obj = await self.save_message(conversation_id, message)
-            participant_ids = await self.get_participant_ids(conversation_id)
-
-            payload = {
-                "type": "inbox_message",
-                "conversation_id": conversation_id,
-                "message_id": msg_obj["id"],
-                "message": msg_obj["content"],
-                "sender_id": msg_obj["sender_id"],
-                "created_at": msg_obj["created_at"],  # Now formatted as "HH:MM AM/PM"
-            }
-
-            # 4. Broadcast to each participant's inbox group
-            for uid in participant_ids:
-                await self.channel_layer.group_send(f"user_{uid}", payload)
+        payload = {
+            "type": "inbox_message",
+            "conversation_id": conversation_id,
+            "message_id": msg_obj["id"],
+            "message": msg_obj["content"],
+            "sender_id": msg_obj["sender_id"],
+            "created_at": msg_obj["created_at"],  # Now formatted as "HH:MM AM/PM"
+        }
+
+        # Broadcast to each participant's session group
+        for uid in access["participant_ids"]:
+            await self.channel_layer.group_send(f"user_{uid}", payload)
+
+        # Confirm to the sending tab which message its frame became
+        await self.send_frame(
+            "ack",
+            client_id=client_id,
+            conversation_id=conversation_id,
+            message_id=msg_obj["id"],
+        )
 
     async def inbox_message(self, event):
         # Forward the broadcast payload to the user's browser
-        await self.send(text_data=json.dumps({
-            "conversation_id": event["conversation_id"],
-            "message_id": event["message_id"],
-            "message": event["message"],
-            "sender_id": event["sender_id"],
-            "created_at": event.get("created_at", ""),
-        }))
-
-    async def live_notification(self, event):
-        """
-        Catches the signal from Django and forwards it to the client's browser.
-        """
-        await self.send(text_data=json.dumps({
-            "type": "notification",
-            "payload": event["payload"]
-        }))
+        await self.send_frame(
+            "inbox_message",
+            conversation_id=event["conversation_id"],
+            message_id=event["message_id"],
+            message=event["message"],
+            sender_id=event["sender_id"],
+            created_at=event.get("created_at", ""),
+        )
+
+    async def chat_access_changed(self, event):
+        """A block or membership changed: forget cached access that involves it."""
+        if not hasattr(self, "chat_access"):
+            return
+
+        conversation_id = event.get("conversation_id")
+        user_id = event.get("user_id")
+        for cid, access in list(self.chat_access.items()):
+            if cid == conversation_id or user_id in access["participant_ids"]:
+                del self.chat_access[cid]
 
     # -------------------------
     # DB helpers
     # -------------------------
-    @database_sync_to_async
-    def user_in_conversation(self, conversation_id):
-        return Conversation.objects.filter(
-            id=conversation_id,
-            participants=self.user
-        ).exists()
+    def _load_chat_access(self, conversation_id):
+        """Participant ids and block state for a conversation, or None if the user isn't in it."""
+        participant_ids = list(
+            ConversationMembership.objects
+            .filter(conversation_id=conversation_id)
+            .values_list("user_id", flat=True)
+        )
+        if self.user.id not in participant_ids:
+            return None
 
-    @database_sync_to_async
-    def check_if_blocked(self, conversation_id):
-        """Check bidirectional block status between participants."""
-        try:
-            conversation = Conversation.objects.get(id=conversation_id)
-            other_user = conversation.participants.exclude(id=self.user.id).first()
-            
-            if not other_user:
-                return False
-
-            if other_user:
-                return UserBlock.objects.filter(
-                    Q(blocker=self.user, blocked=other_user) |
-                    Q(blocker=other_user, blocked=self.user)
-                ).exists()
-        except Conversation.DoesNotExist:
-            pass
-        return False
+        others = [uid for uid in participant_ids if uid != self.user.id]
+        blocked = bool(others) and UserBlock.objects.filter(
+            Q(blocker=self.user, blocked_id__in=others) |
+            Q(blocker_id__in=others, blocked=self.user)
+        ).exists()
 
-    @database_sync_to_async
-    def get_participant_ids(self, conversation_id):
-        return list(
-            Conversation.objects.get(id=conversation_id)
-            .participants.values_list("id", flat=True)
-        )
+        return {"participant_ids": participant_ids, "blocked": blocked}
 
     @database_sync_to_async
-    def save_message(self, conversation_id, content):
-        convo = Conversation.objects.get(id=conversation_id)
+    def send_chat_message(self, conversation_id, content, access=None):
+        """
+        Validates and stores one chat message in a single thread hop.
 
-        msg = Message.objects.create(
-            conversation=convo,
-            sender=self.user,
-            content=content
-        )
+        Returns (status, access, message). access is the (possibly refreshed)
+        cache entry for the conversation; message is only set for SEND_OK.
+        """
+        if access is None:
+            access = self._load_chat_access(conversation_id)
+            if access is None:
+                return SEND_FORBIDDEN, None, None
 
-        # Update the parent conversation's timestamp
-        convo.updated_at = timezone.now()
-        convo.save(update_fields=["updated_at"])
+        if access["blocked"]:
+            return SEND_BLOCKED, access, None
 
-        return {
+        try:
+            with transaction.atomic():
+                msg = Message.objects.create(
+                    conversation_id=conversation_id,
+                    sender=self.user,
+                    content=content
+                )
+
+                # Update the parent conversation's timestamp
+                Conversation.objects.filter(id=conversation_id).update(updated_at=timezone.now())
+        except IntegrityError:
+            # The conversation was deleted after we cached it
+            return SEND_FORBIDDEN, None, None
+
+        return SEND_OK, access, {
             "id": msg.id,
             "content": msg.content,
             "sender_id": msg.sender_id,
             "created_at": msg.created_at.strftime("%I:%M %p"), # 12-hour format
-        }
\ No newline at end of file
+        }
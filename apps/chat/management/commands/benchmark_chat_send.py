@@ -0,0 +1,97 @@
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from channels.testing import WebsocketCommunicator
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.accounts.models import User
+from apps.chat.models import Conversation, ConversationMembership, Message, UserBlock
+from apps.core.benchmarks import BenchmarkCommand
+from apps.core.consumers import SessionConsumer
+
+
+class _FourHopConsumer(SessionConsumer):
+    """The old send path: membership, block, save and participant lookups as separate thread hops."""
+
+    async def receive_send(self, data):
+        conversation_id = data["conversation_id"]
+        if not await self.user_in_conversation(conversation_id):
+            return
+        if await self.check_if_blocked(conversation_id):
+            return
+
+        msg = await self.save_message(conversation_id, data["message"])
+        for uid in await self.get_participant_ids(conversation_id):
+            await self.channel_layer.group_send(f"user_{uid}", {
+                "type": "inbox_message",
+                "conversation_id": conversation_id,
+                "message_id": msg.id,
+                "message": msg.content,
+                "sender_id": msg.sender_id,
+            })
+        await self.send_frame("ack", client_id=data.get("client_id"), message_id=msg.id)
+
+    @database_sync_to_async
+    def user_in_conversation(self, conversation_id):
+        return Conversation.objects.filter(id=conversation_id, participants=self.user).exists()
+
+    @database_sync_to_async
+    def check_if_blocked(self, conversation_id):
+        other = Conversation.objects.get(id=conversation_id).participants.exclude(id=self.user.id).first()
+        return bool(other) and UserBlock.objects.filter(
+            Q(blocker=self.user, blocked=other) | Q(blocker=other, blocked=self.user)
+        ).exists()
+
+    @database_sync_to_async
+    def save_message(self, conversation_id, content):
+        convo = Conversation.objects.get(id=conversation_id)
+        msg = Message.objects.create(conversation=convo, sender=self.user, content=content)
+        convo.updated_at = timezone.now()
+        convo.save(update_fields=["updated_at"])
+        return msg
+
+    @database_sync_to_async
+    def get_participant_ids(self, conversation_id):
+        return list(Conversation.objects.get(id=conversation_id).participants.values_list("id", flat=True))
+
+
+class Command(BenchmarkCommand):
+    help = 'Times sequential chat sends over one socket, old four-hop path against the current one, on throwaway data.'
+    rollback = False
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument("--messages", type=int, default=500, help="Messages sent per run.")
+
+    def run(self, **options):
+        sender = User.objects.create(username="benchmark-sender")
+        recipient = User.objects.create(username="benchmark-recipient")
+        conversation = self.conversation = Conversation.objects.create()
+        ConversationMembership.objects.bulk_create([
+            ConversationMembership(conversation=conversation, user=sender),
+            ConversationMembership(conversation=conversation, user=recipient),
+        ])
+        messages = options["messages"]
+
+        async def send_all(consumer):
+            communicator = WebsocketCommunicator(consumer.as_asgi(), "/ws/")
+            communicator.scope["user"] = sender
+            await communicator.connect()
+            for i in range(messages):
+                await communicator.send_json_to({
+                    "type": "send", "conversation_id": conversation.id, "message": f"hi {i}", "client_id": str(i),
+                })
+                while (await communicator.receive_json_from(timeout=10))["type"] != "ack":
+                    pass
+            await communicator.disconnect()
+
+        self.stdout.write(f"Sending {messages} messages per run:")
+        for label, consumer in (("four hops per send (old)", _FourHopConsumer), ("send_chat_message", SessionConsumer)):
+            elapsed_ms = self.measure(label, lambda: async_to_sync(send_all)(consumer))
+            self.stdout.write(f"{'':<40} {messages / elapsed_ms * 1000:>6.0f} msgs/s")
+
+    def cleanup(self):
+        # Memberships and messages go with these
+        if hasattr(self, "conversation"):
+            self.conversation.delete()
+        User.objects.filter(username__in=["benchmark-sender", "benchmark-recipient"]).delete()
@@ -0,0 +1,89 @@
+# Converts Conversation.participants to an explicit through model and replaces
+# the per-message Message.cleared_by M2M with a per-participant watermark.
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def cleared_by_to_watermarks(apps, schema_editor):
+    """
+    clear_chat always hid every message present at the time, so each user's
+    cleared messages form a prefix of the conversation. The highest cleared
+    message id is therefore an exact watermark.
+    """
+    Message = apps.get_model('chat', 'Message')
+    ConversationMembership = apps.get_model('chat', 'ConversationMembership')
+    ClearedBy = Message.cleared_by.through
+
+    watermarks = (
+        ClearedBy.objects
+        .values('message__conversation_id', 'user_id')
+        .annotate(last_cleared=models.Max('message_id'))
+    )
+    for row in watermarks.iterator():
+        ConversationMembership.objects.filter(
+            conversation_id=row['message__conversation_id'],
+            user_id=row['user_id'],
+        ).update(cleared_up_to=row['last_cleared'])
+
+
+def watermarks_to_cleared_by(apps, schema_editor):
+    Message = apps.get_model('chat', 'Message')
+    ConversationMembership = apps.get_model('chat', 'ConversationMembership')
+    ClearedBy = Message.cleared_by.through
+
+    for membership in ConversationMembership.objects.filter(cleared_up_to__gt=0).iterator():
+        message_ids = Message.objects.filter(
+            conversation_id=membership.conversation_id,
+            id__lte=membership.cleared_up_to,
+        ).values_list('id', flat=True)
+        ClearedBy.objects.bulk_create(
+            [ClearedBy(message_id=mid, user_id=membership.user_id) for mid in message_ids],
+            batch_size=500,
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('chat', '0003_message_history_index'),
+    ]
+
+    operations = [
+        # The auto-created participants table already has exactly these columns
+        # and a unique (conversation, user) constraint, so only the state changes.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='ConversationMembership',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('conversation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='chat.conversation')),
+                        ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+                    ],
+                    options={
+                        'db_table': 'chat_conversation_participants',
+                        'unique_together': {('conversation', 'user')},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name='conversation',
+                    name='participants',
+                    field=models.ManyToManyField(through='chat.ConversationMembership', to=settings.AUTH_USER_MODEL),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name='conversationmembership',
+            name='cleared_up_to',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.RunPython(cleared_by_to_watermarks, watermarks_to_cleared_by),
+        migrations.RemoveField(
+            model_name='message',
+            name='cleared_by',
+        ),
+    ]
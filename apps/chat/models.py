@@ -4,7 +4,7 @@ from django.conf import settings
 User = settings.AUTH_USER_MODEL
 
 class Conversation(models.Model):
-    participants = models.ManyToManyField(User)
+    participants = models.ManyToManyField(User, through="ConversationMembership")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)  # we also manually bump it on message save
 
@@ -22,16 +22,36 @@ class Message(models.Model):
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
 
-    # Tracks which users have chosen to hide/clear this message from their screen
-    cleared_by = models.ManyToManyField(User, related_name="cleared_messages", blank=True)
-
     class Meta:
         ordering = ["created_at"]  # optional: keeps consistent ordering
+        indexes = [
+            # Serves keyset pagination of chat history on (created_at, id)
+            models.Index(fields=["conversation", "created_at", "id"], name="chat_msg_convo_created_idx"),
+        ]
 
     def __str__(self):
         return f"{self.sender}: {self.content[:20]}"
 
 
+class ConversationMembership(models.Model):
+    """
+    A user's place in a conversation. Uses the table Django originally
+    auto-created for Conversation.participants.
+    """
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+
+    # Watermark for "Clear chat": messages with an id at or below this are hidden for this user
+    cleared_up_to = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        db_table = "chat_conversation_participants"
+        unique_together = ("conversation", "user")
+
+    def __str__(self):
+        return f"{self.user} in {self.conversation}"
+
+
 class UserBlock(models.Model):
     blocker = models.ForeignKey(User, related_name='blocking', on_delete=models.CASCADE)
     blocked = models.ForeignKey(User, related_name='blocked_by', on_delete=models.CASCADE)
@@ -0,0 +1,76 @@
+import logging
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Conversation, ConversationMembership, UserBlock
+
+logger = logging.getLogger(__name__)
+
+
+def _notify_access_changed(user_ids, **event):
+    """
+    Tells the users' open sockets to drop cached chat access (see
+    ChatSocketMixin.chat_access_changed). Sent after commit so a socket
+    never re-caches the old state.
+
+    Best-effort: the change is already committed, so a channel-layer
+    failure is logged instead of failing the request that made it.
+    """
+    def send():
+        channel_layer = get_channel_layer()
+        for uid in set(user_ids):
+            try:
+                async_to_sync(channel_layer.group_send)(
+                    f"user_{uid}", {"type": "chat_access_changed", **event}
+                )
+            except Exception:
+                logger.exception("Chat access push to user %s failed", uid)
+
+    transaction.on_commit(send)
+
+
+def _notify_members_changed(conversation_id, extra_user_ids=()):
+    user_ids = list(
+        ConversationMembership.objects
+        .filter(conversation_id=conversation_id)
+        .values_list("user_id", flat=True)
+    )
+    _notify_access_changed(user_ids + list(extra_user_ids), conversation_id=conversation_id)
+
+
+# ========================================================
+# Blocks: both sides lose cached access to each other
+# ========================================================
+@receiver([post_save, post_delete], sender=UserBlock)
+def block_changed(sender, instance, **kwargs):
+    _notify_access_changed([instance.blocker_id], user_id=instance.blocked_id)
+    _notify_access_changed([instance.blocked_id], user_id=instance.blocker_id)
+
+
+# ========================================================
+# Membership: everyone in the conversation refreshes its participant list
+# ========================================================
+@receiver([post_save, post_delete], sender=ConversationMembership)
+def membership_changed(sender, instance, **kwargs):
+    _notify_members_changed(instance.conversation_id, [instance.user_id])
+
+
+# participants.add() inserts the membership rows with bulk_create(), which
+# skips post_save (remove() and clear() still send post_delete per row).
+# Code calling ConversationMembership.objects.bulk_create() directly gets
+# no signal at all and must call _notify_members_changed itself.
+@receiver(m2m_changed, sender=Conversation.participants.through)
+def participants_added(sender, instance, action, reverse, pk_set, **kwargs):
+    if action != "post_add":
+        return
+
+    if reverse:
+        # user.conversation_set.add(...): the instance is the user
+        for conversation_id in pk_set:
+            _notify_members_changed(conversation_id, [instance.pk])
+    else:
+        _notify_members_changed(instance.pk, pk_set)
@@ -3,8 +3,7 @@
 ========================================================= */
 let activeConversationId = null;
 let conversationsCache = [];
-let inboxSocket = null;
-let reconnectTimer = null;
+let clientMessageSeq = 0;
 
 const unreadCounts = new Map();
 const seenMessageIds = new Set();
@@ -45,8 +44,6 @@ window.openMessenger = function (conversationId = null) {
   const list = document.getElementById("conversationList");
   if (list) list.innerHTML = `<div class="p-4 text-center text-sm text-gray-400">Loading chats...</div>`;
 
-  connectInboxSocket();
-
   loadConversations().then(() => {
     wireSearch();
     if (conversationId) openConversationById(conversationId);
@@ -64,7 +61,6 @@ window.closeMessenger = function () {
   setTimeout(() => {
     panel.classList.add("hidden");
     panel.classList.remove("flex");
-    disconnectInboxSocket();
   }, 200);
 };
 
@@ -208,15 +204,26 @@ function updateHeader(user) {
   activeChatUsername = user.username; 
 }
 
+// Keyset cursor for the next older history page (null once the start is reached)
+let historyBeforeCursor = null;
+let historyLoadingOlder = false;
+
 function loadChatHistory(conversationId) {
   const container = document.getElementById("chatMessages");
   if (!container) return;
 
+  historyBeforeCursor = null;
+  historyLoadingOlder = false;
+  wireHistoryScroll();
+
   container.innerHTML = `<div class="flex items-center justify-center h-full text-gray-400 text-sm">Loading history...</div>`;
 
   fetch(`/chat/history/${conversationId}/`)
     .then(res => res.json())
     .then(data => {
+      // The user may have switched conversations while this was in flight
+      if (String(conversationId) !== String(activeConversationId)) return;
+
       container.innerHTML = "";
       
       if (!data.messages || data.messages.length === 0) {
@@ -224,13 +231,8 @@ function loadChatHistory(conversationId) {
         return;
       }
 
-      // Batch render messages using DocumentFragment for high performance
-      const fragment = document.createDocumentFragment();
-      data.messages.forEach(msg => {
-        if (msg.id) seenMessageIds.add(String(msg.id));
-        fragment.appendChild(buildMessageDOM(msg.content, String(msg.sender_id) === String(getCurrentUserId()), msg.created_at));
-      });
-      container.appendChild(fragment);
+      historyBeforeCursor = data.has_older ? data.before_cursor : null;
+      container.appendChild(buildHistoryFragment(data.messages));
 
       scrollToBottom();
       focusInput();
@@ -241,6 +243,51 @@ function loadChatHistory(conversationId) {
     });
 }
 
+function buildHistoryFragment(messages) {
+  // Batch render messages using DocumentFragment for high performance
+  const fragment = document.createDocumentFragment();
+  messages.forEach(msg => {
+    if (msg.id) seenMessageIds.add(String(msg.id));
+    fragment.appendChild(buildMessageDOM(msg.content, String(msg.sender_id) === String(getCurrentUserId()), msg.created_at));
+  });
+  return fragment;
+}
+
+function loadOlderMessages() {
+  const container = document.getElementById("chatMessages");
+  if (!container || !activeConversationId || !historyBeforeCursor || historyLoadingOlder) return;
+
+  historyLoadingOlder = true;
+  const conversationId = activeConversationId;
+
+  fetch(`/chat/history/${conversationId}/?before=${encodeURIComponent(historyBeforeCursor)}`)
+    .then(res => res.json())
+    .then(data => {
+      if (String(conversationId) !== String(activeConversationId)) return;
+
+      historyBeforeCursor = data.has_older ? data.before_cursor : null;
+      if (!data.messages || data.messages.length === 0) return;
+
+      // Prepend while keeping the messages the user is looking at in place
+      const previousHeight = container.scrollHeight;
+      container.insertBefore(buildHistoryFragment(data.messages), container.firstChild);
+      container.scrollTop += container.scrollHeight - previousHeight;
+    })
+    .catch(err => console.error("History error:", err))
+    .finally(() => { historyLoadingOlder = false; });
+}
+
+function wireHistoryScroll() {
+  const container = document.getElementById("chatMessages");
+  if (!container || container.dataset.wired === "1") return;
+  container.dataset.wired = "1";
+
+  container.addEventListener("scroll", () => {
+    // Load the previous page shortly before the user hits the top
+    if (container.scrollTop < 80) loadOlderMessages();
+  });
+}
+
 function buildMessageDOM(message, isMine, timeStr = "") {
   const wrapper = document.createElement("div");
   // CRITICAL FIX: Added 'w-full' to ensure justify-end actually pushes the bubble to the right
@@ -280,54 +327,32 @@ function renderMessage(message, isMine, timeStr = "") {
 /* =========================================================
    WEBSOCKETS
 ========================================================= */
-function connectInboxSocket() {
-  if (inboxSocket && inboxSocket.readyState === WebSocket.OPEN) return;
-
-  const protocol = window.location.protocol === "https:" ? "wss" : "ws";
-  inboxSocket = new WebSocket(`${protocol}://${window.location.host}/ws/chat/inbox/`);
+// Chat frames arrive on the shared per-tab socket (core/js/socket.js)
+AppSocket.on("inbox_message", (data) => {
+  const conversationId = String(data.conversation_id);
+  const messageId = data.message_id ? String(data.message_id) : null;
 
-  inboxSocket.onmessage = (event) => {
-    let data;
-    try { data = JSON.parse(event.data); } catch { return; }
+  if (messageId && seenMessageIds.has(messageId)) return;
+  if (messageId) seenMessageIds.add(messageId);
 
-    // 1. Check for standard errors
-    if (data.error) {
-      alert(data.error);
-      return;
-    }
-
-    // 2. NEW: Handle live notifications!
-    if (data.type === "notification") {
-        handleRealtimeNotification(data.payload);
-        return; 
-    }
-
-    const conversationId = String(data.conversation_id);
-    const messageId = data.message_id ? String(data.message_id) : null;
-
-    if (messageId && seenMessageIds.has(messageId)) return;
-    if (messageId) seenMessageIds.add(messageId);
-
-    if (data.message) {
-      updateConversationPreview(conversationId, data.message, data.sender_id, data.created_at);
-      moveConversationToTop(conversationId);
-    }
+  if (data.message) {
+    updateConversationPreview(conversationId, data.message, data.sender_id, data.created_at);
+    moveConversationToTop(conversationId);
+  }
 
-    if (String(activeConversationId) === conversationId) {
-      renderMessage(data.message, String(data.sender_id) === String(getCurrentUserId()), data.created_at);
-      return;
-    }
+  if (String(activeConversationId) === conversationId) {
+    renderMessage(data.message, String(data.sender_id) === String(getCurrentUserId()), data.created_at);
+    return;
+  }
 
-    const prev = unreadCounts.get(conversationId) || 0;
-    unreadCounts.set(conversationId, prev + 1);
-    renderUnreadBadge(conversationId);
-  };
+  const prev = unreadCounts.get(conversationId) || 0;
+  unreadCounts.set(conversationId, prev + 1);
+  renderUnreadBadge(conversationId);
+});
 
-  inboxSocket.onclose = () => {
-    console.warn("Chat connection lost. Reconnecting in 3s...");
-    reconnectTimer = setTimeout(connectInboxSocket, 3000);
-  };
-}
+AppSocket.on("error", (data) => {
+  alert(data.error);
+});
 
 // --- Helper function to update the UI live ---
 window.handleRealtimeNotification = function(notif) {
@@ -373,15 +398,6 @@ window.handleRealtimeNotification = function(notif) {
     list.insertAdjacentHTML('afterbegin', newItemHtml);
 };
 
-function disconnectInboxSocket() {
-  if (reconnectTimer) clearTimeout(reconnectTimer);
-  if (inboxSocket) {
-    inboxSocket.onclose = null; // Prevent auto-reconnect trigger
-    inboxSocket.close();
-    inboxSocket = null;
-  }
-}
-
 window.sendMessage = function (event) {
   if (event) event.preventDefault();
 
@@ -391,17 +407,18 @@ window.sendMessage = function (event) {
   const message = input.value.trim();
   if (!message || !activeConversationId) return;
 
-  if (!inboxSocket || inboxSocket.readyState !== WebSocket.OPEN) {
-    alert("Not connected to chat server. Trying to reconnect...");
-    return;
-  }
-
   // 1. Send to server
-  inboxSocket.send(JSON.stringify({
+  const sent = AppSocket.send({
     type: "send",
     conversation_id: activeConversationId,
-    message: message
-  }));
+    message: message,
+    client_id: `c${++clientMessageSeq}`
+  });
+  if (!sent) {
+    alert("Not connected to chat server. Trying to reconnect...");
+    AppSocket.connect();
+    return;
+  }
 
   // 2. Clear input
   input.value = "";
@@ -582,8 +599,8 @@ window.handleNewChatSearch = function(query) {
 
   // Debounce the API call by 400ms so we don't spam the server
   userSearchTimeout = setTimeout(() => {
-    // Re-using your existing generic user search endpoint
-    fetch(`/users/search/?q=${encodeURIComponent(cleanQuery)}`)
+    // Cached search-as-you-type endpoint (same result shape as /users/search/)
+    fetch(`/users/autocomplete/?q=${encodeURIComponent(cleanQuery)}`)
       .then(res => res.json())
       .then(data => {
         container.innerHTML = "";
@@ -722,6 +739,7 @@ window.clearChatHistory = function() {
     .then(data => {
         if (data.success) {
             // Instantly clear the screen
+            historyBeforeCursor = null;
             document.getElementById("chatMessages").innerHTML = `<div class="text-center text-gray-400 text-xs mt-4">Conversation cleared.</div>`;
             updateConversationPreview(activeConversationId, "Chat cleared", null, "");
         }
@@ -1,3 +1,253 @@
-from django.test import TestCase
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from apps.accounts.models import User
+
+from .models import Conversation, ConversationMembership, Message, UserBlock
+
+
+class ConversationListQueryTests(TestCase):
+    # Session, user, conversations (with last-message subqueries), participants, blocks
+    QUERIES = 5
+
+    def setUp(self):
+        self.me = User.objects.create_user(username="me", password="x")
+        self.client.force_login(self.me)
+
+    def make_conversations(self, count):
+        others = User.objects.bulk_create([User(username=f"other{i}") for i in range(count)])
+        conversations = Conversation.objects.bulk_create([Conversation() for _ in range(count)])
+        ConversationMembership.objects.bulk_create(
+            [ConversationMembership(conversation=c, user=self.me) for c in conversations]
+            + [ConversationMembership(conversation=c, user=u) for c, u in zip(conversations, others)]
+        )
+        Message.objects.bulk_create([
+            Message(conversation=c, sender=u, content=f"hi {i}")
+            for i, (c, u) in enumerate(zip(conversations, others))
+        ])
+        UserBlock.objects.create(blocker=self.me, blocked=others[0])
+
+    def assert_constant_queries(self, count):
+        self.make_conversations(count)
+        with self.assertNumQueries(self.QUERIES):
+            response = self.client.get("/chat/conversations/")
+
+        conversations = response.json()["conversations"]
+        self.assertEqual(len(conversations), count)
+        self.assertEqual(sum(c["i_blocked_them"] for c in conversations), 1)
+        self.assertTrue(all(c["last_message"].startswith("hi ") for c in conversations))
+
+    def test_one_conversation(self):
+        self.assert_constant_queries(1)
+
+    def test_fifty_conversations(self):
+        self.assert_constant_queries(50)
+
+    def test_five_hundred_conversations(self):
+        self.assert_constant_queries(500)
+
+
+class ChatAccessSignalTests(TestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(username="alice", password="x")
+        self.bob = User.objects.create_user(username="bob", password="x")
+        self.carol = User.objects.create_user(username="carol", password="x")
+        self.conversation = Conversation.objects.create()
+        self.layer = mock.Mock(group_send=mock.AsyncMock())
+        patcher = mock.patch("apps.chat.signals.get_channel_layer", return_value=self.layer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def pushed(self):
+        return sorted(
+            (call.args[0], call.args[1].get("conversation_id"))
+            for call in self.layer.group_send.call_args_list
+        )
+
+    def test_participants_add_and_remove_drop_cached_access(self):
+        cid = self.conversation.id
+        with self.captureOnCommitCallbacks(execute=True):
+            self.conversation.participants.add(self.alice, self.bob)
+        self.assertEqual(self.pushed(), [(f"user_{self.alice.id}", cid), (f"user_{self.bob.id}", cid)])
+
+        # The removed user is told too, not only those left behind
+        self.layer.group_send.reset_mock()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.conversation.participants.remove(self.bob)
+        self.assertEqual(self.pushed(), [(f"user_{self.alice.id}", cid), (f"user_{self.bob.id}", cid)])
+
+    def test_reverse_add_and_clear(self):
+        self.conversation.participants.add(self.alice)
+        cid = self.conversation.id
+
+        self.layer.group_send.reset_mock()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.carol.conversation_set.add(self.conversation)
+        self.assertEqual(self.pushed(), [(f"user_{self.alice.id}", cid), (f"user_{self.carol.id}", cid)])
+
+        self.layer.group_send.reset_mock()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.conversation.participants.clear()
+        self.assertEqual(self.pushed(), [(f"user_{self.alice.id}", cid), (f"user_{self.carol.id}", cid)])
+
+    def test_failed_push_is_logged_not_raised(self):
+        self.layer.group_send.side_effect = OSError("layer down")
+        with self.assertLogs("apps.chat.signals", "ERROR"), self.captureOnCommitCallbacks(execute=True):
+            UserBlock.objects.create(blocker=self.alice, blocked=self.bob)
+
+        self.assertTrue(UserBlock.objects.filter(blocker=self.alice, blocked=self.bob).exists())
+        self.assertEqual(self.layer.group_send.call_count, 2)
+
+
+class ChatHistoryPagingTests(TestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(username="alice", password="x")
+        self.bob = User.objects.create_user(username="bob", password="x")
+        self.conversation = Conversation.objects.create()
+        self.conversation.participants.add(self.alice, self.bob)
+        self.client.force_login(self.alice)
+
+    def send(self, count):
+        messages = [
+            Message.objects.create(conversation=self.conversation, sender=self.bob, content=f"m{i}")
+            for i in range(count)
+        ]
+        # One shared timestamp: only the id tie-break can order the pages
+        Message.objects.update(created_at=timezone.now())
+        return [m.id for m in messages]
+
+    def page(self, **params):
+        response = self.client.get(f"/chat/history/{self.conversation.id}/", {"limit": 3, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def ids(self, page):
+        return [m["id"] for m in page["messages"]]
+
+    def test_scrolling_up_visits_every_message_once(self):
+        ids = self.send(7)
+
+        pages = [self.page()]
+        while pages[-1]["has_older"]:
+            pages.append(self.page(before=pages[-1]["before_cursor"]))
+
+        self.assertEqual([self.ids(p) for p in pages], [ids[4:], ids[1:4], ids[:1]])
+        self.assertIsNone(pages[-1]["before_cursor"])
+        self.assertEqual([p["has_newer"] for p in pages], [False, True, True])
+
+    def test_last_page_exactly_full_has_nothing_older(self):
+        ids = self.send(6)
+        older = self.page(before=self.page()["before_cursor"])
+
+        self.assertEqual(self.ids(older), ids[:3])
+        self.assertFalse(older["has_older"])
+
+    def test_after_catches_up_from_a_cursor(self):
+        ids = self.send(5)
+        oldest = self.page(before=self.page()["before_cursor"])
+
+        newer = self.page(after=oldest["after_cursor"])
+        self.assertEqual(self.ids(newer), ids[2:5])
+        self.assertFalse(newer["has_newer"])
+
+        # Nothing new yet: the cursor comes back unchanged for the next poll
+        caught_up = self.page(after=newer["after_cursor"])
+        self.assertEqual((caught_up["messages"], caught_up["after_cursor"]), ([], newer["after_cursor"]))
+
+    def test_malformed_cursor_is_400(self):
+        for params in ({"before": "not-a-cursor"}, {"after": "bm9waXBl"}):
+            response = self.client.get(f"/chat/history/{self.conversation.id}/", params)
+            self.assertEqual(response.status_code, 400, params)
+
+
+class ClearChatTests(TestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(username="alice", password="x")
+        self.bob = User.objects.create_user(username="bob", password="x")
+        self.conversation = Conversation.objects.create()
+        self.conversation.participants.add(self.alice, self.bob)
+        for i in range(3):
+            Message.objects.create(conversation=self.conversation, sender=self.bob, content=f"old {i}")
+
+    def history(self, user):
+        self.client.force_login(user)
+        response = self.client.get(f"/chat/history/{self.conversation.id}/")
+        return [m["content"] for m in response.json()["messages"]]
+
+    def test_clearing_hides_older_messages_for_the_clearing_user_only(self):
+        self.client.force_login(self.alice)
+        self.assertEqual(self.client.post(f"/chat/clear/{self.conversation.id}/").status_code, 200)
+        Message.objects.create(conversation=self.conversation, sender=self.bob, content="new")
+
+        self.assertEqual(self.history(self.alice), ["new"])
+        self.assertEqual(self.history(self.bob), ["old 0", "old 1", "old 2", "new"])
+
+    def test_clearing_an_empty_conversation_keeps_the_watermark(self):
+        Message.objects.all().delete()
+        self.client.force_login(self.alice)
+        self.client.post(f"/chat/clear/{self.conversation.id}/")
+
+        membership = ConversationMembership.objects.get(conversation=self.conversation, user=self.alice)
+        self.assertEqual(membership.cleared_up_to, 0)
+
+
+class ClearedByToWatermarkMigrationTests(TransactionTestCase):
+    before = [("chat", "0003_message_history_index")]
+    after = [("chat", "0004_conversationmembership")]
+
+    def migrate(self, target):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(target)
+        return executor.loader.project_state(target).apps
+
+    def tearDown(self):
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def test_cleared_messages_become_a_watermark_and_back(self):
+        apps = self.migrate(self.before)
+        Conversation = apps.get_model("chat", "Conversation")
+        Message = apps.get_model("chat", "Message")
+        alice = User.objects.create_user(username="alice", password="x")
+        bob = User.objects.create_user(username="bob", password="x")
+
+        conversation = Conversation.objects.create()
+        conversation.participants.add(alice.id, bob.id)
+        messages = [
+            Message.objects.create(conversation=conversation, sender_id=bob.id, content=f"hi {i}")
+            for i in range(3)
+        ]
+        # Alice cleared the chat after the second message
+        for message in messages[:2]:
+            message.cleared_by.add(alice.id)
+
+        apps = self.migrate(self.after)
+        Membership = apps.get_model("chat", "ConversationMembership")
+        self.assertEqual(
+            dict(Membership.objects.values_list("user_id", "cleared_up_to")),
+            {alice.id: messages[1].id, bob.id: 0},
+        )
+
+        apps = self.migrate(self.before)
+        ClearedBy = apps.get_model("chat", "Message").cleared_by.through
+        self.assertEqual(
+            sorted(ClearedBy.objects.values_list("message_id", "user_id")),
+            [(messages[0].id, alice.id), (messages[1].id, alice.id)],
+        )
+
+
+class ChatSendBenchmarkTests(TransactionTestCase):
+    def test_benchmark_runs_and_cleans_up(self):
+        out = StringIO()
+        call_command("benchmark_chat_send", messages=3, repeat=1, stdout=out)
+
+        self.assertIn("msgs/s", out.getvalue())
+        self.assertFalse(User.objects.filter(username__startswith="benchmark-").exists())
+        self.assertFalse(Conversation.objects.exists())
+        self.assertFalse(Message.objects.exists())
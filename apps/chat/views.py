@@ -2,11 +2,13 @@ import json
 
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
-from django.db.models import Q
+from django.db.models import Max, OuterRef, Q, Subquery
 from django.http import JsonResponse
 from django.shortcuts import get_object_or_404
 from django.views.decorators.http import require_POST
 
+from apps.core.utils import encode_keyset_cursor, decode_keyset_cursor
+
 from .models import *
 
 # Get the actual Model class, not the string
@@ -15,35 +17,46 @@ User = get_user_model()
 
 @login_required
 def conversation_list(request):
+    # Last message per conversation, resolved in the same query via correlated subqueries
+    last_message = Message.objects.filter(conversation=OuterRef("pk")).order_by("-created_at", "-id")
+
     conversations = (
         Conversation.objects
         .filter(participants=request.user)
+        .annotate(
+            last_message_content=Subquery(last_message.values("content")[:1]),
+            last_message_sender_id=Subquery(last_message.values("sender_id")[:1]),
+            last_message_at=Subquery(last_message.values("created_at")[:1]),
+        )
         .prefetch_related("participants")
         .order_by("-updated_at")
     )
 
+    # Every block involving the current user, fetched once instead of twice per conversation
+    blocks = UserBlock.objects.filter(
+        Q(blocker=request.user) | Q(blocked=request.user)
+    ).values_list("blocker_id", "blocked_id")
+
+    blocked_by_me = set()
+    blocking_me = set()
+    for blocker_id, blocked_id in blocks:
+        if blocker_id == request.user.id:
+            blocked_by_me.add(blocked_id)
+        else:
+            blocking_me.add(blocker_id)
+
     data = []
     for convo in conversations:
-        other_user = convo.participants.exclude(id=request.user.id).first()
+        # Resolve the other participant from the prefetched set (no extra query)
+        other_user = next(
+            (u for u in convo.participants.all() if u.id != request.user.id),
+            None
+        )
         if not other_user:
             # Edge case: convo with only yourself (shouldn't happen, but avoid crashing)
             continue
 
-        # 1. Did the currently logged-in user block the other person?
-        i_blocked_them = False
-        # 2. Did the other person block the currently logged-in user?
-        they_blocked_me = False
-
-        if other_user:
-            i_blocked_them = UserBlock.objects.filter(blocker=request.user, blocked=other_user).exists()
-            they_blocked_me = UserBlock.objects.filter(blocker=other_user, blocked=request.user).exists()
-
-        last_message = (
-            Message.objects
-            .filter(conversation=convo)
-            .order_by("-created_at")
-            .first()
-        )
+        has_last = convo.last_message_at is not None
 
         data.append({
             "id": convo.id,
@@ -52,31 +65,82 @@ def conversation_list(request):
             "username": other_user.username,
             "role": getattr(other_user, "role", ""),
             "avatar_url": other_user.avatar_url,
-            "last_message": last_message.content if last_message else "",
-            "sender_id": last_message.sender_id if last_message else None,
-            "time": last_message.created_at.strftime("%H:%M") if last_message else "",
-            "i_blocked_them": i_blocked_them,
-            "they_blocked_me": they_blocked_me,
+            "last_message": convo.last_message_content if has_last else "",
+            "sender_id": convo.last_message_sender_id if has_last else None,
+            "time": convo.last_message_at.strftime("%H:%M") if has_last else "",
+            # 1. Did the currently logged-in user block the other person?
+            "i_blocked_them": other_user.id in blocked_by_me,
+            # 2. Did the other person block the currently logged-in user?
+            "they_blocked_me": other_user.id in blocking_me,
         })
 
     return JsonResponse({"conversations": data})
 
 
+# Messages per history page, and the most a client may ask for
+HISTORY_PAGE_SIZE = 50
+HISTORY_MAX_PAGE_SIZE = 100
+
+
 @login_required
 def chat_history(request, conversation_id):
+    """
+    Returns one page of messages, oldest first.
+
+    - No cursor: the newest page.
+    - ?before=<cursor>: the page just older than that message (scrolling up).
+    - ?after=<cursor>: the page just newer than that message (catching up).
+
+    Pages are keyset-paginated on (created_at, id), which the
+    Message(conversation, created_at, id) index serves directly.
+    """
     try:
-        conversation = Conversation.objects.get(
-            id=conversation_id,
-            participants=request.user
+        membership = ConversationMembership.objects.select_related("conversation").get(
+            conversation_id=conversation_id,
+            user=request.user
         )
-    except Conversation.DoesNotExist:
+    except ConversationMembership.DoesNotExist:
         return JsonResponse({"error": "Invalid conversation"}, status=403)
 
+    conversation = membership.conversation
+
+    try:
+        limit = int(request.GET.get("limit", HISTORY_PAGE_SIZE))
+    except ValueError:
+        limit = HISTORY_PAGE_SIZE
+    limit = max(1, min(limit, HISTORY_MAX_PAGE_SIZE))
+
+    before = request.GET.get("before")
+    after = request.GET.get("after")
+
     # Find the other user in this conversation first
     other_user = conversation.participants.exclude(id=request.user.id).first()
 
     # Exclude messages cleared by the current user
-    messages = conversation.messages.exclude(cleared_by=request.user).order_by('created_at')
+    messages = conversation.messages.filter(id__gt=membership.cleared_up_to)
+
+    try:
+        if after:
+            created_at, msg_id = decode_keyset_cursor(after)
+            messages = messages.filter(
+                Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=msg_id)
+            ).order_by("created_at", "id")
+        else:
+            if before:
+                created_at, msg_id = decode_keyset_cursor(before)
+                messages = messages.filter(
+                    Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=msg_id)
+                )
+            messages = messages.order_by("-created_at", "-id")
+    except ValueError:
+        return JsonResponse({"error": "Invalid cursor"}, status=400)
+
+    # Fetch one extra row to know whether another page exists
+    page = list(messages[:limit + 1])
+    has_more = len(page) > limit
+    page = page[:limit]
+    if not after:
+        page.reverse()
 
     # Did the currently logged-in user block the other person?
     i_blocked_them = False
@@ -87,6 +151,10 @@ def chat_history(request, conversation_id):
         i_blocked_them = UserBlock.objects.filter(blocker=request.user, blocked=other_user).exists()
         they_blocked_me = UserBlock.objects.filter(blocker=other_user, blocked=request.user).exists()
 
+    # When paging forwards, older messages always exist before the starting cursor
+    has_older = True if after else has_more
+    has_newer = has_more if after else bool(before)
+
     return JsonResponse({
         # Actually send the block status to your JavaScript
         "i_blocked_them": i_blocked_them,
@@ -99,8 +167,13 @@ def chat_history(request, conversation_id):
                 # Updated to "%I:%M %p" (e.g., 03:30 PM) to match your updated consumers.py
                 "created_at": msg.created_at.strftime("%I:%M %p"),
             }
-            for msg in messages
-        ]
+            for msg in page
+        ],
+        # Pass back as ?before= / ?after= to fetch the neighbouring pages
+        "before_cursor": encode_keyset_cursor(page[0].created_at, page[0].id) if page and has_older else None,
+        "after_cursor": encode_keyset_cursor(page[-1].created_at, page[-1].id) if page else after,
+        "has_older": bool(page) and has_older,
+        "has_newer": has_newer,
     })
 
 
@@ -153,14 +226,16 @@ def start_conversation(request, user_id):
 @require_POST
 def clear_chat(request, conversation_id):
     """Hides all current messages in a conversation for the requesting user."""
-    conversation = get_object_or_404(Conversation, id=conversation_id, participants=request.user)
-    
-    # Get all messages currently in this conversation
-    messages = conversation.messages.exclude(cleared_by=request.user)
-    
-    # Add the current user to the 'cleared_by' field for all these messages
-    for msg in messages:
-        msg.cleared_by.add(request.user)
+    membership = get_object_or_404(ConversationMembership, conversation_id=conversation_id, user=request.user)
+
+    # Move this user's watermark up to the newest message; everything at or below it is hidden
+    last_id = (
+        Message.objects
+        .filter(conversation_id=conversation_id)
+        .aggregate(last_id=Max("id"))["last_id"]
+    )
+    if last_id:
+        ConversationMembership.objects.filter(pk=membership.pk).update(cleared_up_to=last_id)
         
     return JsonResponse({"success": True, "message": "Chat history cleared."})
 
@@ -0,0 +1,59 @@
+"""
+Base class for the benchmark_* management commands.
+
+Each benchmark builds its own synthetic rows, times the old code path
+against the current one and prints queries and wall time per run. All
+of it happens inside one transaction that is rolled back at the end, so
+a benchmark can be pointed at a development database without leaving
+anything behind. Benchmarks that go through database_sync_to_async
+(which closes connections found inside a transaction) set
+rollback = False and delete their rows in cleanup() instead.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+
+
+class BenchmarkCommand(BaseCommand):
+    rollback = True
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=5, help="Timed runs per code path.")
+
+    def handle(self, *args, **options):
+        self.repeat = max(1, options["repeat"])
+        if not self.rollback:
+            try:
+                self.run(**options)
+            finally:
+                self.cleanup()
+            return
+
+        with transaction.atomic():
+            self.run(**options)
+            transaction.set_rollback(True)
+
+    def run(self, **options):
+        raise NotImplementedError
+
+    def cleanup(self):
+        """Deletes what run() created, for benchmarks that can't be rolled back."""
+
+    def measure(self, label, fn):
+        """Runs `fn` once to count its queries, then `repeat` more times for the timing."""
+        # The log is capped at 9000 entries, and a full one makes the capture below read 0
+        connection.queries_log.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            fn()
+
+        # Timed without DEBUG's query logging, which would add its own overhead
+        with override_settings(DEBUG=False):
+            started = time.perf_counter()
+            for _ in range(self.repeat):
+                fn()
+            elapsed_ms = (time.perf_counter() - started) / self.repeat * 1000
+
+        self.stdout.write(f"{label:<40} {len(ctx.captured_queries):>6} queries {elapsed_ms:>10.1f} ms")
+        return elapsed_ms
@@ -0,0 +1,56 @@
+import json
+
+from channels.generic.websocket import AsyncWebsocketConsumer
+
+from apps.chat.consumers import ChatSocketMixin
+from apps.notifications.consumers import NotificationSocketMixin
+
+
+class SessionConsumer(ChatSocketMixin, NotificationSocketMixin, AsyncWebsocketConsumer):
+    """
+    The one WebSocket each browser tab opens (/ws/).
+
+    Joins the user_<user_id> group once, so every chat message and
+    notification is delivered a single time. All frames are JSON objects
+    with a "type":
+    - Client -> server: "send" (chat message), "ping"
+    - Server -> client: "inbox_message", "notification", "unread_count", "ack", "error", "pong"
+    """
+
+    # Incoming frame type -> handler method name
+    frame_handlers = {
+        "send": "receive_send",
+        "ping": "receive_ping",
+    }
+
+    async def connect(self):
+        self.user = self.scope["user"]
+        if not self.user or self.user.is_anonymous:
+            await self.close()
+            return
+
+        self.user_group = f"user_{self.user.id}"
+        await self.channel_layer.group_add(self.user_group, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, close_code):
+        if hasattr(self, "user_group"):
+            await self.channel_layer.group_discard(self.user_group, self.channel_name)
+
+    async def receive(self, text_data=None, bytes_data=None):
+        try:
+            data = json.loads(text_data or "{}")
+        except json.JSONDecodeError:
+            return
+        if not isinstance(data, dict):
+            return
+
+        handler_name = self.frame_handlers.get(data.get("type"))
+        if handler_name:
+            await getattr(self, handler_name)(data)
+
+    async def receive_ping(self, data):
+        await self.send_frame("pong")
+
+    async def send_frame(self, frame_type, **fields):
+        await self.send(text_data=json.dumps({"type": frame_type, **fields}))
@@ -0,0 +1,208 @@
+"""
+A tiny Redis-protocol (RESP2/RESP3) server implementing only pub/sub, written in
+pure Python on asyncio.
+
+It is a stand-in for a real Redis when running several ASGI workers locally
+or in load tests, and is enough for channels_redis' RedisPubSubChannelLayer
+(CHANNEL_LAYER=redis-pubsub). It does not implement keys, Lua scripting or
+persistence, so the list-based channels_redis.core layer needs a real Redis.
+
+Start it with `python manage.py fake_redis_server`.
+"""
+import asyncio
+
+
+class ProtocolError(Exception):
+    pass
+
+
+def _bulk(value):
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, str):
+        value = value.encode()
+    return b"$%d\r\n%s\r\n" % (len(value), value)
+
+
+def _integer(value):
+    return b":%d\r\n" % value
+
+
+def _array(*items):
+    return b"*%d\r\n" % len(items) + b"".join(items)
+
+
+def _push(protocol, *items):
+    """Out-of-band pub/sub frame: a RESP3 push, or a plain array for RESP2 clients."""
+    prefix = b">" if protocol == 3 else b"*"
+    return prefix + b"%d\r\n" % len(items) + b"".join(items)
+
+
+def _hello_reply(protocol):
+    fields = [
+        (b"server", _bulk(b"redis")),
+        (b"version", _bulk(b"7.0.0")),
+        (b"proto", _integer(protocol)),
+        (b"id", _integer(1)),
+        (b"mode", _bulk(b"standalone")),
+        (b"role", _bulk(b"master")),
+        (b"modules", _array()),
+    ]
+    body = b"".join(_bulk(key) + value for key, value in fields)
+    if protocol == 3:
+        return b"%%%d\r\n" % len(fields) + body
+    return b"*%d\r\n" % (len(fields) * 2) + body
+
+
+async def _read_command(reader):
+    """Reads one command as a list of bytes arguments, or None on EOF."""
+    line = await reader.readline()
+    if not line:
+        return None
+    line = line.rstrip(b"\r\n")
+
+    if not line.startswith(b"*"):
+        # Inline command, e.g. typed into telnet/redis-cli
+        return line.split()
+
+    try:
+        count = int(line[1:])
+    except ValueError:
+        raise ProtocolError("invalid multibulk length")
+
+    args = []
+    for _ in range(count):
+        header = (await reader.readline()).rstrip(b"\r\n")
+        if not header.startswith(b"$"):
+            raise ProtocolError("expected '$'")
+        size = int(header[1:])
+        data = await reader.readexactly(size + 2)
+        args.append(data[:-2])
+    return args
+
+
+class FakeRedisServer:
+    """Pub/sub-only RESP server. One instance holds the channel subscriptions for all clients."""
+
+    def __init__(self, host="127.0.0.1", port=6379):
+        self.host = host
+        self.port = port
+        # channel name -> set of client writers
+        self.subscribers = {}
+        # client writer -> negotiated RESP version (2 until the client sends HELLO 3)
+        self.protocols = {}
+        self._server = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        return self._server
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def _handle_client(self, reader, writer):
+        subscriptions = set()
+        try:
+            while True:
+                try:
+                    args = await _read_command(reader)
+                except ProtocolError as e:
+                    writer.write(b"-ERR Protocol error: %s\r\n" % str(e).encode())
+                    break
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+
+                if args is None:
+                    break
+                if not args:
+                    continue
+
+                if not self._dispatch(args, writer, subscriptions):
+                    break
+                await writer.drain()
+        finally:
+            for channel in subscriptions:
+                self._unsubscribe(channel, writer)
+            self.protocols.pop(writer, None)
+            writer.close()
+
+    def _dispatch(self, args, writer, subscriptions):
+        """Runs one command. Returns False when the connection should close."""
+        command = args[0].upper()
+        params = args[1:]
+        protocol = self.protocols.get(writer, 2)
+
+        if command == b"HELLO":
+            try:
+                requested = int(params[0]) if params else protocol
+            except ValueError:
+                requested = 0
+            if requested not in (2, 3):
+                writer.write(b"-NOPROTO unsupported protocol version\r\n")
+            else:
+                self.protocols[writer] = requested
+                writer.write(_hello_reply(requested))
+
+        elif command == b"PING":
+            if subscriptions:
+                writer.write(_push(protocol, _bulk(b"pong"), _bulk(params[0] if params else b"")))
+            elif params:
+                writer.write(_bulk(params[0]))
+            else:
+                writer.write(b"+PONG\r\n")
+
+        elif command == b"ECHO" and params:
+            writer.write(_bulk(params[0]))
+
+        elif command in (b"SELECT", b"CLIENT", b"FLUSHDB", b"FLUSHALL", b"AUTH"):
+            # Accepted for client compatibility; there is no keyspace to act on
+            writer.write(b"+OK\r\n")
+
+        elif command == b"PUBLISH" and len(params) == 2:
+            writer.write(_integer(self._publish(*params)))
+
+        elif command == b"SUBSCRIBE" and params:
+            for channel in params:
+                subscriptions.add(channel)
+                self.subscribers.setdefault(channel, set()).add(writer)
+                writer.write(_push(protocol, _bulk(b"subscribe"), _bulk(channel), _integer(len(subscriptions))))
+
+        elif command == b"UNSUBSCRIBE":
+            channels = params or list(subscriptions)
+            if not channels:
+                writer.write(_push(protocol, _bulk(b"unsubscribe"), _bulk(None), _integer(0)))
+            for channel in channels:
+                subscriptions.discard(channel)
+                self._unsubscribe(channel, writer)
+                writer.write(_push(protocol, _bulk(b"unsubscribe"), _bulk(channel), _integer(len(subscriptions))))
+
+        elif command == b"QUIT":
+            writer.write(b"+OK\r\n")
+            return False
+
+        else:
+            name = command.decode(errors="replace").lower()
+            writer.write(b"-ERR unknown command '%s'\r\n" % name.encode())
+
+        return True
+
+    def _publish(self, channel, message):
+        receivers = self.subscribers.get(channel, ())
+        items = (_bulk(b"message"), _bulk(channel), _bulk(message))
+        for writer in list(receivers):
+            if writer.is_closing():
+                self._unsubscribe(channel, writer)
+                continue
+            writer.write(_push(self.protocols.get(writer, 2), *items))
+        return len(receivers)
+
+    def _unsubscribe(self, channel, writer):
+        receivers = self.subscribers.get(channel)
+        if receivers is None:
+            return
+        receivers.discard(writer)
+        if not receivers:
+            del self.subscribers[channel]
@@ -0,0 +1,22 @@
+import asyncio
+
+from django.core.management.base import BaseCommand
+
+from apps.core.fake_redis import FakeRedisServer
+
+
+class Command(BaseCommand):
+    help = 'Runs a pure-Python, pub/sub-only Redis stand-in for the redis-pubsub channel layer.'
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=6379)
+
+    def handle(self, *args, **options):
+        server = FakeRedisServer(host=options["host"], port=options["port"])
+        self.stdout.write(f"Fake Redis listening on {options['host']}:{options['port']} (Ctrl+C to stop)")
+
+        try:
+            asyncio.run(server.serve_forever())
+        except KeyboardInterrupt:
+            self.stdout.write("Stopped.")
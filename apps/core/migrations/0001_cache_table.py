@@ -0,0 +1,19 @@
+# Creates the table behind the "database" cache backend (CACHE_BACKEND), so a
+# plain `migrate` is enough. Does nothing for the other backends or if the table
+# already exists.
+
+from django.core.management import call_command
+from django.db import migrations
+
+
+def create_cache_table(apps, schema_editor):
+    call_command("createcachetable", database=schema_editor.connection.alias, verbosity=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = []
+
+    operations = [
+        migrations.RunPython(create_cache_table, migrations.RunPython.noop),
+    ]
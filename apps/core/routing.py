@@ -0,0 +1,12 @@
+# apps/core/routing.py
+from django.urls import re_path
+from . import consumers
+
+websocket_urlpatterns = [
+    # One multiplexed socket per browser tab (chat + notifications)
+    re_path(r"^ws/$", consumers.SessionConsumer.as_asgi()),
+
+    # Old per-feature paths, kept so cached pages still connect
+    re_path(r"^ws/chat/inbox/$", consumers.SessionConsumer.as_asgi()),
+    re_path(r"^ws/notifications/$", consumers.SessionConsumer.as_asgi()),
+]
@@ -0,0 +1,72 @@
+/* =========================================================
+   SHARED WEBSOCKET (one connection per tab)
+   Chat and notifications both ride on /ws/. Features register
+   handlers by frame type instead of opening their own sockets:
+
+     AppSocket.on("notification", (data) => { ... });
+     AppSocket.send({ type: "send", conversation_id: 1, message: "hi" });
+========================================================= */
+window.AppSocket = (function () {
+  const handlers = new Map();   // frame type -> [callbacks]
+  let socket = null;
+  let reconnectTimer = null;
+  let reconnectDelay = 1000;
+  const MAX_RECONNECT_DELAY = 30000;
+
+  function connect() {
+    if (socket && (socket.readyState === WebSocket.OPEN || socket.readyState === WebSocket.CONNECTING)) return;
+
+    const protocol = window.location.protocol === "https:" ? "wss" : "ws";
+    socket = new WebSocket(`${protocol}://${window.location.host}/ws/`);
+
+    socket.onopen = () => {
+      reconnectDelay = 1000;
+      dispatch({ type: "open" });
+    };
+
+    socket.onmessage = (event) => {
+      let data;
+      try { data = JSON.parse(event.data); } catch { return; }
+      dispatch(data);
+    };
+
+    socket.onclose = () => {
+      socket = null;
+      dispatch({ type: "close" });
+
+      // Back off so a restarting server isn't hammered by every open tab
+      console.warn(`Realtime connection lost. Reconnecting in ${reconnectDelay / 1000}s...`);
+      reconnectTimer = setTimeout(connect, reconnectDelay);
+      reconnectDelay = Math.min(reconnectDelay * 2, MAX_RECONNECT_DELAY);
+    };
+  }
+
+  function dispatch(data) {
+    (handlers.get(data.type) || []).forEach((callback) => {
+      try {
+        callback(data);
+      } catch (err) {
+        console.error(`Error handling "${data.type}" frame`, err);
+      }
+    });
+  }
+
+  function on(type, callback) {
+    if (!handlers.has(type)) handlers.set(type, []);
+    handlers.get(type).push(callback);
+  }
+
+  function isOpen() {
+    return !!socket && socket.readyState === WebSocket.OPEN;
+  }
+
+  function send(frame) {
+    if (!isOpen()) return false;
+    socket.send(JSON.stringify(frame));
+    return true;
+  }
+
+  connect();
+
+  return { on, send, isOpen, connect };
+})();
@@ -1,3 +1,166 @@
-from django.test import TestCase
+import asyncio
+import base64
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
 
-# Create your tests here.
+from django.conf import settings
+from django.db import connection
+from django.test import Client, TransactionTestCase
+
+from apps.accounts.models import User
+from apps.chat.models import Conversation, ConversationMembership
+
+
+# Runs one Daphne worker against the test database: argv is the database file and port
+DAPHNE_WORKER = """
+import sys
+from django.conf import settings
+settings.DATABASES["default"]["NAME"] = sys.argv[1]
+from daphne.cli import CommandLineInterface
+CommandLineInterface().run(["-b", "127.0.0.1", "-p", sys.argv[2], "elearning.asgi:application"])
+"""
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_for_port(port, timeout=20):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise TimeoutError(f"Nothing listening on port {port}")
+
+
+class _TabSocket:
+    """A browser tab's /ws/ socket: a bare-bones client for JSON text frames."""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def open(cls, port, cookie):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        key = base64.b64encode(os.urandom(16)).decode()
+        writer.write((
+            f"GET /ws/ HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\n"
+            f"Upgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n"
+            f"Cookie: {cookie}\r\n\r\n"
+        ).encode())
+        status = await asyncio.wait_for(reader.readline(), 10)
+        if b" 101 " not in status:
+            raise ConnectionError(f"Handshake refused: {status!r}")
+        while await reader.readline() not in (b"\r\n", b""):
+            pass
+        return cls(reader, writer)
+
+    def send_frame(self, **frame):
+        payload = json.dumps(frame).encode()
+        # Client frames are masked; short payloads only need the 16-bit length form
+        mask = os.urandom(4)
+        if len(payload) < 126:
+            header = bytes([0x81, 0x80 | len(payload)])
+        else:
+            header = bytes([0x81, 0x80 | 126]) + len(payload).to_bytes(2, "big")
+        self.writer.write(header + mask + bytes(b ^ mask[i % 4] for i, b in enumerate(payload)))
+
+    async def _read(self):
+        first, second = await self.reader.readexactly(2)
+        length = second & 0x7F
+        if length == 126:
+            length = int.from_bytes(await self.reader.readexactly(2), "big")
+        elif length == 127:
+            length = int.from_bytes(await self.reader.readexactly(8), "big")
+        return first & 0x0F, await self.reader.readexactly(length)
+
+    async def next_frame(self, frame_type, timeout=10):
+        while True:
+            opcode, payload = await asyncio.wait_for(self._read(), timeout)
+            if opcode == 0x8:
+                raise ConnectionError("Socket closed by the server")
+            if opcode == 0x1:
+                frame = json.loads(payload)
+                if frame["type"] == frame_type:
+                    return frame
+
+    def close(self):
+        self.writer.close()
+
+
+class CrossWorkerDeliveryTests(TransactionTestCase):
+    """
+    Two Daphne processes sharing the redis-pubsub channel layer through the
+    bundled fake Redis server: a chat message sent on one worker reaches
+    the recipient's socket held by the other.
+    """
+
+    def start(self, *args, env):
+        process = subprocess.Popen(
+            [sys.executable, *args], cwd=settings.BASE_DIR, env=env,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        self.addCleanup(process.wait, 10)
+        self.addCleanup(process.terminate)
+        return process
+
+    def setUp(self):
+        redis_port = _free_port()
+        env = {
+            **os.environ,
+            "DJANGO_SETTINGS_MODULE": "elearning.settings",
+            "CHANNEL_LAYER": "redis-pubsub",
+            "REDIS_URL": f"redis://127.0.0.1:{redis_port}/0",
+            "CACHE_BACKEND": "database",
+        }
+        self.start("manage.py", "fake_redis_server", "--port", str(redis_port), env=env)
+        _wait_for_port(redis_port)
+
+        self.worker_ports = [_free_port(), _free_port()]
+        for port in self.worker_ports:
+            self.start("-c", DAPHNE_WORKER, str(connection.settings_dict["NAME"]), str(port), env=env)
+        for port in self.worker_ports:
+            _wait_for_port(port)
+
+    def session_cookie(self, user):
+        client = Client()
+        client.force_login(user)
+        return f"{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}"
+
+    def test_message_crosses_workers(self):
+        alice = User.objects.create_user(username="alice", password="x")
+        bob = User.objects.create_user(username="bob", password="x")
+        conversation = Conversation.objects.create()
+        ConversationMembership.objects.bulk_create([
+            ConversationMembership(conversation=conversation, user=alice),
+            ConversationMembership(conversation=conversation, user=bob),
+        ])
+        alice_cookie, bob_cookie = self.session_cookie(alice), self.session_cookie(bob)
+
+        async def exchange():
+            alice_tab = await _TabSocket.open(self.worker_ports[0], alice_cookie)
+            bob_tab = await _TabSocket.open(self.worker_ports[1], bob_cookie)
+            try:
+                bob_tab.send_frame(type="send", conversation_id=conversation.id, message="hi alice", client_id="1")
+                await bob_tab.next_frame("ack")
+                return await alice_tab.next_frame("inbox_message")
+            finally:
+                alice_tab.close()
+                bob_tab.close()
+
+        frame = asyncio.run(exchange())
+
+        self.assertEqual(frame["message"], "hi alice")
+        self.assertEqual(frame["sender_id"], bob.id)
+        self.assertEqual(frame["conversation_id"], conversation.id)
@@ -0,0 +1,18 @@
+import base64
+import binascii
+from datetime import datetime
+
+
+def encode_keyset_cursor(created_at, pk):
+    """Opaque keyset cursor for a row's (created_at, id) position."""
+    raw = f"{created_at.isoformat()}|{pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_keyset_cursor(cursor):
+    """Returns (created_at, id) or raises ValueError for a malformed cursor."""
+    try:
+        created_at, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(pk)
+    except (TypeError, UnicodeDecodeError, binascii.Error) as e:
+        raise ValueError("Invalid cursor") from e
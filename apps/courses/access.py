@@ -0,0 +1,73 @@
+from django.db.models import Exists, OuterRef
+from django.http import HttpResponseForbidden
+from django.shortcuts import get_object_or_404
+
+from .models import Course, Teaching, Enrollment
+
+
+# A user's relationship to a course
+ACCESS_TEACHER = "teacher"
+ACCESS_ENROLLED = "enrolled"
+ACCESS_NONE = "none"
+
+
+def _load_course_access(user, course_id):
+    teaches = Teaching.objects.filter(course=OuterRef("pk"), teacher=user)
+    enrolled = Enrollment.objects.filter(course=OuterRef("pk"), student=user)
+
+    # Both checks in a single query
+    flags = (
+        Course.objects
+        .filter(pk=course_id)
+        .annotate(teaches=Exists(teaches), enrolled=Exists(enrolled))
+        .values_list("teaches", "enrolled")
+        .first()
+    )
+    if not flags:
+        return ACCESS_NONE
+
+    is_teacher, is_enrolled = flags
+    if is_teacher:
+        return ACCESS_TEACHER
+    if is_enrolled:
+        return ACCESS_ENROLLED
+    return ACCESS_NONE
+
+
+def get_course_access(request, course_id):
+    """
+    Returns ACCESS_TEACHER, ACCESS_ENROLLED or ACCESS_NONE for the requesting
+    user. Both relationships are resolved with one query, memoized on the
+    request, so every later check for the same course is free.
+    """
+    user = request.user
+    if not user.is_authenticated:
+        return ACCESS_NONE
+
+    memo = request.__dict__.setdefault("_course_access", {})
+    if course_id not in memo:
+        memo[course_id] = _load_course_access(user, course_id)
+    return memo[course_id]
+
+
+def is_course_teacher(request, course_id):
+    return get_course_access(request, course_id) == ACCESS_TEACHER
+
+
+def is_course_student(request, course_id):
+    return get_course_access(request, course_id) == ACCESS_ENROLLED
+
+
+def get_course_for_teacher_or_403(request, course_id):
+    """Shared guard for teacher-only course actions (materials, deadlines, enrollments)."""
+    course = get_object_or_404(Course, id=course_id)
+    user = request.user
+
+    is_teacher = (
+        user.is_authenticated
+        and user.role == user.Role.TEACHER
+        and is_course_teacher(request, course.id)
+    )
+    if not is_teacher:
+        return None, HttpResponseForbidden("Teachers only")
+    return course, None
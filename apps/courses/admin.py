@@ -1,3 +1,4 @@
+from django import forms
 from django.contrib import admin
 from django.utils.html import format_html
 
@@ -8,7 +9,10 @@ from .models import (
     Enrollment,
     CourseFeedback,
     Deadline,
+    CourseStats,
+    WaitlistEntry,
 )
+from .seats import _take_seat
 
 
 # =========================
@@ -88,13 +92,56 @@ class TeachingAdmin(admin.ModelAdmin):
     autocomplete_fields = ("teacher", "course")
 
 
+class EnrollmentAdminForm(forms.ModelForm):
+    class Meta:
+        model = Enrollment
+        fields = "__all__"
+
+    def clean(self):
+        cleaned_data = super().clean()
+        course, student = cleaned_data.get("course"), cleaned_data.get("student")
+        if self.instance.pk or self.errors or not (course and student):
+            return cleaned_data
+        if Enrollment.objects.filter(course=course, student=student).exists():
+            # Left to the unique check, without taking a seat
+            return cleaned_data
+
+        # Same seat claim as course_enroll; the admin saves in this transaction,
+        # so the seat and the row commit (or roll back) together
+        if not _take_seat(course):
+            raise forms.ValidationError("This course is full.")
+        self.instance._seat_taken = True
+        return cleaned_data
+
+
 @admin.register(Enrollment)
 class EnrollmentAdmin(admin.ModelAdmin):
+    form = EnrollmentAdminForm
     list_display = ("student", "course", "progress", "grade")
     list_filter = ("grade", "course")
     search_fields = ("student__username", "student__full_name", "course__title", "course__course_id")
     autocomplete_fields = ("student", "course")
 
+    def get_readonly_fields(self, request, obj=None):
+        # Moving an enrollment would skip the new course's seat claim
+        if obj is not None:
+            return ("student", "course")
+        return ()
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if not change:
+            WaitlistEntry.objects.filter(course=obj.course, student=obj.student).delete()
+
+
+@admin.register(WaitlistEntry)
+class WaitlistEntryAdmin(admin.ModelAdmin):
+    list_display = ("student", "course", "created_at")
+    list_filter = ("course",)
+    search_fields = ("student__username", "student__full_name", "course__title", "course__course_id")
+    autocomplete_fields = ("student", "course")
+    ordering = ("course", "id")
+
 
 @admin.register(CourseFeedback)
 class CourseFeedbackAdmin(admin.ModelAdmin):
@@ -114,3 +161,12 @@ class DeadlineAdmin(admin.ModelAdmin):
     ordering = ("due_at",)
     autocomplete_fields = ("course",)
     readonly_fields = ("created_at",)
+
+
+
+@admin.register(CourseStats)
+class CourseStatsAdmin(admin.ModelAdmin):
+    list_display = ("course", "students_total", "materials_total", "rating_count", "rating_sum", "updated_at")
+    search_fields = ("course__title", "course__course_id")
+    list_select_related = ("course",)
+    readonly_fields = [f.name for f in CourseStats._meta.fields]
@@ -0,0 +1,33 @@
+from django.db.models import F
+
+from .models import CourseStats
+
+
+# Cached course_detail fragments also expire on their own, as a safety net for missed invalidations
+COURSE_FRAGMENT_TIMEOUT = 60 * 10
+
+# Cache alias the fragments are stored in (settings.CACHES)
+COURSE_FRAGMENT_CACHE = "fragments"
+
+
+def get_course_fragment_version(stats):
+    """
+    Version embedded in the {% cache %} keys of a course's viewer-independent
+    fragments (header, materials list, deadlines tab). It is a column of
+    the course's CourseStats row, which the page loads along with the
+    course, so reading it costs no query.
+
+    Because the version comes from the database, the fragments themselves
+    can live in a per-process memory cache: a process holding an old copy
+    only ever has it under an old key.
+    """
+    return stats.fragments_version
+
+
+def invalidate_course_fragments(*course_ids):
+    """
+    Drops every cached fragment of the given courses (see signals.py). Runs
+    in the writer's transaction, so readers see the new version together
+    with the rows that changed.
+    """
+    CourseStats.objects.filter(course_id__in=course_ids).update(fragments_version=F("fragments_version") + 1)
@@ -0,0 +1,229 @@
+"""
+Bulk enrollment import (CSV upload on the students tab and the
+import_enrollments management command).
+
+Rows are processed in batches of IMPORT_BATCH_SIZE. Each batch resolves
+its courses, students and existing enrollments with one query per table.
+Seats are then claimed per course through seats._take_seats, which locks
+the course's seat counter until commit: under that lock the enrollments
+are re-checked, inserted with one bulk_create and the students taken off
+the waitlist, and unused seats are given back. Only rows that were really
+inserted are counted as created.
+
+bulk_create sends no post_save signals, so the remaining per-row side
+effects are done once per course when the import finishes: the fragment
+cache is refreshed, and each course's teachers get one
+"N students enrolled" notification instead of one per student.
+"""
+import csv
+import io
+
+from django.db import transaction
+from django.db.models import Q
+
+from apps.accounts.models import User
+from apps.jobs.queue import enqueue
+
+from .fragments import invalidate_course_fragments
+from .models import Course, Enrollment, Teaching, WaitlistEntry
+from .seats import _give_back_seats, _take_seats
+
+IMPORT_BATCH_SIZE = 1000
+
+# Problems kept for the report; the counters still cover every row
+MAX_REPORTED_ERRORS = 50
+
+# Row outcomes
+CREATED = "created"
+ALREADY_ENROLLED = "already_enrolled"
+UNKNOWN_STUDENT = "unknown_student"
+UNKNOWN_COURSE = "unknown_course"
+COURSE_UNAVAILABLE = "course_unavailable"
+COURSE_FULL = "course_full"
+
+_ERROR_MESSAGES = {
+    ALREADY_ENROLLED: "already enrolled",
+    UNKNOWN_STUDENT: "no active student with that username or email",
+    UNKNOWN_COURSE: "no such course",
+    COURSE_UNAVAILABLE: "course has no teacher yet",
+    COURSE_FULL: "course is full",
+}
+
+
+def read_enrollment_csv(fileobj, course=None):
+    """
+    Yields (line number, course reference, student reference) from a CSV
+    with a `student` column (username or email) and, unless `course` is
+    given, a `course` column (course code or numeric id).
+    """
+    if isinstance(fileobj.read(0), bytes):
+        fileobj = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+
+    reader = csv.DictReader(fileobj)
+    columns = {(name or "").strip().lower() for name in reader.fieldnames or ()}
+    required = {"student"} if course else {"student", "course"}
+    if not required <= columns:
+        raise ValueError(f"CSV must have a header row with: {', '.join(sorted(required))}")
+
+    for row in reader:
+        row = {(key or "").strip().lower(): (value or "").strip() for key, value in row.items()}
+        if not row.get("student"):
+            continue
+        yield reader.line_num, course.id if course else row.get("course", ""), row["student"]
+
+
+def _batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class _ImportState:
+    """Lookups and counters carried from one batch to the next."""
+
+    def __init__(self):
+        # course reference -> Course, or None if there is no such course
+        self.courses = {}
+        # ids of courses whose teachers have been looked up
+        self.checked = set()
+        # ids of courses without a teacher
+        self.unavailable = set()
+        # course id -> rows inserted
+        self.created_by_course = {}
+        self.counts = dict.fromkeys(_ERROR_MESSAGES, 0)
+        self.counts[CREATED] = 0
+        self.errors = []
+
+    def reject(self, line, reason, reference):
+        self.counts[reason] += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, f"{reference}: {_ERROR_MESSAGES[reason]}"))
+
+    def resolve_courses(self, references):
+        missing = {str(ref) for ref in references} - set(self.courses)
+        if not missing:
+            return
+
+        ids = {int(ref) for ref in missing if ref.isdigit()}
+        found = Course.objects.filter(Q(course_id__in=missing) | Q(id__in=ids))
+        for course in found:
+            for ref in (course.course_id, str(course.id)):
+                if ref in missing:
+                    self.courses[ref] = course
+        for ref in missing:
+            self.courses.setdefault(ref, None)
+
+        new_ids = {c.id for c in self.courses.values() if c is not None} - self.checked
+        if not new_ids:
+            return
+        taught = set(Teaching.objects.filter(course_id__in=new_ids).values_list("course_id", flat=True))
+        self.unavailable |= new_ids - taught
+        self.checked |= new_ids
+
+
+def _import_batch(state, batch):
+    state.resolve_courses(course_ref for _, course_ref, _ in batch)
+
+    student_refs = {student_ref for _, _, student_ref in batch}
+    students = {}
+    for user_id, username, email in (
+        User.objects
+        .filter(Q(username__in=student_refs) | Q(email__in=student_refs), role=User.Role.STUDENT, is_active=True)
+        .values_list("id", "username", "email")
+    ):
+        students[username] = user_id
+        students[email] = user_id
+
+    course_ids = {c.id for c in state.courses.values() if c is not None}
+    existing = set(
+        Enrollment.objects
+        .filter(course_id__in=course_ids, student_id__in=set(students.values()))
+        .values_list("course_id", "student_id")
+    )
+
+    # course id -> (Course, [(line, student reference, student id), ...])
+    planned = {}
+    for line, course_ref, student_ref in batch:
+        course = state.courses.get(str(course_ref))
+        student_id = students.get(student_ref)
+
+        if course is None:
+            state.reject(line, UNKNOWN_COURSE, course_ref)
+        elif course.id in state.unavailable:
+            state.reject(line, COURSE_UNAVAILABLE, course_ref)
+        elif student_id is None:
+            state.reject(line, UNKNOWN_STUDENT, student_ref)
+        elif (course.id, student_id) in existing:
+            state.reject(line, ALREADY_ENROLLED, student_ref)
+        else:
+            # Also catches the same student listed twice in the file
+            existing.add((course.id, student_id))
+            planned.setdefault(course.id, (course, []))[1].append((line, student_ref, student_id))
+
+    for course, rows in planned.values():
+        _enroll_rows(state, course, rows)
+
+
+def _enroll_rows(state, course, rows):
+    """Claims seats for one course's planned rows and inserts as many as fit."""
+    with transaction.atomic():
+        claimed = _take_seats(course, len(rows))
+
+        # Re-checked under the seat lock: enrollments made since the batch was read
+        student_ids = [student_id for _, _, student_id in rows]
+        enrolled = set(
+            Enrollment.objects
+            .filter(course=course, student_id__in=student_ids)
+            .values_list("student_id", flat=True)
+        )
+        to_insert = []
+        for line, student_ref, student_id in rows:
+            if student_id in enrolled:
+                state.reject(line, ALREADY_ENROLLED, student_ref)
+            elif len(to_insert) >= claimed:
+                state.reject(line, COURSE_FULL, student_ref)
+            else:
+                to_insert.append(student_id)
+        if not to_insert:
+            _give_back_seats(course, claimed)
+            return
+
+        Enrollment.objects.bulk_create(
+            [Enrollment(course=course, student_id=student_id) for student_id in to_insert],
+            batch_size=IMPORT_BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        # ignore_conflicts reports nothing back; none of these rows existed under the lock, so count them
+        inserted = Enrollment.objects.filter(course=course, student_id__in=to_insert).count()
+        _give_back_seats(course, claimed - inserted)
+        state.counts[ALREADY_ENROLLED] += len(to_insert) - inserted
+
+        WaitlistEntry.objects.filter(course=course, student_id__in=to_insert).delete()
+
+    state.counts[CREATED] += inserted
+    state.created_by_course[course.id] = state.created_by_course.get(course.id, 0) + inserted
+
+
+def import_enrollments(rows, batch_size=IMPORT_BATCH_SIZE, notify=True):
+    """
+    Enrolls students from (line, course reference, student reference) rows,
+    as produced by read_enrollment_csv.
+
+    Returns {"counts": {outcome: rows}, "errors": [(line, message), ...]}.
+    """
+    state = _ImportState()
+    for batch in _batches(rows, batch_size):
+        _import_batch(state, batch)
+
+    # CourseStats.students_total was already moved by the seat claims
+    for course_id, inserted in state.created_by_course.items():
+        invalidate_course_fragments(course_id)
+        if notify and inserted:
+            enqueue("notifications.enrollments_imported", course_id=course_id, count=inserted)
+
+    return {"counts": state.counts, "errors": state.errors}
@@ -0,0 +1,16 @@
+from apps.jobs.queue import register
+
+from .models import Course
+from .seats import fill_from_waitlist
+
+
+# ========================================================
+# Background handlers queued by signals.py
+# ========================================================
+@register("courses.fill_waitlist")
+def fill_waitlist(course_id):
+    course = Course.objects.filter(id=course_id).first()
+    if not course:
+        # The course was deleted, taking its waitlist with it
+        return
+    fill_from_waitlist(course)
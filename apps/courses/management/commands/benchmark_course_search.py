@@ -0,0 +1,47 @@
+import random
+
+from apps.core.benchmarks import BenchmarkCommand
+from apps.courses.models import Course
+from apps.courses.search import LikeCourseSearch, get_course_search_backend
+
+
+class Command(BenchmarkCommand):
+    help = 'Times catalog search on synthetic courses, icontains against the full-text backend, on throwaway data.'
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument("--courses", type=int, default=100_000, help="Synthetic courses to search.")
+        parser.add_argument("--words", type=int, default=60, help="Words per course description.")
+        parser.add_argument("--query", help="Search input (defaults to a word prefix matching a few thousand courses).")
+
+    def run(self, **options):
+        rng = random.Random(1)
+        vocabulary = [
+            "".join(rng.choices("abcdefghijklmnopqrstuvwxyz", k=rng.randint(4, 10))) for _ in range(2000)
+        ]
+
+        self.stdout.write(f"Creating {options['courses']} courses...")
+        courses = Course.objects.bulk_create(
+            [
+                Course(
+                    title=" ".join(rng.choices(vocabulary, k=4)).title(),
+                    description=" ".join(rng.choices(vocabulary, k=options["words"])),
+                )
+                for _ in range(options["courses"])
+            ],
+            batch_size=2000,
+        )
+        backend = get_course_search_backend()
+        # bulk_create sends no post_save, so index them like the signals would
+        backend.index(courses)
+
+        # By default a prefix of one word, as typed into the search box
+        query = options["query"] or vocabulary[123][:4]
+        self.stdout.write(f"Searching for '{query}' with {type(backend).__name__}:")
+        catalog = Course.objects.all()
+        for label, search in (("icontains (old)", LikeCourseSearch()), ("full-text", backend)):
+            self.measure(f"{label}, top 12", lambda: list(
+                search.search(catalog, query).order_by("-search_rank", "-created_at")[:12]
+            ))
+            self.measure(f"{label}, count", lambda: search.search(catalog, query).count())
+            self.stdout.write(f"{'':<40} {search.search(catalog, query).count():>6} matches")
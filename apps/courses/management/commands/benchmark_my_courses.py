@@ -0,0 +1,62 @@
+from django.db.models import Prefetch
+
+from apps.accounts.models import User
+from apps.core.benchmarks import BenchmarkCommand
+from apps.courses.models import Course, CourseFeedback, CourseStats, Enrollment, Teaching
+from apps.courses.utils import _get_enrolled_courses_data
+
+
+def _load_all_courses(user):
+    """The old loader: every enrolled course at once, patched up in a Python loop."""
+    progress_map = {e.course_id: e.progress for e in Enrollment.objects.filter(student=user)}
+    courses = Course.objects.filter(id__in=set(progress_map)).prefetch_related(
+        Prefetch("teachings", queryset=Teaching.objects.select_related("teacher"), to_attr="course_teachings"),
+        Prefetch("feedback", queryset=CourseFeedback.objects.filter(student=user), to_attr="user_feedback"),
+    )
+
+    enrolled_courses = []
+    for course in courses:
+        course.progress = progress_map.get(course.id, 0)
+        course.teachers = [t.teacher for t in course.course_teachings]
+        feedback = course.user_feedback[0] if course.user_feedback else None
+        course.feedback_rating = feedback.rating if feedback else 0
+        course.feedback_comment = feedback.comment if feedback else ""
+        enrolled_courses.append(course)
+    return enrolled_courses
+
+
+def _walk_pages(user):
+    cursor, rows = None, 0
+    while True:
+        page, cursor = _get_enrolled_courses_data(user, before=cursor)
+        rows += len(page)
+        if cursor is None:
+            return rows
+
+
+class Command(BenchmarkCommand):
+    help = "Times a student's \"my courses\" loader, old all-at-once loader against keyset pages, on throwaway data."
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument("--enrollments", type=int, default=500, help="Courses the student is enrolled in.")
+
+    def run(self, **options):
+        teacher = User.objects.create(username="benchmark-teacher", role=User.Role.TEACHER)
+        student = User.objects.create(username="benchmark-student", role=User.Role.STUDENT)
+        courses = Course.objects.bulk_create([
+            Course(title=f"Benchmark course {i}") for i in range(options["enrollments"])
+        ])
+        Teaching.objects.bulk_create([Teaching(course=c, teacher=teacher) for c in courses])
+        Enrollment.objects.bulk_create([
+            Enrollment(course=c, student=student, progress=i % 101) for i, c in enumerate(courses)
+        ])
+        CourseFeedback.objects.bulk_create([
+            CourseFeedback(course=c, student=student, rating=4, comment="Good") for c in courses[::2]
+        ])
+        CourseStats.rebuild(course_ids=[c.id for c in courses])
+
+        self.stdout.write(f"Loading {len(courses)} enrollments:")
+        self.measure("all courses at once (old)", lambda: _load_all_courses(student))
+        self.measure("_get_enrolled_courses_data, page 1", lambda: _get_enrolled_courses_data(student))
+        self.measure("_get_enrolled_courses_data, all pages", lambda: _walk_pages(student))
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.courses.imports import CREATED, import_enrollments, read_enrollment_csv
+from apps.courses.models import Course
+
+
+class Command(BaseCommand):
+    help = (
+        'Bulk-enrolls students from a CSV with "course" (course code or id) and '
+        '"student" (username or email) columns.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("csv_path", help="Path to the CSV file.")
+        parser.add_argument(
+            "--course",
+            help="Enroll everyone into this course (code or id); the CSV then only needs a student column.",
+        )
+        parser.add_argument(
+            "--no-notify",
+            action="store_true",
+            help="Don't send the per-course summary notification to teachers.",
+        )
+
+    def handle(self, *args, **options):
+        course = None
+        if options["course"]:
+            reference = options["course"]
+            lookup = {"id": int(reference)} if reference.isdigit() else {"course_id": reference}
+            course = Course.objects.filter(**lookup).first()
+            if course is None:
+                raise CommandError(f"No course '{reference}'.")
+
+        try:
+            with open(options["csv_path"], encoding="utf-8-sig", newline="") as f:
+                result = import_enrollments(
+                    read_enrollment_csv(f, course=course),
+                    notify=not options["no_notify"],
+                )
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        for line, message in result["errors"]:
+            self.stderr.write(f"line {line}: {message}")
+
+        counts = result["counts"]
+        for outcome, count in counts.items():
+            if count and outcome != CREATED:
+                self.stdout.write(f"{outcome}: {count}")
+        self.stdout.write(self.style.SUCCESS(f"Enrolled {counts[CREATED]} student(s)."))
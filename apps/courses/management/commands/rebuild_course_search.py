@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.courses.search import get_course_search_backend, get_feedback_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the full-text search indexes for the course catalog and course reviews.'
+
+    def handle(self, *args, **options):
+        for label, backend in (
+            ("course", get_course_search_backend()),
+            ("review", get_feedback_search_backend()),
+        ):
+            self.stdout.write(f"Rebuilding {label} search index ({type(backend).__name__})...")
+            with transaction.atomic():
+                indexed = backend.rebuild()
+
+            self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} {label}(s)."))
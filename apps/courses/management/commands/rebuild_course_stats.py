@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from apps.courses.models import CourseStats
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the denormalized CourseStats rows from enrollments, materials and feedback.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "course_ids",
+            nargs="*",
+            type=int,
+            help="Only rebuild these course ids (defaults to every course).",
+        )
+
+    def handle(self, *args, **options):
+        course_ids = options["course_ids"] or None
+
+        self.stdout.write("Rebuilding course stats...")
+        rebuilt = CourseStats.rebuild(course_ids=course_ids)
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt stats for {rebuilt} course(s)."))
@@ -0,0 +1,54 @@
+# Generated by Django 4.2.27 on 2026-10-18 01:43
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_course_stats(apps, schema_editor):
+    Course = apps.get_model('courses', 'Course')
+    CourseStats = apps.get_model('courses', 'CourseStats')
+
+    rows = []
+    for course in Course.objects.all().iterator():
+        stars = dict(
+            course.feedback.values_list('rating').annotate(c=models.Count('id'))
+        )
+        rows.append(CourseStats(
+            course_id=course.id,
+            students_total=course.enrollments.count(),
+            materials_total=course.materials.count(),
+            rating_count=sum(stars.values()),
+            rating_sum=sum(star * count for star, count in stars.items()),
+            **{f'stars_{star}': stars.get(star, 0) for star in range(1, 6)},
+        ))
+    CourseStats.objects.bulk_create(rows, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseStats',
+            fields=[
+                ('course', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='courses.course')),
+                ('students_total', models.PositiveIntegerField(default=0)),
+                ('materials_total', models.PositiveIntegerField(default=0)),
+                ('rating_count', models.PositiveIntegerField(default=0)),
+                ('rating_sum', models.PositiveIntegerField(default=0)),
+                ('stars_1', models.PositiveIntegerField(default=0)),
+                ('stars_2', models.PositiveIntegerField(default=0)),
+                ('stars_3', models.PositiveIntegerField(default=0)),
+                ('stars_4', models.PositiveIntegerField(default=0)),
+                ('stars_5', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'course stats',
+            },
+        ),
+        migrations.RunPython(backfill_course_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+# Full-text index tables for apps/courses/search.py. They are not Django
+# models, so each database gets its own DDL.
+
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE courses_course_fts USING fts5("
+            "title, description, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        schema_editor.execute(
+            "INSERT INTO courses_course_fts (rowid, title, description) "
+            "SELECT id, title, description FROM courses_course"
+        )
+
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            "CREATE TABLE courses_course_search ("
+            "course_id bigint PRIMARY KEY REFERENCES courses_course (id) ON DELETE CASCADE, "
+            "document tsvector NOT NULL)"
+        )
+        schema_editor.execute(
+            "CREATE INDEX courses_course_search_document_gin ON courses_course_search USING GIN (document)"
+        )
+        schema_editor.execute(
+            "INSERT INTO courses_course_search (course_id, document) "
+            "SELECT id, setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(description, '')), 'B') FROM courses_course"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+
+    if vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS courses_course_fts")
+    elif vendor == 'postgresql':
+        schema_editor.execute("DROP TABLE IF EXISTS courses_course_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0002_coursestats'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,60 @@
+# Indexes for keyset-paginating a course's reviews, plus a full-text index
+# over review comments for apps/courses/search.py (vendor-specific DDL, like 0003).
+
+from django.db import migrations, models
+
+
+def create_feedback_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE courses_feedback_fts USING fts5("
+            "comment, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        schema_editor.execute(
+            "INSERT INTO courses_feedback_fts (rowid, comment) "
+            "SELECT id, comment FROM courses_coursefeedback"
+        )
+
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            "CREATE TABLE courses_feedback_search ("
+            "feedback_id bigint PRIMARY KEY REFERENCES courses_coursefeedback (id) ON DELETE CASCADE, "
+            "document tsvector NOT NULL)"
+        )
+        schema_editor.execute(
+            "CREATE INDEX courses_feedback_search_document_gin ON courses_feedback_search USING GIN (document)"
+        )
+        schema_editor.execute(
+            "INSERT INTO courses_feedback_search (feedback_id, document) "
+            "SELECT id, setweight(to_tsvector('english', coalesce(comment, '')), 'A') FROM courses_coursefeedback"
+        )
+
+
+def drop_feedback_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+
+    if vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS courses_feedback_fts")
+    elif vendor == 'postgresql':
+        schema_editor.execute("DROP TABLE IF EXISTS courses_feedback_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0003_course_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='coursefeedback',
+            index=models.Index(fields=['course', 'created_at', 'id'], name='courses_fb_course_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='coursefeedback',
+            index=models.Index(fields=['course', 'rating', 'created_at', 'id'], name='courses_fb_course_rating_idx'),
+        ),
+        migrations.RunPython(create_feedback_search_index, drop_feedback_search_index),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.27 on 2026-10-18 02:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0004_feedback_pagination_and_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(fields=['course', 'progress'], name='courses_enr_progress_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(fields=['course', 'grade'], name='courses_enr_grade_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.27 on 2026-10-18 02:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0006_waitlistentry'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(fields=['student', 'created_at', 'id'], name='courses_enr_stu_created_idx'),
+        ),
+    ]
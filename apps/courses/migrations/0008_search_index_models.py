@@ -0,0 +1,61 @@
+# Generated by Django 4.2.27 on 2026-10-18 03:06
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# The tsvector models are unmanaged, so their document type never reaches the
+# schema: TextField keeps this migration loadable without Postgres support.
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0007_enrollment_student_created_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseFTSEntry',
+            fields=[
+                ('course', models.OneToOneField(db_column='rowid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='fts_entry', serialize=False, to='courses.course')),
+                ('document', models.TextField(db_column='courses_course_fts')),
+            ],
+            options={
+                'db_table': 'courses_course_fts',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='CourseSearchEntry',
+            fields=[
+                ('course', models.OneToOneField(on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_entry', serialize=False, to='courses.course')),
+                ('document', models.TextField()),
+            ],
+            options={
+                'db_table': 'courses_course_search',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='FeedbackFTSEntry',
+            fields=[
+                ('feedback', models.OneToOneField(db_column='rowid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='fts_entry', serialize=False, to='courses.coursefeedback')),
+                ('document', models.TextField(db_column='courses_feedback_fts')),
+            ],
+            options={
+                'db_table': 'courses_feedback_fts',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='FeedbackSearchEntry',
+            fields=[
+                ('feedback', models.OneToOneField(on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_entry', serialize=False, to='courses.coursefeedback')),
+                ('document', models.TextField()),
+            ],
+            options={
+                'db_table': 'courses_feedback_search',
+                'managed': False,
+            },
+        ),
+    ]
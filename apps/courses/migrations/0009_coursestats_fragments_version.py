@@ -0,0 +1,19 @@
+# Generated by Django 4.2.27 on 2026-10-18 03:17
+
+from django.db import migrations, models
+import time
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0008_search_index_models'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='coursestats',
+            name='fragments_version',
+            field=models.BigIntegerField(default=time.time_ns),
+        ),
+    ]
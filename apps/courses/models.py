@@ -1,10 +1,18 @@
 import os
+import time
 
 from datetime import timedelta
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from django.utils import timezone
 
+try:
+    from django.contrib.postgres.search import SearchVectorField
+except ImportError:
+    # Postgres support isn't installed: the tsvector tables below only exist
+    # on Postgres, so any column type will do for their unmanaged models
+    SearchVectorField = models.TextField
+
 User = settings.AUTH_USER_MODEL
 
 
@@ -158,11 +166,47 @@ class Enrollment(models.Model):
 
     class Meta:
         unique_together = ("student", "course")
+        indexes = [
+            # Roster filters and sorts on the students tab
+            models.Index(fields=["course", "progress"], name="courses_enr_progress_idx"),
+            models.Index(fields=["course", "grade"], name="courses_enr_grade_idx"),
+            # Keyset pages of a student's "my courses" list
+            models.Index(fields=["student", "created_at", "id"], name="courses_enr_stu_created_idx"),
+        ]
 
     def __str__(self):
         return f"{self.student} enrolled in {self.course}"
 
 
+# =========================
+# Course Waitlist
+# =========================
+class WaitlistEntry(models.Model):
+    """
+    A student waiting for a seat in a full course. Entries are served
+    first come, first served (by id) as seats free up; see seats.py.
+    """
+    student = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        limit_choices_to={"role": "STUDENT"},
+        related_name="waitlist_entries"
+    )
+    course = models.ForeignKey(
+        Course,
+        on_delete=models.CASCADE,
+        related_name="waitlist"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ("student", "course")
+        verbose_name_plural = "waitlist entries"
+
+    def __str__(self):
+        return f"{self.student} waiting for {self.course}"
+
+
 # =========================
 # Course Feedback
 # =========================
@@ -186,6 +230,12 @@ class CourseFeedback(models.Model):
 
     class Meta:
         unique_together = ("student", "course")
+        indexes = [
+            # Keyset pagination of a course's reviews, newest first,
+            # optionally narrowed to one star rating
+            models.Index(fields=["course", "created_at", "id"], name="courses_fb_course_created_idx"),
+            models.Index(fields=["course", "rating", "created_at", "id"], name="courses_fb_course_rating_idx"),
+        ]
 
     def __str__(self):
         return f"Feedback by {self.student} for {self.course}"
@@ -225,3 +275,169 @@ class Deadline(models.Model):
 
     def __str__(self):
         return f"{self.course.title} – {self.title}"
+
+
+# =========================
+# Course Stats (denormalized)
+# =========================
+class CourseStats(models.Model):
+    """
+    One row per course holding the counters the catalog pages display.
+    Kept current by the signal handlers in signals.py, so listing pages can
+    read plain columns instead of joining enrollments/materials/feedback.
+    """
+    course = models.OneToOneField(
+        Course,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="stats"
+    )
+
+    students_total = models.PositiveIntegerField(default=0)
+    materials_total = models.PositiveIntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+
+    # Per-star histogram (1 to 5 stars)
+    stars_1 = models.PositiveIntegerField(default=0)
+    stars_2 = models.PositiveIntegerField(default=0)
+    stars_3 = models.PositiveIntegerField(default=0)
+    stars_4 = models.PositiveIntegerField(default=0)
+    stars_5 = models.PositiveIntegerField(default=0)
+
+    # Part of the course page's {% cache %} keys (see fragments.py). Starts
+    # from the clock, so a rebuilt row never reuses an old version.
+    fragments_version = models.BigIntegerField(default=time.time_ns)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "course stats"
+
+    def __str__(self):
+        return f"Stats for {self.course_id}"
+
+    @property
+    def avg_rating(self):
+        if not self.rating_count:
+            return 0
+        return self.rating_sum / self.rating_count
+
+    @property
+    def star_counts(self):
+        """Returns {star: count} for 1 to 5 stars."""
+        return {star: getattr(self, f"stars_{star}") for star in range(1, 6)}
+
+    @classmethod
+    def rebuild(cls, course_ids=None):
+        """
+        Recomputes stats from the source tables. Used by the
+        rebuild_course_stats command and as a fallback for missing rows.
+        """
+        courses = Course.objects.all()
+        if course_ids is not None:
+            courses = courses.filter(id__in=course_ids)
+
+        # One grouped query per source table, no multiplicative joins
+        enrolled = dict(
+            Enrollment.objects.filter(course__in=courses)
+            .values_list("course_id").annotate(c=models.Count("id"))
+        )
+        materials = dict(
+            CourseMaterial.objects.filter(course__in=courses)
+            .values_list("course_id").annotate(c=models.Count("id"))
+        )
+        histogram = {}
+        for course_id, rating, count in (
+            CourseFeedback.objects.filter(course__in=courses)
+            .values_list("course_id", "rating").annotate(c=models.Count("id"))
+        ):
+            histogram.setdefault(course_id, {})[rating] = count
+
+        rows = []
+        for course_id in courses.values_list("id", flat=True):
+            stars = histogram.get(course_id, {})
+            rows.append(cls(
+                course_id=course_id,
+                students_total=enrolled.get(course_id, 0),
+                materials_total=materials.get(course_id, 0),
+                rating_count=sum(stars.values()),
+                rating_sum=sum(star * count for star, count in stars.items()),
+                **{f"stars_{star}": stars.get(star, 0) for star in range(1, 6)},
+            ))
+
+        with transaction.atomic():
+            cls.objects.filter(course_id__in=[r.course_id for r in rows]).delete()
+            cls.objects.bulk_create(rows, batch_size=500)
+        return len(rows)
+
+
+# =========================
+# Search Index Rows (see search.py)
+# =========================
+# Read-only views of the full-text index tables from migrations 0003 and
+# 0004, so search.py can join them with ordinary lookups. Only the pair
+# for the current database exists; search.py writes them with raw SQL.
+class CourseFTSEntry(models.Model):
+    """A course's row in the SQLite FTS5 table."""
+    course = models.OneToOneField(
+        Course,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column="rowid",
+        db_constraint=False,
+        related_name="fts_entry"
+    )
+    # FTS5's hidden column named after the table, as taken by MATCH and bm25()
+    document = models.TextField(db_column="courses_course_fts")
+
+    class Meta:
+        managed = False
+        db_table = "courses_course_fts"
+
+
+class FeedbackFTSEntry(models.Model):
+    """A review's row in the SQLite FTS5 table."""
+    feedback = models.OneToOneField(
+        CourseFeedback,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column="rowid",
+        db_constraint=False,
+        related_name="fts_entry"
+    )
+    document = models.TextField(db_column="courses_feedback_fts")
+
+    class Meta:
+        managed = False
+        db_table = "courses_feedback_fts"
+
+
+class CourseSearchEntry(models.Model):
+    """A course's tsvector row on Postgres."""
+    course = models.OneToOneField(
+        Course,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        related_name="search_entry"
+    )
+    document = SearchVectorField()
+
+    class Meta:
+        managed = False
+        db_table = "courses_course_search"
+
+
+class FeedbackSearchEntry(models.Model):
+    """A review's tsvector row on Postgres."""
+    feedback = models.OneToOneField(
+        CourseFeedback,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        related_name="search_entry"
+    )
+    document = SearchVectorField()
+
+    class Meta:
+        managed = False
+        db_table = "courses_feedback_search"
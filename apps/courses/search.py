@@ -0,0 +1,296 @@
+"""
+Full-text search over the course catalog and course reviews.
+
+Each database gets its own backend, chosen by connection vendor (or by
+settings.COURSE_SEARCH_BACKEND / FEEDBACK_SEARCH_BACKEND, a dotted path to
+a backend class):
+- SQLite: an FTS5 virtual table ranked with bm25()
+- Postgres: a tsvector table with a GIN index, ranked with ts_rank()
+- anything else: an icontains filter over the same columns, unranked
+
+Indexed tables:
+- Course title + description: courses_course_fts / courses_course_search
+- CourseFeedback comment: courses_feedback_fts / courses_feedback_search
+
+The index tables are created in migrations 0003 and 0004, queried through
+the unmanaged *Entry models and kept in sync by post_save/post_delete
+signals. Rebuild them with `python manage.py rebuild_course_search`.
+"""
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import F, FloatField, Func, Lookup, Q, Value
+from django.utils.module_loading import import_string
+
+from .models import Course, CourseFeedback, CourseFTSEntry, FeedbackFTSEntry
+
+# Title matches count this many times more than description matches
+TITLE_WEIGHT = 10.0
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _search_terms(search_query):
+    """Splits user input into plain words, dropping any query syntax."""
+    return _WORD_RE.findall(search_query.lower())
+
+
+class _FTSMatch(Lookup):
+    """`document__match=<query>` on an FTS row: `<fts5 table> MATCH <query>`."""
+    lookup_name = "match"
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} MATCH {rhs}", (*lhs_params, *rhs_params)
+
+
+for _entry_model in (CourseFTSEntry, FeedbackFTSEntry):
+    _entry_model._meta.get_field("document").register_lookup(_FTSMatch)
+
+
+class _NegatedBM25(Func):
+    # bm25() is lower-is-better, so flip it to sort like ts_rank
+    function = "bm25"
+    template = "-%(function)s(%(expressions)s)"
+    output_field = FloatField()
+
+
+class LikeSearch:
+    """
+    Fallback for databases without a full-text backend: substring match,
+    no ranking. Subclasses set the model and its indexed text columns,
+    most important first.
+    """
+    model = None
+    columns = ()
+
+    def _like_filter(self, search_query):
+        condition = Q()
+        for column in self.columns:
+            condition |= Q(**{f"{column}__icontains": search_query})
+        return condition
+
+    def search(self, queryset, search_query):
+        return queryset.filter(self._like_filter(search_query)).annotate(
+            search_rank=Value(0.0, output_field=FloatField())
+        )
+
+    def filter(self, queryset, search_query):
+        """Like search(), but without ranking, for callers that keep their own order."""
+        return queryset.filter(self._like_filter(search_query))
+
+    def index(self, objs):
+        pass
+
+    def remove(self, ids):
+        pass
+
+    def rebuild(self):
+        return 0
+
+
+class SQLiteSearch(LikeSearch):
+    table = None
+    # Reverse accessor from the model to its FTS row (see models.py)
+    entry = "fts_entry"
+    # bm25() weight per column
+    weights = ()
+
+    def _match_expression(self, terms):
+        # Every word must match; the last one may be a prefix of a longer word
+        quoted = [f'"{term}"' for term in terms]
+        quoted[-1] += "*"
+        return " ".join(quoted)
+
+    def _match(self, terms):
+        return Q(**{f"{self.entry}__document__match": self._match_expression(terms)})
+
+    def search(self, queryset, search_query):
+        terms = _search_terms(search_query)
+        if not terms:
+            return super().search(queryset, search_query)
+
+        # A join rather than an id__in subquery: bm25() only works in the
+        # query that runs the MATCH, and a per-row MATCH would rescan the index
+        weights = [Value(w) for w in self.weights]
+        return queryset.filter(self._match(terms)).annotate(
+            search_rank=_NegatedBM25(F(f"{self.entry}__document"), *weights)
+        )
+
+    def filter(self, queryset, search_query):
+        terms = _search_terms(search_query)
+        if not terms:
+            return super().filter(queryset, search_query)
+
+        return queryset.filter(self._match(terms))
+
+    def index(self, objs):
+        rows = [(obj.id, *[getattr(obj, c) or "" for c in self.columns]) for obj in objs]
+        if not rows:
+            return
+        columns = ", ".join(self.columns)
+        placeholders = ", ".join(["%s"] * len(self.columns))
+        with connection.cursor() as cursor:
+            cursor.executemany(f"DELETE FROM {self.table} WHERE rowid = %s", [(r[0],) for r in rows])
+            cursor.executemany(f"INSERT INTO {self.table} (rowid, {columns}) VALUES (%s, {placeholders})", rows)
+
+    def remove(self, ids):
+        with connection.cursor() as cursor:
+            cursor.executemany(f"DELETE FROM {self.table} WHERE rowid = %s", [(pk,) for pk in ids])
+
+    def rebuild(self):
+        columns = ", ".join(self.columns)
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table}")
+            cursor.execute(
+                f"INSERT INTO {self.table} (rowid, {columns}) "
+                f"SELECT id, {columns} FROM {self.model._meta.db_table}"
+            )
+            return cursor.rowcount
+
+
+class PostgresSearch(LikeSearch):
+    table = None
+    # Name of the table's foreign key column to the indexed model
+    key_column = None
+    # Reverse accessor from the model to its tsvector row (see models.py)
+    entry = "search_entry"
+
+    def _document_sql(self, values):
+        # The first column is weighted 'A', the next 'B', and so on
+        return " || ".join(
+            f"setweight(to_tsvector('english', coalesce({value}, '')), '{weight}')"
+            for value, weight in zip(values, "ABCD")
+        )
+
+    def _tsquery(self, terms):
+        # Every word must match; the last one may be a prefix of a longer word
+        return " & ".join(terms[:-1] + [f"{terms[-1]}:*"])
+
+    def _query(self, terms):
+        # Imported here, so the other backends work without Postgres support installed
+        from django.contrib.postgres.search import SearchQuery
+
+        return SearchQuery(self._tsquery(terms), search_type="raw", config="english")
+
+    def search(self, queryset, search_query):
+        from django.contrib.postgres.search import SearchRank
+
+        terms = _search_terms(search_query)
+        if not terms:
+            return super().search(queryset, search_query)
+
+        query = self._query(terms)
+        return queryset.filter(**{f"{self.entry}__document": query}).annotate(
+            search_rank=SearchRank(F(f"{self.entry}__document"), query)
+        )
+
+    def filter(self, queryset, search_query):
+        terms = _search_terms(search_query)
+        if not terms:
+            return super().filter(queryset, search_query)
+
+        return queryset.filter(**{f"{self.entry}__document": self._query(terms)})
+
+    def index(self, objs):
+        rows = [(obj.id, *[getattr(obj, c) or "" for c in self.columns]) for obj in objs]
+        if not rows:
+            return
+        document = self._document_sql(["%s"] * len(self.columns))
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {self.table} ({self.key_column}, document) "
+                f"VALUES (%s, {document}) "
+                f"ON CONFLICT ({self.key_column}) DO UPDATE SET document = EXCLUDED.document",
+                rows,
+            )
+
+    def remove(self, ids):
+        # Rows also go away through the ON DELETE CASCADE foreign key
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table} WHERE {self.key_column} = ANY(%s)", [list(ids)])
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table}")
+            cursor.execute(
+                f"INSERT INTO {self.table} ({self.key_column}, document) "
+                f"SELECT id, {self._document_sql(self.columns)} FROM {self.model._meta.db_table}"
+            )
+            return cursor.rowcount
+
+
+# =========================
+# Course Catalog
+# =========================
+class LikeCourseSearch(LikeSearch):
+    model = Course
+    columns = ("title", "description")
+
+
+class SQLiteCourseSearch(SQLiteSearch, LikeCourseSearch):
+    table = "courses_course_fts"
+    weights = (TITLE_WEIGHT, 1.0)
+
+
+class PostgresCourseSearch(PostgresSearch, LikeCourseSearch):
+    table = "courses_course_search"
+    key_column = "course_id"
+
+
+# =========================
+# Course Reviews
+# =========================
+class LikeFeedbackSearch(LikeSearch):
+    model = CourseFeedback
+    columns = ("comment",)
+
+
+class SQLiteFeedbackSearch(SQLiteSearch, LikeFeedbackSearch):
+    table = "courses_feedback_fts"
+    weights = (1.0,)
+
+
+class PostgresFeedbackSearch(PostgresSearch, LikeFeedbackSearch):
+    table = "courses_feedback_search"
+    key_column = "feedback_id"
+
+
+COURSE_BACKENDS_BY_VENDOR = {
+    "sqlite": SQLiteCourseSearch,
+    "postgresql": PostgresCourseSearch,
+}
+
+FEEDBACK_BACKENDS_BY_VENDOR = {
+    "sqlite": SQLiteFeedbackSearch,
+    "postgresql": PostgresFeedbackSearch,
+}
+
+
+def get_course_search_backend():
+    backend_path = getattr(settings, "COURSE_SEARCH_BACKEND", None)
+    if backend_path:
+        return import_string(backend_path)()
+    return COURSE_BACKENDS_BY_VENDOR.get(connection.vendor, LikeCourseSearch)()
+
+
+def get_feedback_search_backend():
+    backend_path = getattr(settings, "FEEDBACK_SEARCH_BACKEND", None)
+    if backend_path:
+        return import_string(backend_path)()
+    return FEEDBACK_BACKENDS_BY_VENDOR.get(connection.vendor, LikeFeedbackSearch)()
+
+
+def search_courses(queryset, search_query):
+    """
+    Filters a Course queryset to matches for search_query and annotates
+    search_rank (higher is better). The caller decides the ordering.
+    """
+    return get_course_search_backend().search(queryset, search_query)
+
+
+def filter_feedback(queryset, search_query):
+    """Filters a CourseFeedback queryset to reviews whose comment matches search_query."""
+    return get_feedback_search_backend().filter(queryset, search_query)
@@ -0,0 +1,144 @@
+"""
+Race-free seat allocation for capped courses.
+
+CourseStats.students_total is the seat counter. A seat is claimed with a
+single conditional UPDATE:
+
+    UPDATE courses_coursestats SET students_total = students_total + 1
+    WHERE course_id = %s AND students_total < max_students
+
+The database applies it atomically, so concurrent enrollments can never
+push a course past max_students, and no COUNT(*) over the enrollments is
+needed. The enrollment row is inserted in the same transaction, so a
+failed insert gives the seat back.
+
+When a course is full the student joins its waitlist instead. Freed seats
+(an unenrollment, or a raised max_students) are handed to waiting students
+in order by fill_from_waitlist(), which runs as a background job.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import CourseStats, Enrollment, WaitlistEntry
+
+# Outcomes of enroll_student
+ENROLLED = "enrolled"
+ALREADY_ENROLLED = "already_enrolled"
+WAITLISTED = "waitlisted"
+ALREADY_WAITLISTED = "already_waitlisted"
+
+
+def _take_seat(course):
+    """Claims one seat. Returns False if the course is full."""
+    seats = CourseStats.objects.filter(course_id=course.id)
+    if course.max_students is not None:
+        seats = seats.filter(students_total__lt=course.max_students)
+
+    if seats.update(students_total=F("students_total") + 1):
+        return True
+
+    if CourseStats.objects.filter(course_id=course.id).exists():
+        return False
+
+    # No stats row yet: build it from the source tables and try once more
+    CourseStats.rebuild(course_ids=[course.id])
+    return bool(seats.update(students_total=F("students_total") + 1))
+
+
+def _take_seats(course, count):
+    """
+    Bulk counterpart of _take_seat for imports: claims up to `count` seats
+    and returns how many it got (fewer, or 0, once the course is full).
+
+    Must run inside a transaction. The first UPDATE locks the course's
+    counter until commit, so the claim is sized from a value no concurrent
+    enrollment can change, and _take_seat callers wait for the commit.
+    """
+    seats = CourseStats.objects.filter(course_id=course.id)
+    if not seats.update(students_total=F("students_total")):
+        # No stats row yet: rebuilding it inside this transaction holds it just the same
+        CourseStats.rebuild(course_ids=[course.id])
+
+    taken = seats.values_list("students_total", flat=True).get()
+    claim = count
+    if course.max_students is not None:
+        claim = max(0, min(count, course.max_students - taken))
+    if claim:
+        seats.update(students_total=F("students_total") + claim)
+    return claim
+
+
+def _give_back_seats(course, count):
+    """Returns seats claimed by _take_seats that ended up unused."""
+    if count:
+        CourseStats.objects.filter(course_id=course.id).update(students_total=F("students_total") - count)
+
+
+def _enroll_with_seat(course, student_id, from_waitlist=False):
+    """
+    Takes a seat and inserts the enrollment atomically. Returns the new
+    Enrollment, or None if the course is full. Raises IntegrityError
+    (with the seat given back) if the student is already enrolled.
+    """
+    with transaction.atomic():
+        if not _take_seat(course):
+            return None
+
+        enrollment = Enrollment(course=course, student_id=student_id)
+        # The seat above already counted this row (see signals.py)
+        enrollment._seat_taken = True
+        enrollment._from_waitlist = from_waitlist
+        enrollment.save()
+
+        WaitlistEntry.objects.filter(course=course, student_id=student_id).delete()
+        return enrollment
+
+
+def enroll_student(course, student):
+    """
+    Enrolls a student, or puts them on the waitlist when the course is full.
+    Returns one of ENROLLED, ALREADY_ENROLLED, WAITLISTED, ALREADY_WAITLISTED.
+    """
+    try:
+        enrollment = _enroll_with_seat(course, student.id)
+    except IntegrityError:
+        return ALREADY_ENROLLED
+
+    if enrollment is not None:
+        return ENROLLED
+
+    _, created = WaitlistEntry.objects.get_or_create(course=course, student=student)
+    return WAITLISTED if created else ALREADY_WAITLISTED
+
+
+def waitlist_position(course, student):
+    """The student's 1-based place in the course's waitlist, or None."""
+    entry_id = (
+        WaitlistEntry.objects
+        .filter(course=course, student=student)
+        .values_list("id", flat=True)
+        .first()
+    )
+    if entry_id is None:
+        return None
+    return WaitlistEntry.objects.filter(course=course, id__lte=entry_id).count()
+
+
+def fill_from_waitlist(course):
+    """
+    Enrolls waiting students, oldest first, until the course is full or
+    the waitlist is empty. Returns how many were enrolled.
+    """
+    enrolled = 0
+    while True:
+        entry = WaitlistEntry.objects.filter(course=course).order_by("id").first()
+        if entry is None:
+            return enrolled
+
+        try:
+            if _enroll_with_seat(course, entry.student_id, from_waitlist=True) is None:
+                return enrolled
+            enrolled += 1
+        except IntegrityError:
+            # Enrolled some other way in the meantime
+            entry.delete()
@@ -1,16 +1,186 @@
-from django.db.models.signals import post_delete
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 
-from .models import CourseMaterial
+from apps.accounts.models import User
+from apps.jobs.queue import enqueue
+
+from .fragments import invalidate_course_fragments
+from .models import Course, CourseStats, Enrollment, CourseMaterial, CourseFeedback, Deadline, Teaching, WaitlistEntry
+from .search import get_course_search_backend, get_feedback_search_backend
 
 
 @receiver(post_delete, sender=CourseMaterial)
 def auto_delete_file_on_delete(sender, instance, **kwargs):
     """
-    Deletes the physical file from the server's storage 
+    Deletes the physical file from the server's storage
     whenever a CourseMaterial database row is deleted.
     """
     if instance.file:
-        # instance.file.delete(save=False) uses Django's storage API, 
+        # instance.file.delete(save=False) uses Django's storage API,
         # so it safely handles local files, AWS S3, etc.
-        instance.file.delete(save=False)
\ No newline at end of file
+        instance.file.delete(save=False)
+
+
+# =========================
+# Course Stats Maintenance
+# =========================
+def _bump_course_stats(course_id, create_missing=True, **deltas):
+    """
+    Applies counter deltas (e.g. students_total=1) to a course's stats row
+    with a single UPDATE. If the row is missing it is rebuilt from scratch,
+    which already includes the change that triggered this call.
+    """
+    changes = {field: F(field) + delta for field, delta in deltas.items() if delta}
+    if not changes:
+        return
+
+    updated = CourseStats.objects.filter(course_id=course_id).update(**changes)
+    # Deletes skip the rebuild: during a Course cascade the course row is on its way out
+    if not updated and create_missing:
+        CourseStats.rebuild(course_ids=[course_id])
+
+
+@receiver(post_save, sender=Course)
+def create_course_stats(sender, instance, created, **kwargs):
+    if created:
+        CourseStats.objects.get_or_create(course=instance)
+
+
+@receiver(post_save, sender=Enrollment)
+def count_enrollment_added(sender, instance, created, **kwargs):
+    # Enrollments made through seats.py claimed their seat (the +1) up front
+    if created and not getattr(instance, "_seat_taken", False):
+        _bump_course_stats(instance.course_id, students_total=1)
+
+
+@receiver(post_delete, sender=Enrollment)
+def count_enrollment_removed(sender, instance, **kwargs):
+    _bump_course_stats(instance.course_id, create_missing=False, students_total=-1)
+
+
+@receiver(post_save, sender=CourseMaterial)
+def count_material_added(sender, instance, created, **kwargs):
+    if created:
+        _bump_course_stats(instance.course_id, materials_total=1)
+
+
+@receiver(post_delete, sender=CourseMaterial)
+def count_material_removed(sender, instance, **kwargs):
+    _bump_course_stats(instance.course_id, create_missing=False, materials_total=-1)
+
+
+@receiver(pre_save, sender=CourseFeedback)
+def remember_previous_rating(sender, instance, **kwargs):
+    # Feedback can be edited, so keep the old rating to move it between histogram buckets
+    instance._previous_rating = None
+    if instance.pk:
+        instance._previous_rating = (
+            CourseFeedback.objects.filter(pk=instance.pk)
+            .values_list("rating", flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=CourseFeedback)
+def count_feedback_saved(sender, instance, created, **kwargs):
+    previous = getattr(instance, "_previous_rating", None)
+
+    if created or previous is None:
+        _bump_course_stats(
+            instance.course_id,
+            rating_count=1,
+            rating_sum=instance.rating,
+            **{f"stars_{instance.rating}": 1},
+        )
+    elif previous != instance.rating:
+        deltas = {f"stars_{previous}": -1, f"stars_{instance.rating}": 1}
+        _bump_course_stats(
+            instance.course_id,
+            rating_sum=instance.rating - previous,
+            **deltas,
+        )
+
+
+@receiver(post_delete, sender=CourseFeedback)
+def count_feedback_removed(sender, instance, **kwargs):
+    _bump_course_stats(
+        instance.course_id,
+        create_missing=False,
+        rating_count=-1,
+        rating_sum=-instance.rating,
+        **{f"stars_{instance.rating}": -1},
+    )
+
+
+# =========================
+# Waitlist
+# =========================
+@receiver(post_delete, sender=Enrollment)
+def offer_freed_seat(sender, instance, **kwargs):
+    if WaitlistEntry.objects.filter(course_id=instance.course_id).exists():
+        enqueue("courses.fill_waitlist", course_id=instance.course_id)
+
+
+@receiver(post_save, sender=Course)
+def offer_added_seats(sender, instance, created, update_fields=None, **kwargs):
+    # Only a raised max_students can free seats
+    if created or (update_fields and "max_students" not in update_fields):
+        return
+    if WaitlistEntry.objects.filter(course=instance).exists():
+        enqueue("courses.fill_waitlist", course_id=instance.id)
+
+
+# =========================
+# Course Search Index Sync
+# =========================
+@receiver(post_save, sender=Course)
+def index_course_for_search(sender, instance, update_fields=None, **kwargs):
+    # Saves that only touch other columns leave the indexed text unchanged
+    if update_fields and not {"title", "description"} & set(update_fields):
+        return
+    get_course_search_backend().index([instance])
+
+
+@receiver(post_delete, sender=Course)
+def remove_course_from_search(sender, instance, **kwargs):
+    get_course_search_backend().remove([instance.id])
+
+
+@receiver(post_save, sender=CourseFeedback)
+def index_feedback_for_search(sender, instance, update_fields=None, **kwargs):
+    if update_fields and "comment" not in update_fields:
+        return
+    get_feedback_search_backend().index([instance])
+
+
+@receiver(post_delete, sender=CourseFeedback)
+def remove_feedback_from_search(sender, instance, **kwargs):
+    get_feedback_search_backend().remove([instance.id])
+
+
+# =========================
+# Course Detail Fragment Cache Invalidation
+# =========================
+@receiver([post_save, post_delete], sender=Course)
+def invalidate_course_header(sender, instance, **kwargs):
+    invalidate_course_fragments(instance.id)
+
+
+@receiver([post_save, post_delete], sender=Teaching)
+@receiver([post_save, post_delete], sender=Enrollment)
+@receiver([post_save, post_delete], sender=CourseMaterial)
+@receiver([post_save, post_delete], sender=Deadline)
+@receiver([post_save, post_delete], sender=CourseFeedback)
+def invalidate_course_detail_fragments(sender, instance, **kwargs):
+    invalidate_course_fragments(instance.course_id)
+
+
+@receiver(post_save, sender=User)
+def invalidate_instructor_header(sender, instance, update_fields=None, **kwargs):
+    # The header shows the instructor's name
+    if update_fields and not {"full_name", "username"} & set(update_fields):
+        return
+    if not instance.is_teacher:
+        return
+    invalidate_course_fragments(*Teaching.objects.filter(teacher=instance).values_list("course_id", flat=True))
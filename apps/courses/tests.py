@@ -1,3 +1,569 @@
-from django.test import TestCase
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.http import QueryDict
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.accounts.models import User
+from apps.jobs.queue import claim_next, run_job
+
+from .access import (
+    ACCESS_ENROLLED, ACCESS_NONE, ACCESS_TEACHER,
+    get_course_access, get_course_for_teacher_or_403, is_course_student, is_course_teacher,
+)
+from .export import roster_csv, roster_jsonl
+from .fragments import COURSE_FRAGMENT_CACHE, get_course_fragment_version
+from .imports import ALREADY_ENROLLED, COURSE_FULL, CREATED, import_enrollments
+from .models import Course, CourseFeedback, CourseMaterial, CourseStats, Deadline, Enrollment, Teaching, WaitlistEntry
+from .search import PostgresCourseSearch, PostgresFeedbackSearch, SQLiteCourseSearch, SQLiteFeedbackSearch
+from .seats import ENROLLED, WAITLISTED, _take_seats, enroll_student
+from .utils import (
+    _get_course_feedback_data, _get_course_roster, _get_course_roster_stats, _get_enrolled_courses_data,
+    _parse_roster_filters,
+)
+
+
+def make_user(username, role=User.Role.STUDENT):
+    return User.objects.create_user(username=username, password="x", role=role)
+
+
+class CourseAccessTests(TestCase):
+    def setUp(self):
+        self.course = Course.objects.create(course_id="C1", title="Course")
+        self.teacher = make_user("teacher", role=User.Role.TEACHER)
+        self.student = make_user("student")
+        Teaching.objects.create(teacher=self.teacher, course=self.course)
+
+    def request_for(self, user):
+        request = RequestFactory().get("/")
+        request.user = user
+        return request
+
+    def test_every_check_in_a_request_shares_one_query(self):
+        request = self.request_for(self.teacher)
+        with self.assertNumQueries(1):
+            self.assertEqual(get_course_access(request, self.course.id), ACCESS_TEACHER)
+            self.assertTrue(is_course_teacher(request, self.course.id))
+            self.assertFalse(is_course_student(request, self.course.id))
+
+    def test_teacher_guard_adds_only_the_course_lookup(self):
+        request = self.request_for(self.teacher)
+        with self.assertNumQueries(2):
+            course, response = get_course_for_teacher_or_403(request, self.course.id)
+            self.assertIsNone(response)
+            self.assertTrue(is_course_teacher(request, course.id))
+
+    def test_changes_apply_to_the_next_request(self):
+        enrollment = Enrollment.objects.create(student=self.student, course=self.course)
+        self.assertEqual(get_course_access(self.request_for(self.student), self.course.id), ACCESS_ENROLLED)
+
+        enrollment.delete()
+        self.assertEqual(get_course_access(self.request_for(self.student), self.course.id), ACCESS_NONE)
+
+
+class CourseStatsTests(TestCase):
+    FIELDS = [
+        "students_total", "materials_total", "rating_count", "rating_sum",
+        "stars_1", "stars_2", "stars_3", "stars_4", "stars_5",
+    ]
+
+    def stats(self, course):
+        return CourseStats.objects.filter(course=course).values(*self.FIELDS).get()
+
+    def run_jobs(self):
+        while (job := claim_next()) is not None:
+            run_job(job)
+
+    def test_mixed_writes_match_a_rebuild(self):
+        course = Course.objects.create(course_id="C1", title="Course", max_students=3)
+        other = Course.objects.create(course_id="C2", title="Other")
+        teacher = make_user("teacher", role=User.Role.TEACHER)
+        students = [make_user(f"student{i}") for i in range(5)]
+
+        # Seats through seats.py, the fifth student waits, a plain create on the other course
+        for student in students:
+            enroll_student(course, student)
+        Enrollment.objects.create(course=other, student=students[0])
+
+        # Leaving frees a seat for the waitlist (filled by a job)
+        Enrollment.objects.get(course=course, student=students[1]).delete()
+        self.run_jobs()
+
+        feedback = [
+            CourseFeedback.objects.create(course=course, student=s, rating=r)
+            for s, r in zip(students, (5, 4, 4, 2))
+        ]
+        CourseFeedback.objects.create(course=other, student=students[0], rating=1)
+        feedback[0].rating = 3
+        feedback[0].save()
+        feedback[1].comment = "Edited without a new rating"
+        feedback[1].save()
+        feedback[2].delete()
+        CourseFeedback.objects.filter(id=feedback[3].id).delete()
+
+        materials = [
+            CourseMaterial.objects.create(course=course, file=f"notes{i}.pdf", uploaded_by=teacher)
+            for i in range(3)
+        ]
+        materials[0].delete()
+        CourseMaterial.objects.filter(id=materials[1].id).delete()
+
+        maintained = {c.id: self.stats(c) for c in (course, other)}
+        CourseStats.rebuild()
+        self.assertEqual(maintained, {c.id: self.stats(c) for c in (course, other)})
+        self.assertEqual(maintained[course.id]["students_total"], 3)
+        self.assertEqual(maintained[course.id]["rating_sum"], 7)
+
+
+class CourseFeedbackSummaryTests(TestCase):
+    def setUp(self):
+        self.course = Course.objects.create(course_id="C1", title="Course")
+
+    def summary(self):
+        return _get_course_feedback_data(Course.objects.select_related("stats").get(id=self.course.id))
+
+    def test_aggregates_come_from_the_stats_row(self):
+        for i, rating in enumerate((5, 4, 4)):
+            CourseFeedback.objects.create(course=self.course, student=make_user(f"student{i}"), rating=rating)
+
+        summary = self.summary()
+        with self.assertNumQueries(0):
+            self.assertEqual((summary["total_reviews"], summary["avg_rating"]), (3, 4.3))
+            self.assertEqual(summary.star_display, ["full"] * 4 + ["half"])
+            self.assertEqual(
+                [(s["stars"], s["count"], s["percent"]) for s in summary.rating_stats],
+                [(5, 1, 33), (4, 2, 67), (3, 0, 0), (2, 0, 0), (1, 0, 0)],
+            )
+
+    def test_no_reviews(self):
+        summary = self.summary()
+        self.assertEqual((summary.total_reviews, summary.avg_rating), (0, 0))
+        self.assertEqual(summary.star_display, ["empty"] * 5)
+        self.assertEqual({s["percent"] for s in summary.rating_stats}, {0})
+
+    def test_missing_stats_row_is_rebuilt(self):
+        CourseFeedback.objects.create(course=self.course, student=make_user("student"), rating=2)
+        CourseStats.objects.filter(course=self.course).delete()
+
+        self.assertEqual(self.summary().avg_rating, 2)
+        self.assertTrue(CourseStats.objects.filter(course=self.course).exists())
+
+
+class CourseReviewsPagingTests(TestCase):
+    def setUp(self):
+        self.course = Course.objects.create(course_id="C1", title="Course")
+        comments = ["Great pacing", "Too fast", "Great examples", "Clear slides", "Slow pacing"]
+        self.reviews = [
+            CourseFeedback.objects.create(
+                course=self.course, student=make_user(f"student{i}"), rating=4 if i % 2 else 5, comment=comment,
+            )
+            for i, comment in enumerate(comments)
+        ]
+        # One shared timestamp: only the id tie-break can order the pages
+        CourseFeedback.objects.update(created_at=timezone.now())
+
+    def walk(self, **params):
+        """Ids of every page in order, following next_cursor."""
+        url = reverse("courses:course_reviews", args=[self.course.id])
+        pages, cursor = [], None
+        while True:
+            data = self.client.get(url, {"limit": 2, **params, **({"before": cursor} if cursor else {})}).json()
+            pages.append([r["id"] for r in data["results"]])
+            cursor = data["next_cursor"]
+            self.assertEqual(data["has_more"], cursor is not None)
+            if cursor is None:
+                return pages
+
+    def test_pages_cover_every_review_once_newest_first(self):
+        ids = [r.id for r in reversed(self.reviews)]
+        self.assertEqual(self.walk(), [ids[0:2], ids[2:4], ids[4:]])
+
+    def test_filters_apply_on_every_page(self):
+        fours = [r.id for r in reversed(self.reviews) if r.rating == 4]
+        self.assertEqual(self.walk(rating=4), [fours])
+
+        pacing = [self.reviews[4].id, self.reviews[0].id]
+        self.assertEqual(self.walk(search="pacing"), [pacing])
+        self.assertEqual(self.walk(search="great", rating=5), [[self.reviews[2].id, self.reviews[0].id]])
+
+    def test_malformed_cursor_is_400(self):
+        response = self.client.get(reverse("courses:course_reviews", args=[self.course.id]), {"before": "nope"})
+        self.assertEqual(response.status_code, 400)
+
+
+class CourseRosterTests(TestCase):
+    def setUp(self):
+        self.course = Course.objects.create(course_id="C1", title="Course")
+        self.teacher = make_user("teacher", role=User.Role.TEACHER)
+        Teaching.objects.create(teacher=self.teacher, course=self.course)
+        rows = [
+            ("alice", "Alice Adams", 90, "A"),
+            ("bob", "Bob Brown", 40, None),
+            ("carol", "Carol Clark", 70, "B"),
+            ("dan", "Dan Doe", 10, ""),
+            ("eve", "Eve Evans", 70, "A"),
+        ]
+        for username, full_name, progress, grade in rows:
+            student = User.objects.create_user(username=username, password="x", full_name=full_name)
+            Enrollment.objects.create(course=self.course, student=student, progress=progress, grade=grade)
+
+    def roster(self, **params):
+        return [e.student.username for e in _get_course_roster(self.course, **params)]
+
+    def test_stats_come_from_one_grouped_query(self):
+        with self.assertNumQueries(1):
+            stats = _get_course_roster_stats(self.course)
+
+        self.assertEqual((stats["total"], stats["avg_progress"]), (5, 56))
+        # NULL and "" are both ungraded, listed last
+        self.assertEqual(
+            [(g["grade"], g["count"], g["percent"]) for g in stats["grade_distribution"]],
+            [("A", 2, 40), ("B", 1, 20), ("none", 2, 40)],
+        )
+
+    def test_filters_and_sorts(self):
+        self.assertEqual(self.roster(grade="A", sort="oldest"), ["alice", "eve"])
+        self.assertEqual(self.roster(grade="none", sort="oldest"), ["bob", "dan"])
+        self.assertEqual(self.roster(min_progress=40, max_progress=70, sort="oldest"), ["bob", "carol", "eve"])
+        self.assertEqual(self.roster(q="car"), ["carol"])
+        self.assertEqual(self.roster(q="e", grade="A"), ["eve"])
+        # Progress ties fall back to the newest enrollment first
+        self.assertEqual(self.roster(sort="progress_desc"), ["alice", "eve", "carol", "bob", "dan"])
+        self.assertEqual(self.roster(sort="name")[:2], ["alice", "bob"])
+
+    def test_invalid_values_are_dropped(self):
+        filters = _parse_roster_filters(QueryDict("min_progress=abc&max_progress=150&sort=bogus"))
+        self.assertEqual((filters["min_progress"], filters["max_progress"], filters["sort"]), ("", 100, "recent"))
+
+    def test_students_tab_pages_the_filtered_roster(self):
+        self.client.force_login(self.teacher)
+        response = self.client.get(
+            reverse("courses:course_detail", args=[self.course.id]), {"tab": "students", "min_progress": 50}
+        )
+
+        self.assertEqual([e.student.username for e in response.context["enrollments"]], ["eve", "carol", "alice"])
+        self.assertEqual(response.context["roster_query"], "min_progress=50&sort=recent")
+        self.assertEqual(response.context["avg_progress"], 56)
+
+
+class MyCoursesPagingTests(TestCase):
+    def setUp(self):
+        self.student = make_user("student")
+        other = make_user("other")
+        teacher = make_user("teacher", role=User.Role.TEACHER)
+        self.courses = [Course.objects.create(course_id=f"C{i}", title=f"Course {i}") for i in range(5)]
+        for i, course in enumerate(self.courses):
+            Teaching.objects.create(teacher=teacher, course=course)
+            Enrollment.objects.create(course=course, student=self.student, progress=i * 10)
+        Enrollment.objects.create(course=self.courses[0], student=other)
+        CourseFeedback.objects.create(course=self.courses[0], student=self.student, rating=4, comment="Mine")
+        CourseFeedback.objects.create(course=self.courses[1], student=other, rating=1, comment="Not mine")
+        # One shared timestamp: only the id tie-break can order the pages
+        Enrollment.objects.update(created_at=timezone.now())
+
+    def walk(self, limit):
+        pages, cursor = [], None
+        while True:
+            # The enrollments with their annotations, then the teachers
+            with self.assertNumQueries(2):
+                page, cursor = _get_enrolled_courses_data(self.student, before=cursor, limit=limit)
+            pages.append(page)
+            if cursor is None:
+                return pages
+
+    def test_pages_cover_every_enrollment_once(self):
+        pages = self.walk(limit=2)
+        titles = [[e.course.title for e in page] for page in pages]
+        self.assertEqual(titles, [["Course 4", "Course 3"], ["Course 2", "Course 1"], ["Course 0"]])
+
+    def test_exactly_full_last_page(self):
+        Enrollment.objects.filter(course=self.courses[4], student=self.student).delete()
+        self.assertEqual([len(page) for page in self.walk(limit=2)], [2, 2])
+
+    def test_annotations_are_the_students_own(self):
+        by_title = {e.course.title: e for page in self.walk(limit=5) for e in page}
+
+        first = by_title["Course 0"]
+        self.assertEqual((first.enrollment_count, first.feedback_rating, first.feedback_comment), (2, 4, "Mine"))
+        second = by_title["Course 1"]
+        self.assertEqual((second.progress, second.feedback_rating, second.feedback_comment), (10, 0, ""))
+        with self.assertNumQueries(0):
+            self.assertEqual([t.teacher.username for t in second.course.teachings.all()], ["teacher"])
+
+    def test_malformed_cursor_raises(self):
+        with self.assertRaises(ValueError):
+            _get_enrolled_courses_data(self.student, before="not-a-cursor")
+
+
+class CourseFragmentCacheTests(TestCase):
+    # The same page with every {% cache %} block rendered from scratch
+    UNCACHED = {**settings.CACHES, COURSE_FRAGMENT_CACHE: {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+    # Warm pages: session, user, course with its stats, access, own feedback
+    # and unread count, plus the overdue count (deadlines) or the first page of reviews (feedback)
+    CACHED_QUERIES = {"overview": 6, "materials": 6, "deadlines": 7, "feedback": 7}
+
+    def setUp(self):
+        caches[COURSE_FRAGMENT_CACHE].clear()
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        media_root = override_settings(MEDIA_ROOT=media.name)
+        media_root.enable()
+        self.addCleanup(media_root.disable)
+
+        self.course = Course.objects.create(course_id="C1", title="Course")
+        teacher = make_user("teacher", role=User.Role.TEACHER)
+        Teaching.objects.create(teacher=teacher, course=self.course)
+        student = make_user("student")
+        Enrollment.objects.create(student=student, course=self.course)
+        for i in range(3):
+            CourseMaterial.objects.create(
+                course=self.course, file=SimpleUploadedFile(f"notes{i}.txt", b"notes"), uploaded_by=teacher,
+            )
+            Deadline.objects.create(course=self.course, title=f"Quiz {i}", due_at=timezone.now() + timedelta(days=i + 1))
+        self.client.force_login(student)
+
+    def get(self, tab):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("courses:course_detail", args=[self.course.id]), {"tab": tab})
+        self.assertEqual(response.status_code, 200)
+        return response, len(ctx.captured_queries)
+
+    def test_cached_page_issues_fewer_queries(self):
+        # The first visit also creates the student's notification inbox
+        self.get("overview")
+
+        for tab in ("overview", "materials", "deadlines", "feedback"):
+            with self.subTest(tab=tab):
+                with override_settings(CACHES=self.UNCACHED):
+                    _, uncached = self.get(tab)
+                self.get(tab)
+                _, cached = self.get(tab)
+                self.assertEqual(cached, self.CACHED_QUERIES[tab])
+                self.assertLess(cached, uncached)
+
+    def test_enrollment_count_reads_the_stats_row(self):
+        with override_settings(CACHES=self.UNCACHED), CaptureQueriesContext(connection) as ctx:
+            response, _ = self.get("overview")
+
+        self.assertEqual(response.context["enrollment_count"], 1)
+        counts = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith("SELECT COUNT(*)")]
+        self.assertFalse([sql for sql in counts if 'FROM "courses_enrollment"' in sql])
+
+    def test_changes_show_on_the_next_request(self):
+        self.get("deadlines")
+        Deadline.objects.create(course=self.course, title="Final exam", due_at=timezone.now() + timedelta(days=30))
+
+        response, _ = self.get("deadlines")
+        self.assertContains(response, "Final exam")
+        self.assertContains(response, "4 Total")
+
+    def test_version_moves_with_the_write(self):
+        version = get_course_fragment_version(CourseStats.objects.get(course=self.course))
+        with transaction.atomic():
+            Deadline.objects.create(course=self.course, title="Final exam", due_at=timezone.now())
+            # Already visible to the writing transaction, before any commit
+            self.assertNotEqual(get_course_fragment_version(CourseStats.objects.get(course=self.course)), version)
+
+
+class EnrollmentImportTests(TestCase):
+    def setUp(self):
+        self.course = Course.objects.create(course_id="C1", title="Course", max_students=3)
+        Teaching.objects.create(teacher=make_user("teacher", User.Role.TEACHER), course=self.course)
+        self.students = [make_user(f"student{i}") for i in range(5)]
+
+    def rows(self, students):
+        return [(i + 2, self.course.course_id, s.username) for i, s in enumerate(students)]
+
+    def test_claims_seats_up_to_the_cap(self):
+        Enrollment.objects.create(student=self.students[0], course=self.course)
+        WaitlistEntry.objects.create(student=self.students[1], course=self.course)
+
+        result = import_enrollments(self.rows(self.students), notify=False)
+
+        counts = result["counts"]
+        self.assertEqual((counts[CREATED], counts[ALREADY_ENROLLED], counts[COURSE_FULL]), (2, 1, 2))
+        self.assertEqual(Enrollment.objects.filter(course=self.course).count(), 3)
+        self.assertEqual(CourseStats.objects.get(course=self.course).students_total, 3)
+        # Imported students leave the waitlist
+        self.assertFalse(WaitlistEntry.objects.filter(course=self.course).exists())
+
+    def test_counts_only_inserted_rows(self):
+        # Enrolled after the batch was read but before its insert
+        late = self.students[0]
+
+        def take_seats(course, count):
+            claimed = _take_seats(course, count)
+            Enrollment.objects.create(student=late, course=course)
+            return claimed
+
+        with mock.patch("apps.courses.imports._take_seats", take_seats):
+            result = import_enrollments(self.rows(self.students[:2]), notify=False)
+
+        self.assertEqual(result["counts"][CREATED], 1)
+        self.assertEqual(result["counts"][ALREADY_ENROLLED], 1)
+        self.assertEqual(CourseStats.objects.get(course=self.course).students_total, 2)
+
+
+class ParallelEnrollmentTests(TransactionTestCase):
+    STUDENTS = 200
+    SEATS = 50
+
+    def test_parallel_enrollments_never_overfill(self):
+        course = Course.objects.create(course_id="C1", title="Course", max_students=self.SEATS)
+        User.objects.bulk_create([
+            User(username=f"student{i}", role=User.Role.STUDENT) for i in range(self.STUDENTS)
+        ])
+        students = list(User.objects.filter(role=User.Role.STUDENT))
+
+        start = threading.Barrier(self.STUDENTS)
+        outcomes = []
+
+        def enroll(student):
+            try:
+                start.wait()
+                outcomes.append(enroll_student(course, student))
+            finally:
+                # Each thread has its own connection
+                connection.close()
+
+        threads = [threading.Thread(target=enroll, args=(s,)) for s in students]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(outcomes.count(ENROLLED), self.SEATS)
+        self.assertEqual(outcomes.count(WAITLISTED), self.STUDENTS - self.SEATS)
+        self.assertEqual(Enrollment.objects.filter(course=course).count(), self.SEATS)
+        self.assertEqual(CourseStats.objects.get(course=course).students_total, self.SEATS)
+        self.assertEqual(WaitlistEntry.objects.filter(course=course).count(), self.STUDENTS - self.SEATS)
+
+
+class EnrollmentAdminTests(TestCase):
+    def setUp(self):
+        self.course = Course.objects.create(course_id="C1", title="Course", max_students=1)
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "x"))
+
+    def add(self, student):
+        return self.client.post("/admin/courses/enrollment/add/", {
+            "student": student.id, "course": self.course.id, "progress": 0, "grade": "",
+        })
+
+    def test_admin_takes_a_seat(self):
+        first, second = make_user("first"), make_user("second")
+        WaitlistEntry.objects.create(student=first, course=self.course)
+
+        self.assertEqual(self.add(first).status_code, 302)
+        self.assertContains(self.add(second), "This course is full.")
+
+        self.assertEqual(list(Enrollment.objects.values_list("student", flat=True)), [first.id])
+        self.assertEqual(CourseStats.objects.get(course=self.course).students_total, 1)
+        self.assertFalse(WaitlistEntry.objects.exists())
+
+
+class RosterExportTests(TestCase):
+    def test_csv_neutralises_formulas(self):
+        course = Course.objects.create(course_id="C1", title="Course")
+        student = User.objects.create_user(
+            username="-2+3", password="x", full_name='=HYPERLINK("http://evil","x")', email="@evil.com",
+        )
+        Enrollment.objects.create(student=student, course=course, progress=5)
+        enrollments = Enrollment.objects.filter(course=course)
+
+        lines = "".join(roster_csv(enrollments)).splitlines()
+        self.assertIn('\'-2+3,"\'=HYPERLINK(""http://evil"",""x"")",\'@evil.com', lines[1])
+        self.assertIn(",5,", lines[1])
+
+        # JSON Lines is data, not a spreadsheet: values are left alone
+        self.assertIn('"full_name": "=HYPERLINK', "".join(roster_jsonl(enrollments)))
+
+
+class SearchBackendTestsMixin:
+    course_search = None
+    feedback_search = None
+
+    def setUp(self):
+        # Saved through the ORM, so the signals index them
+        self.in_title = Course.objects.create(course_id="C1", title="Introduction to Python", description="Basics")
+        self.in_description = Course.objects.create(
+            course_id="C2", title="Data analysis", description="Pandas, with an introduction to Python first",
+        )
+        Course.objects.create(course_id="C3", title="Introduction to Rust", description="Ownership")
+
+    def search(self, query):
+        return self.course_search().search(Course.objects.all(), query).order_by("-search_rank")
+
+    def test_title_matches_rank_first(self):
+        self.assertEqual(list(self.search("python")), [self.in_title, self.in_description])
+
+    def test_every_word_must_match_and_the_last_is_a_prefix(self):
+        self.assertEqual(list(self.search("introduction pyth")), [self.in_title, self.in_description])
+        self.assertEqual(list(self.search("ownership pyth")), [])
+
+    def test_filter_feedback(self):
+        student = make_user("student")
+        liked = CourseFeedback.objects.create(course=self.in_title, student=student, rating=5, comment="Great examples")
+        CourseFeedback.objects.create(course=self.in_description, student=student, rating=2, comment="Too fast")
+
+        feedback = self.feedback_search().filter(CourseFeedback.objects.all(), "exam")
+        self.assertEqual(list(feedback), [liked])
+
+
+@skipUnless(connection.vendor == "sqlite", "FTS5 backend")
+class SQLiteSearchTests(SearchBackendTestsMixin, TestCase):
+    course_search = SQLiteCourseSearch
+    feedback_search = SQLiteFeedbackSearch
+
+
+class SearchWithoutPostgresSupportTests(SimpleTestCase):
+    def test_courses_app_loads_without_django_contrib_postgres(self):
+        # A fresh interpreter where importing the Postgres search module fails
+        code = (
+            "import sys, django; sys.modules['django.contrib.postgres.search'] = None; django.setup(); "
+            "from apps.courses.search import get_course_search_backend; "
+            "from django.core.management import call_command; call_command('check')"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code], cwd=settings.BASE_DIR, capture_output=True, text=True,
+            env={**os.environ, "DJANGO_SETTINGS_MODULE": "elearning.settings"},
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+
+@skipUnless(connection.vendor == "postgresql", "tsvector backend")
+class PostgresSearchTests(SearchBackendTestsMixin, TestCase):
+    course_search = PostgresCourseSearch
+    feedback_search = PostgresFeedbackSearch
+
+
+class CourseSearchBenchmarkTests(TestCase):
+    def test_benchmark_runs_and_leaves_nothing_behind(self):
+        out = StringIO()
+        call_command("benchmark_course_search", courses=50, repeat=1, stdout=out)
+
+        self.assertIn("full-text, top 12", out.getvalue())
+        self.assertFalse(Course.objects.exists())
+
+
+class MyCoursesBenchmarkTests(TestCase):
+    def test_benchmark_runs_and_leaves_nothing_behind(self):
+        out = StringIO()
+        call_command("benchmark_my_courses", enrollments=30, repeat=1, stdout=out)
+
+        self.assertIn("all pages", out.getvalue())
+        self.assertFalse(Enrollment.objects.exists())
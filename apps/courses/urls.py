@@ -15,6 +15,14 @@ urlpatterns = [
     path("<int:course_id>/enrollments/<int:enrollment_id>/remove/",
          views.enrollment_remove, name="enrollment_remove"),
 
+    # Enrollments (bulk import from CSV)
+    path("<int:course_id>/enrollments/import/",
+         views.enrollment_import, name="enrollment_import"),
+
+    # Roster export (roster.csv / roster.jsonl)
+    path("<int:course_id>/export/roster.<str:export_format>",
+         views.roster_export, name="roster_export"),
+
     # Materials
     path("<int:course_id>/materials/upload/",
          views.material_upload, name="material_upload"),
@@ -32,10 +40,14 @@ urlpatterns = [
     # Student Actions
     path("<int:course_id>/", views.course_detail, name="course_detail"),
     path("<int:course_id>/enroll/", views.course_enroll, name="course_enroll"),
+    path("<int:course_id>/waitlist/leave/", views.waitlist_leave, name="waitlist_leave"),
 
     # Feedback for a Course: GET to retrieve, POST to create
     path("<int:course_id>/feedback/", views.course_feedback, name="course_feedback"),
 
+    # Further pages of a Course's reviews, for the feedback tab's infinite scroll
+    path("<int:course_id>/reviews/", views.course_reviews, name="course_reviews"),
+
     # Course Search
     path("search/", views.course_search, name="course_search"),
 ]
@@ -1,22 +1,34 @@
-from django.db.models import Prefetch, Avg, Count, Exists, OuterRef, Q, Value, BooleanField
+from django.db.models import Prefetch, Avg, Count, Sum, Exists, OuterRef, Subquery, Q, Value, BooleanField, FloatField, TextField, F
+from django.db.models.functions import Cast, Coalesce, NullIf
+from django.utils.functional import cached_property
+
+from apps.accounts.search import matching_user_ids
+from apps.core.utils import encode_keyset_cursor, decode_keyset_cursor
+
 from .models import *
+from .search import filter_feedback, search_courses
+
+
+def _annotate_course_stats(queryset):
+    """
+    Attaches students_total, materials_total, avg_rating and rating_count
+    from the denormalized CourseStats row (a single one-to-one join).
+    """
+    return queryset.annotate(
+        students_total=Coalesce(F("stats__students_total"), 0),
+        materials_total=Coalesce(F("stats__materials_total"), 0),
+        rating_count=Coalesce(F("stats__rating_count"), 0),
+        avg_rating=Cast("stats__rating_sum", FloatField()) / NullIf("stats__rating_count", 0),
+    )
 
 
 def _get_annotated_courses_queryset(user=None, search_query=None):
     # 1. Base Annotations (Static stats)
-    queryset = Course.objects.annotate(
-        students_total=Count("enrollments", distinct=True),
-        materials_total=Count("materials", distinct=True),
-        avg_rating=Avg("feedback__rating"),
-        rating_count=Count("feedback", distinct=True)
-    )
+    queryset = _annotate_course_stats(Course.objects.all())
 
-    # 2. Search Logic
+    # 2. Search Logic (full-text index, best matches first)
     if search_query:
-        queryset = queryset.filter(
-            Q(title__icontains=search_query) | 
-            Q(description__icontains=search_query)
-        ).distinct() # Prevent duplicates if searching via M2M joins
+        queryset = search_courses(queryset, search_query)
 
     # 3. Relationship Annotations (Safe for AnonymousUsers)
     if user and user.is_authenticated:
@@ -39,54 +51,68 @@ def _get_annotated_courses_queryset(user=None, search_query=None):
             is_enrolled=Value(False, output_field=BooleanField())
         )
     
-    return queryset.order_by("-updated_at", "-created_at", "title")
+    ordering = ("-updated_at", "-created_at", "title")
+    if search_query:
+        ordering = ("-search_rank",) + ordering
+    return queryset.order_by(*ordering)
 
 
-def _get_enrolled_courses_data(user):
-    """Fetches courses a specific user is enrolled in, with teachers and progress."""
-    enrollments = Enrollment.objects.filter(student=user)
-    progress_map = {e.course_id: e.progress for e in enrollments}
-    enrolled_course_ids = set(progress_map.keys())
+# Enrollments per page on a student's "my courses" tab
+MY_COURSES_PAGE_SIZE = 20
 
-    teachers_prefetch = Prefetch(
-        "teachings",
-        queryset=Teaching.objects.select_related("teacher"),
-        to_attr="course_teachings"
-    )
-    
-    user_feedback_prefetch = Prefetch(
-        "feedback",
-        queryset=CourseFeedback.objects.filter(student=user),
-        to_attr="user_feedback"
-    )
 
-    # Fetch only the courses this user is enrolled in
-    courses_qs = Course.objects.filter(id__in=enrolled_course_ids).prefetch_related(
-        teachers_prefetch, user_feedback_prefetch
+def _get_enrolled_courses_data(user, before=None, limit=MY_COURSES_PAGE_SIZE):
+    """
+    One page of the courses a student is enrolled in, most recent first.
+
+    A single Enrollment query joins the course and annotates the course's
+    student count and the user's own rating and comment; teachers come from
+    one prefetch. Each enrollment keeps its progress, and the template reads
+    the course through enrollment.course.
+
+    Pages are keyset-paginated on (created_at, id) like the reviews list:
+    `before` is the cursor of the last enrollment already shown.
+
+    Returns (enrollments, next_cursor); next_cursor is None on the last page.
+    Raises ValueError for a malformed cursor.
+    """
+    own_feedback = CourseFeedback.objects.filter(student=user, course=OuterRef("course_id"))
+
+    enrollments = (
+        Enrollment.objects
+        .filter(student=user)
+        .select_related("course")
+        .annotate(
+            enrollment_count=Coalesce(F("course__stats__students_total"), 0),
+            feedback_rating=Coalesce(Subquery(own_feedback.values("rating")[:1]), 0),
+            feedback_comment=Coalesce(Subquery(own_feedback.values("comment")[:1]), Value(""), output_field=TextField()),
+        )
+        .prefetch_related(
+            Prefetch("course__teachings", queryset=Teaching.objects.select_related("teacher"))
+        )
     )
 
-    enrolled_courses = []
-    for course in courses_qs:
-        course.progress = progress_map.get(course.id, 0)
-        course.teachers = [t.teacher for t in course.course_teachings]
-        
-        feedback = course.user_feedback[0] if course.user_feedback else None
-        course.feedback_rating = feedback.rating if feedback else 0
-        course.feedback_comment = feedback.comment if feedback else ""
-        
-        enrolled_courses.append(course)
+    if before:
+        created_at, enrollment_id = decode_keyset_cursor(before)
+        enrollments = enrollments.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=enrollment_id)
+        )
 
-    return enrolled_courses, enrolled_course_ids
+    # Fetch one extra row to know whether another page exists
+    page = list(enrollments.order_by("-created_at", "-id")[:limit + 1])
+    next_cursor = None
+    if len(page) > limit:
+        page = page[:limit]
+        next_cursor = encode_keyset_cursor(page[-1].created_at, page[-1].id)
+
+    return page, next_cursor
 
 
 def _get_all_courses_catalog(enrolled_course_ids):
     """Fetches the global course catalog with average ratings."""
     teachers_prefetch = Prefetch("teachings", queryset=Teaching.objects.select_related("teacher"), to_attr="course_teachings")
     
-    catalog_qs = Course.objects.annotate(
-        avg_rating=Avg("feedback__rating"),
-        rating_count=Count("feedback")
-    ).prefetch_related(teachers_prefetch)
+    catalog_qs = _annotate_course_stats(Course.objects.all()).prefetch_related(teachers_prefetch)
 
     all_courses = []
     for course in catalog_qs:
@@ -97,48 +123,220 @@ def _get_all_courses_catalog(enrolled_course_ids):
     return all_courses
 
 
+class CourseFeedbackSummary:
+    """
+    Rating aggregates for one course, computed on first access.
+
+    The numbers come from the course's CourseStats row, whose count, sum and
+    per-star counters are adjusted in place on every CourseFeedback save and
+    delete (see signals.py), so nothing is aggregated over the reviews here.
+    Supports dict-style access (summary['avg_rating']) for older callers.
+    """
+
+    def __init__(self, course):
+        self.course = course
+
+    def __getitem__(self, key):
+        return getattr(self, key)
+
+    @cached_property
+    def stats(self):
+        try:
+            return self.course.stats
+        except CourseStats.DoesNotExist:
+            CourseStats.rebuild(course_ids=[self.course.id])
+            return CourseStats.objects.get(course_id=self.course.id)
+
+    @cached_property
+    def reviews(self):
+        # The QuerySet of reviews (lazy: only runs if iterated)
+        return CourseFeedback.objects.filter(course=self.course).select_related('student').order_by('-created_at')
+
+    @cached_property
+    def total_reviews(self):
+        return self.stats.rating_count
+
+    @cached_property
+    def avg_rating(self):
+        return round(self.stats.avg_rating, 1)
+
+    @cached_property
+    def star_display(self):
+        # Calculate the exact star breakdown (round to nearest 0.5)
+        nearest_half = round(self.avg_rating * 2) / 2
+        star_display = []
+
+        for i in range(1, 6):
+            if nearest_half >= i:
+                star_display.append('full')
+            elif nearest_half >= i - 0.5:
+                star_display.append('half')
+            else:
+                star_display.append('empty')
+        return star_display
+
+    @cached_property
+    def rating_stats(self):
+        # Rating Distribution (5 down to 1 stars)
+        counts = self.stats.star_counts
+        total_reviews = self.total_reviews
+        rating_stats = []
+
+        for star in range(5, 0, -1):
+            count = counts.get(star, 0)
+            percent = round((count / total_reviews * 100) if total_reviews > 0 else 0)
+            rating_stats.append({
+                'stars': star,
+                'percent': percent,
+                'count': count
+            })
+        return rating_stats
+
+
 def _get_course_feedback_data(course):
     """
-    Fetches reviews and calculates all rating statistics for a course.
-    Returns a dictionary to be used in views or APIs.
+    Returns the reviews and rating statistics for a course, for views or
+    APIs. Nothing is queried until a value is read.
     """
-    # Fetch the QuerySet of reviews
-    reviews = CourseFeedback.objects.filter(course=course).select_related('student').order_by('-created_at')
-    
-    # Basic Stats
-    total_reviews = reviews.count()
-    avg_rating_val = reviews.aggregate(a=Avg('rating'))['a'] or 0
-    avg_rating = round(avg_rating_val, 1)
-
-    # Calculate the exact star breakdown (round to nearest 0.5)
-    nearest_half = round(avg_rating * 2) / 2
-    star_display = []
-    
-    for i in range(1, 6):
-        if nearest_half >= i:
-            star_display.append('full')
-        elif nearest_half >= i - 0.5:
-            star_display.append('half')
-        else:
-            star_display.append('empty')
-
-    # Rating Distribution (1 to 5 stars)
-    counts = dict(reviews.values_list('rating').annotate(c=Count('id')))
-    rating_stats = []
-    
-    for star in range(5, 0, -1):
-        count = counts.get(star, 0)
-        percent = round((count / total_reviews * 100) if total_reviews > 0 else 0)
-        rating_stats.append({
-            'stars': star,
-            'percent': percent,
-            'count': count
-        })
+    return CourseFeedbackSummary(course)
+
+
+# Reviews per page on the feedback tab, and the most a client may ask for
+REVIEWS_PAGE_SIZE = 20
+REVIEWS_MAX_PAGE_SIZE = 50
+
+
+def _get_course_reviews_page(course, search_query="", rating=None, before=None, limit=REVIEWS_PAGE_SIZE):
+    """
+    One page of a course's reviews, newest first, optionally narrowed by a
+    comment search and an exact star rating.
+
+    Pages are keyset-paginated on (created_at, id): `before` is the cursor
+    of the last review already shown. The CourseFeedback (course, created_at, id)
+    and (course, rating, created_at, id) indexes serve both cases directly.
+
+    Returns (reviews, next_cursor); next_cursor is None on the last page.
+    Raises ValueError for a malformed cursor.
+    """
+    reviews = CourseFeedback.objects.filter(course=course).select_related('student')
+
+    if search_query:
+        reviews = filter_feedback(reviews, search_query)
+
+    if rating:
+        reviews = reviews.filter(rating=rating)
+
+    if before:
+        created_at, review_id = decode_keyset_cursor(before)
+        reviews = reviews.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=review_id)
+        )
+
+    # Fetch one extra row to know whether another page exists
+    page = list(reviews.order_by('-created_at', '-id')[:limit + 1])
+    next_cursor = None
+    if len(page) > limit:
+        page = page[:limit]
+        next_cursor = encode_keyset_cursor(page[-1].created_at, page[-1].id)
+
+    return page, next_cursor
+
+
+# Students per page on the students tab
+ROSTER_PAGE_SIZE = 25
+
+# ?sort= values for the roster, with their ordering (id breaks ties)
+ROSTER_SORTS = {
+    "recent": ("-id",),
+    "oldest": ("id",),
+    "progress_desc": ("-progress", "-id"),
+    "progress_asc": ("progress", "id"),
+    "name": ("student__full_name", "student__username", "id"),
+}
+
+# ?grade= value that selects students without a grade
+ROSTER_UNGRADED = "none"
+
+
+def _parse_roster_filters(params):
+    """
+    Reads the students tab filters from a QueryDict, dropping invalid values.
+    The keys are the query parameter names, so the result can be urlencoded
+    back into pagination links.
+    """
+    filters = {
+        "q": (params.get("q") or "").strip(),
+        "grade": (params.get("grade") or "").strip(),
+        "min_progress": "",
+        "max_progress": "",
+        "sort": params.get("sort") if params.get("sort") in ROSTER_SORTS else "recent",
+    }
+    for key in ("min_progress", "max_progress"):
+        value = (params.get(key) or "").strip()
+        if value.isdigit():
+            filters[key] = min(int(value), 100)
+    return filters
+
+
+def _get_course_roster(course, q="", grade="", min_progress="", max_progress="", sort="recent"):
+    """
+    A course's enrollments narrowed and ordered by the roster filters (see
+    _parse_roster_filters). The progress and grade filters are served by
+    the Enrollment (course, progress) and (course, grade) indexes, and the
+    name filter by the UserSearchTerm prefix index.
+    """
+    enrollments = Enrollment.objects.filter(course=course).select_related("student")
+
+    if q:
+        enrollments = enrollments.filter(student_id__in=matching_user_ids(q))
+
+    if grade == ROSTER_UNGRADED:
+        enrollments = enrollments.filter(Q(grade__isnull=True) | Q(grade=""))
+    elif grade:
+        enrollments = enrollments.filter(grade=grade)
+
+    if min_progress != "":
+        enrollments = enrollments.filter(progress__gte=min_progress)
+    if max_progress != "":
+        enrollments = enrollments.filter(progress__lte=max_progress)
+
+    return enrollments.order_by(*ROSTER_SORTS.get(sort, ROSTER_SORTS["recent"]))
+
+
+def _get_course_roster_stats(course):
+    """
+    Enrollment total, class average progress and grade distribution for a
+    course, from a single GROUP BY grade query over the (course, grade) index.
+    """
+    rows = (
+        Enrollment.objects
+        .filter(course=course)
+        .values("grade")
+        .annotate(students=Count("id"), progress_sum=Sum("progress"))
+        .order_by("grade")
+    )
+
+    total = 0
+    progress_sum = 0
+    counts = {}
+    for row in rows:
+        total += row["students"]
+        progress_sum += row["progress_sum"] or 0
+        # NULL and "" both mean "not graded yet"
+        key = row["grade"] or ROSTER_UNGRADED
+        counts[key] = counts.get(key, 0) + row["students"]
+
+    grade_distribution = [
+        {
+            "grade": grade,
+            "count": count,
+            "percent": round(count / total * 100) if total else 0,
+        }
+        for grade, count in sorted(counts.items(), key=lambda item: (item[0] == ROSTER_UNGRADED, item[0]))
+    ]
 
     return {
-        'reviews': reviews,
-        'total_reviews': total_reviews,
-        'avg_rating': avg_rating,
-        'star_display': star_display,
-        'rating_stats': rating_stats,
+        "total": total,
+        "avg_progress": int(round(progress_sum / total)) if total else 0,
+        "grade_distribution": grade_distribution,
     }
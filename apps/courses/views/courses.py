@@ -3,18 +3,31 @@ from datetime import datetime
 
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.core.paginator import Paginator
 from django.db import transaction, IntegrityError
 from django.db.models import Count, Sum, Avg, Q, F
-from django.http import HttpResponseForbidden
+from django.http import HttpResponseForbidden, JsonResponse
 from django.shortcuts import render, redirect, get_object_or_404
+from django.template.loader import render_to_string
 from django.urls import reverse
 from django.utils import timezone
-from django.utils.http import url_has_allowed_host_and_scheme
+from django.utils.functional import SimpleLazyObject
+from django.utils.http import url_has_allowed_host_and_scheme, urlencode
 from django.views.decorators.http import require_POST
 
 from ..models import *
 from ..forms import *
-from ..utils import _get_course_feedback_data, _get_annotated_courses_queryset
+from ..utils import (
+    REVIEWS_PAGE_SIZE, REVIEWS_MAX_PAGE_SIZE, ROSTER_PAGE_SIZE, ROSTER_UNGRADED,
+    _get_course_feedback_data, _get_annotated_courses_queryset, _get_course_reviews_page,
+    _parse_roster_filters, _get_course_roster, _get_course_roster_stats,
+)
+from ..fragments import COURSE_FRAGMENT_CACHE, COURSE_FRAGMENT_TIMEOUT, get_course_fragment_version
+from ..seats import ENROLLED, ALREADY_ENROLLED, enroll_student, waitlist_position
+from ..access import (
+    ACCESS_TEACHER, ACCESS_ENROLLED,
+    get_course_access, is_course_teacher, is_course_student,
+)
 
 
 # =========================
@@ -128,8 +141,7 @@ def course_edit(request, course_id):
     redirect_target = redirect(next_url) if next_url else fallback_url
 
     # Permission Check
-    is_teacher = Teaching.objects.filter(course=course, teacher=request.user).exists()
-    if not is_teacher:
+    if not is_course_teacher(request, course.id):
         messages.error(request, "You don't have permission to edit this course.")
         return redirect_target
 
@@ -171,7 +183,8 @@ def course_edit(request, course_id):
 # Course Detail
 # =========================
 def course_detail(request, course_id: int):
-    course = get_object_or_404(Course, id=course_id)
+    # The stats row carries the header numbers and the fragment version
+    course = get_object_or_404(Course.objects.select_related("stats"), id=course_id)
 
     # Initialize flags with safe defaults
     is_teacher_view = False
@@ -180,19 +193,21 @@ def course_detail(request, course_id: int):
     # --- COMMON DATA (Needed for Permissions and the Top Header) ---
     is_enrolled = False
     user_feedback = None
+    user_waitlist_position = None
 
     # ONLY check roles and enrollments if the user is logged in
     if request.user.is_authenticated:
-        # Check if the user is a teacher AND if they teach this specific course
-        # Note: Use 'role' or 'Role' depending on your model's field name
-        if hasattr(request.user, 'role') and request.user.role == 'TEACHER':
-            is_teacher_view = course.teachings.filter(teacher=request.user).exists()
+        # Resolved with one query and memoized on the request by the course access service
+        access = get_course_access(request, course.id)
+        is_teacher_view = access == ACCESS_TEACHER
         
         # If they aren't the teacher, check if they are a student enrolled in it and submitted feedback
         if not is_teacher_view:
-            is_enrolled = course.enrollments.filter(student=request.user).exists()
+            is_enrolled = access == ACCESS_ENROLLED
             # Fetch their existing feedback if they have one
             user_feedback = CourseFeedback.objects.filter(student=request.user, course=course).first()
+            if not is_enrolled and request.user.is_student:
+                user_waitlist_position = waitlist_position(course, request.user)
 
     # Which tab are we on? (Defaults to 'overview')
     current_tab = request.GET.get("tab", "overview")
@@ -206,26 +221,39 @@ def course_detail(request, course_id: int):
     # Try to get the previous URL; if it doesn't exist, fallback to home
     dashboard_url = reverse("core:home") or request.META.get('HTTP_REFERER')
 
-    # Fetch all feedback data
-    feedback_data = _get_course_feedback_data(course)
-
     # --- COMMON DATA (Always passed for the Header) ---
-    enrollment_count = Enrollment.objects.filter(course=course).count()
-    instructor = Teaching.objects.filter(course=course).select_related("teacher").first()
+    # Viewer-independent parts of the page are cached as template fragments
+    # keyed by this version (see fragments.py). The data behind them is
+    # lazy, so it is only queried when a fragment has to be re-rendered.
+    feedback_data = _get_course_feedback_data(course)
+    fragment_version = get_course_fragment_version(feedback_data.stats)
+    instructor = SimpleLazyObject(
+        lambda: Teaching.objects.filter(course=course).select_related("teacher").first()
+    )
 
     context = {
         "course": course,
         "current_tab": current_tab,
         "dashboard_url": dashboard_url,
         "is_teacher_view": is_teacher_view,
-        "instructor_user": instructor.teacher if instructor else None,
+        "instructor_user": SimpleLazyObject(lambda: instructor.teacher if instructor else None),
         "is_enrolled": is_enrolled,
-        "enrollment_count": enrollment_count,
-        "total_reviews": feedback_data['total_reviews'],
-        "avg_rating": feedback_data['avg_rating'],
-        "star_display": feedback_data['star_display'],
+        # The seat counter from seats.py, already loaded with the course
+        "enrollment_count": feedback_data.stats.students_total,
+        "total_reviews": SimpleLazyObject(lambda: feedback_data['total_reviews']),
+        "avg_rating": SimpleLazyObject(lambda: feedback_data['avg_rating']),
+        "star_display": SimpleLazyObject(lambda: feedback_data['star_display']),
         "user_feedback": user_feedback,
+        "user_waitlist_position": user_waitlist_position,
+        # Lazy: only read when the enroll button is shown
+        "course_is_full": SimpleLazyObject(
+            lambda: course.max_students is not None
+            and feedback_data.stats.students_total >= course.max_students
+        ),
         'category_choices': Course.CATEGORY_CHOICES,
+        "fragment_version": fragment_version,
+        "fragment_timeout": COURSE_FRAGMENT_TIMEOUT,
+        "fragment_cache": COURSE_FRAGMENT_CACHE,
     }
 
     # --- CONDITIONAL DATA (Only runs what is needed!) ---
@@ -235,40 +263,46 @@ def course_detail(request, course_id: int):
         pass
 
     elif current_tab == "students" and is_teacher_view:
-        # Only fetch the heavy student list and calculate progress if on this tab
-        enrollments = Enrollment.objects.filter(course=course).select_related("student").order_by("-id")
-        avg_progress = enrollments.aggregate(a=Avg("progress"))["a"] or 0
-        
-        context["enrollments"] = enrollments
-        context["avg_progress"] = int(round(avg_progress))
+        # One page of the filtered roster, plus the class-wide numbers
+        roster_filters = _parse_roster_filters(request.GET)
+        paginator = Paginator(_get_course_roster(course, **roster_filters), ROSTER_PAGE_SIZE)
+        roster_stats = _get_course_roster_stats(course)
+
+        context["enrollments"] = paginator.get_page(request.GET.get("page"))
+        context["roster_filters"] = roster_filters
+        # Current filters for the pagination links
+        context["roster_query"] = urlencode({k: v for k, v in roster_filters.items() if v != ""})
+        context["roster_stats"] = roster_stats
+        context["roster_ungraded"] = ROSTER_UNGRADED
+        context["avg_progress"] = roster_stats["avg_progress"]
 
     elif current_tab == "materials":
-        # Only fetch files if on the materials tab
+        # Only fetch files if on the materials tab (and the cached list missed)
         context["materials"] = CourseMaterial.objects.filter(course=course).order_by("-uploaded_at")
+        context["materials_total"] = feedback_data.stats.materials_total
 
     elif current_tab == "deadlines":
-        # Only fetch deadlines if on the deadlines tab
+        # Only fetch deadlines if on the deadlines tab (and the cached list missed)
         context["deadlines"] = Deadline.objects.filter(course=course).order_by("due_at")
+        # Part of the fragment key, so the cached list re-renders as deadlines become overdue
+        context["overdue_count"] = Deadline.objects.filter(course=course, due_at__lt=timezone.now()).count()
 
     elif current_tab == "feedback":
-        # Get the full base queryset
-        reviews = feedback_data['reviews']
-        
         # Grab the URL parameters from the submitted form
         search_query = request.GET.get('search', '').strip()
         rating_filter = request.GET.get('rating')
 
-        # Filter by Search Text
-        if search_query:
-            reviews = reviews.filter(comment__icontains=search_query)
-            
-        # Filter by Exact Star Rating
-        if rating_filter and rating_filter.isdigit():
-            reviews = reviews.filter(rating=int(rating_filter))
+        # Only the first page is rendered; the rest is loaded from
+        # course_reviews as the reader scrolls
+        reviews, next_cursor = _get_course_reviews_page(
+            course,
+            search_query=search_query,
+            rating=int(rating_filter) if rating_filter and rating_filter.isdigit() else None,
+        )
 
-        # Pass the newly filtered reviews to the template
         context["reviews"] = reviews
-        context["rating_stats"] = feedback_data['rating_stats']
+        context["reviews_next_cursor"] = next_cursor
+        context["rating_stats"] = SimpleLazyObject(lambda: feedback_data['rating_stats'])
 
     # Render the single main shell
     return render(request, "courses/course_detail/main.html", context)
@@ -295,29 +329,40 @@ def course_enroll(request, course_id):
         messages.error(request, "This course is not yet available for enrollment.")
         return redirect(course_url)
 
-    # Enforce Max Capacity
-    if course.max_students is not None:
-        current_enrollments = Enrollment.objects.filter(course=course).count()
-        if current_enrollments >= course.max_students:
-            messages.error(request, "This course is full. Enrollment is closed.")
-            return redirect(course_url)
-
-    # Enroll the Student
-    enrollment, created = Enrollment.objects.get_or_create(
-        student=request.user,
-        course=course
-    )
+    # Claim a seat (or a waitlist place) atomically; see seats.py
+    outcome = enroll_student(course, request.user)
 
     # Provide Feedback
-    if created:
+    if outcome == ENROLLED:
         messages.success(request, f"Successfully enrolled in {course.title}!")
-    else:
+    elif outcome == ALREADY_ENROLLED:
         messages.info(request, "You are already enrolled in this course.")
+    else:
+        position = waitlist_position(course, request.user)
+        messages.warning(
+            request,
+            f"This course is full. You are number {position} on the waitlist "
+            "and will be enrolled automatically when a seat opens up."
+        )
 
     # Redirect directly to the course overview
     return redirect(f"{course_url}?tab=overview")
 
 
+@login_required
+@require_POST
+def waitlist_leave(request, course_id):
+    course = get_object_or_404(Course, id=course_id)
+
+    deleted, _ = WaitlistEntry.objects.filter(course=course, student=request.user).delete()
+    if deleted:
+        messages.success(request, "You left the waitlist.")
+    else:
+        messages.info(request, "You are not on the waitlist for this course.")
+
+    return redirect(f"{reverse('courses:course_detail', args=[course.id])}?tab=overview")
+
+
 # =========================
 # Course Feedback
 # =========================
@@ -329,8 +374,7 @@ def course_feedback(request, course_id):
     course = get_object_or_404(Course, id=course_id)
 
     # Enrollment Check
-    is_enrolled = Enrollment.objects.filter(student=request.user, course=course).exists()
-    if not is_enrolled:
+    if not is_course_student(request, course.id):
         return HttpResponseForbidden("You must be enrolled to leave feedback.")
 
     # Redirect back to the originating page (dashboard or detail view) after saving
@@ -365,6 +409,58 @@ def course_feedback(request, course_id):
     return redirect(next_url)
 
 
+# =========================
+# Course Reviews (infinite scroll)
+# =========================
+def course_reviews(request, course_id):
+    """
+    Returns the next page of a course's reviews for the feedback tab.
+
+    Takes the tab's filters (?search=, ?rating=) plus ?before=<cursor> from
+    the previous page, and returns the reviews both as data and as rendered
+    HTML ready to append to the list.
+    """
+    course = get_object_or_404(Course, id=course_id)
+
+    try:
+        limit = int(request.GET.get("limit", REVIEWS_PAGE_SIZE))
+    except ValueError:
+        limit = REVIEWS_PAGE_SIZE
+    limit = max(1, min(limit, REVIEWS_MAX_PAGE_SIZE))
+
+    rating_filter = request.GET.get("rating")
+
+    try:
+        reviews, next_cursor = _get_course_reviews_page(
+            course,
+            search_query=request.GET.get("search", "").strip(),
+            rating=int(rating_filter) if rating_filter and rating_filter.isdigit() else None,
+            before=request.GET.get("before"),
+            limit=limit,
+        )
+    except ValueError:
+        return JsonResponse({"error": "Invalid cursor"}, status=400)
+
+    return JsonResponse({
+        "results": [
+            {
+                "id": fb.id,
+                "student": fb.student.full_name or fb.student.username,
+                "rating": fb.rating,
+                "comment": fb.comment,
+                "created_at": fb.created_at.isoformat(),
+            }
+            for fb in reviews
+        ],
+        "html": render_to_string(
+            "courses/course_detail/_review_items.html", {"reviews": reviews}, request=request
+        ),
+        # Pass back as ?before= to fetch the next page
+        "next_cursor": next_cursor,
+        "has_more": next_cursor is not None,
+    })
+
+
 # =========================
 # Course Search
 # =========================
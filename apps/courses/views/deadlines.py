@@ -1,6 +1,5 @@
 from datetime import datetime
 from django.contrib import messages
-from django.http import HttpResponseForbidden
 from django.shortcuts import get_object_or_404, redirect
 from django.utils import timezone
 from django.urls import reverse
@@ -8,23 +7,7 @@ from django.views.decorators.http import require_POST
 from django.contrib.auth.decorators import login_required
 
 from ..models import *
-
-
-# =========================
-# Helper Functions
-# =========================
-def _get_course_for_teacher_or_403(request, course_id):
-    course = get_object_or_404(Course, id=course_id)
-    user = request.user
-
-    is_teacher = (
-        user.is_authenticated
-        and user.role == user.Role.TEACHER
-        and Teaching.objects.filter(course=course, teacher=user).exists()
-    )
-    if not is_teacher:
-        return None, HttpResponseForbidden("Teachers only")
-    return course, None
+from ..access import get_course_for_teacher_or_403
 
 
 # =========================
@@ -51,7 +34,7 @@ def _parse_due_at_or_none(due_at_raw: str):
 @login_required
 @require_POST
 def deadline_add(request, course_id):
-    course, resp = _get_course_for_teacher_or_403(request, course_id)
+    course, resp = get_course_for_teacher_or_403(request, course_id)
     if resp:
         return resp
 
@@ -72,7 +55,7 @@ def deadline_add(request, course_id):
 @login_required
 @require_POST
 def deadline_edit(request, course_id, deadline_id):
-    course, resp = _get_course_for_teacher_or_403(request, course_id)
+    course, resp = get_course_for_teacher_or_403(request, course_id)
     if resp:
         return resp
 
@@ -99,7 +82,7 @@ def deadline_edit(request, course_id, deadline_id):
 @login_required
 @require_POST
 def deadline_delete(request, course_id, deadline_id):
-    course, resp = _get_course_for_teacher_or_403(request, course_id)
+    course, resp = get_course_for_teacher_or_403(request, course_id)
     if resp:
         return resp
 
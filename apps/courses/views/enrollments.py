@@ -1,28 +1,14 @@
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.http import HttpResponseForbidden
-from django.shortcuts import get_object_or_404, redirect
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.shortcuts import redirect
 from django.urls import reverse
 from django.views.decorators.http import require_POST
 
 from ..models import *
-
-
-# =========================
-# Helper Functions
-# =========================
-def _get_course_for_teacher_or_403(request, course_id):
-    course = get_object_or_404(Course, id=course_id)
-    user = request.user
-
-    is_teacher = (
-        user.is_authenticated
-        and user.role == user.Role.TEACHER
-        and Teaching.objects.filter(course=course, teacher=user).exists()
-    )
-    if not is_teacher:
-        return None, HttpResponseForbidden("Teachers only")
-    return course, None
+from ..access import get_course_for_teacher_or_403
+from ..export import EXPORT_FORMATS, streaming_content
+from ..imports import CREATED, import_enrollments, read_enrollment_csv
 
 
 # =========================
@@ -31,7 +17,7 @@ def _get_course_for_teacher_or_403(request, course_id):
 @login_required
 @require_POST
 def enrollment_remove(request, course_id, enrollment_id):
-    course, resp = _get_course_for_teacher_or_403(request, course_id)
+    course, resp = get_course_for_teacher_or_403(request, course_id)
     if resp:
         return resp
 
@@ -41,3 +27,77 @@ def enrollment_remove(request, course_id, enrollment_id):
     else:
         messages.error(request, "Enrollment not found.")
     return redirect(f"{reverse('courses:course_detail', args=[course.id])}?tab=students")
+
+
+# =========================
+# Enrollments (bulk import)
+# =========================
+@login_required
+@require_POST
+def enrollment_import(request, course_id):
+    """
+    Enrolls the students listed in an uploaded CSV (a `student` column of
+    usernames or emails). Answers JSON when asked for it, otherwise
+    redirects back to the students tab with a summary.
+    """
+    course, resp = get_course_for_teacher_or_403(request, course_id)
+    if resp:
+        return resp
+
+    wants_json = request.headers.get('Accept') == 'application/json'
+    students_url = f"{reverse('courses:course_detail', args=[course.id])}?tab=students"
+
+    upload = request.FILES.get("file")
+    if not upload:
+        error = "Choose a CSV file to import."
+    else:
+        try:
+            result = import_enrollments(read_enrollment_csv(upload, course=course))
+            error = None
+        except (ValueError, UnicodeDecodeError) as e:
+            error = f"Could not read the CSV: {e}"
+
+    if error:
+        if wants_json:
+            return JsonResponse({"error": error}, status=400)
+        messages.error(request, error)
+        return redirect(students_url)
+
+    if wants_json:
+        return JsonResponse({
+            "counts": result["counts"],
+            "errors": [{"line": line, "message": message} for line, message in result["errors"]],
+        })
+
+    created = result["counts"][CREATED]
+    skipped = sum(result["counts"].values()) - created
+    messages.success(request, f"Enrolled {created} student(s).")
+    if skipped:
+        details = "; ".join(f"line {line}: {message}" for line, message in result["errors"][:5])
+        messages.warning(request, f"Skipped {skipped} row(s). {details}")
+    return redirect(students_url)
+
+
+# =========================
+# Roster Export
+# =========================
+@login_required
+def roster_export(request, course_id, export_format):
+    """Streams the course roster as roster.csv or roster.jsonl."""
+    course, resp = get_course_for_teacher_or_403(request, course_id)
+    if resp:
+        return resp
+
+    if export_format not in EXPORT_FORMATS:
+        raise Http404("Unknown export format")
+
+    content_type, generate = EXPORT_FORMATS[export_format]
+    enrollments = Enrollment.objects.filter(course=course).order_by("id")
+
+    response = StreamingHttpResponse(
+        streaming_content(request, generate(enrollments)),
+        content_type=content_type,
+    )
+    filename = f"{course.course_id or course.id}-roster.{export_format}"
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
@@ -1,28 +1,11 @@
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.http import HttpResponseForbidden
-from django.shortcuts import get_object_or_404, redirect
+from django.shortcuts import redirect
 from django.urls import reverse
 from django.views.decorators.http import require_POST
 
 from ..models import *
-
-
-# =========================
-# Helper Functions
-# =========================
-def _get_course_for_teacher_or_403(request, course_id):
-    course = get_object_or_404(Course, id=course_id)
-    user = request.user
-
-    is_teacher = (
-        user.is_authenticated
-        and user.role == user.Role.TEACHER
-        and Teaching.objects.filter(course=course, teacher=user).exists()
-    )
-    if not is_teacher:
-        return None, HttpResponseForbidden("Teachers only")
-    return course, None
+from ..access import get_course_for_teacher_or_403
 
 
 # =========================
@@ -32,7 +15,7 @@ def _get_course_for_teacher_or_403(request, course_id):
 @require_POST
 def material_upload(request, course_id):
     # Get the course and check permissions
-    course, resp = _get_course_for_teacher_or_403(request, course_id)
+    course, resp = get_course_for_teacher_or_403(request, course_id)
     if resp:
         return resp
 
@@ -60,7 +43,7 @@ def material_upload(request, course_id):
 @login_required
 @require_POST
 def material_delete(request, course_id, material_id):
-    course, resp = _get_course_for_teacher_or_403(request, course_id)
+    course, resp = get_course_for_teacher_or_403(request, course_id)
     if resp:
         return resp
 
@@ -0,0 +1,57 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.jobs.queue import claim_next, run_job
+
+
+class Command(BaseCommand):
+    help = 'Runs background jobs from the database queue using a pool of worker threads.'
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4, help="Number of worker threads.")
+        parser.add_argument("--poll-interval", type=float, default=1.0, help="Seconds to sleep when the queue is empty.")
+        parser.add_argument("--burst", action="store_true", help="Exit once the queue is empty instead of polling forever.")
+
+    def handle(self, *args, **options):
+        workers = max(1, options["workers"])
+        self.poll_interval = options["poll_interval"]
+        self.burst = options["burst"]
+        self.stopping = threading.Event()
+
+        self.stdout.write(f"Starting {workers} job worker(s)...")
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job-worker") as pool:
+            futures = [pool.submit(self.work_loop) for _ in range(workers)]
+            try:
+                totals = [f.result() for f in futures]
+            except KeyboardInterrupt:
+                self.stopping.set()
+                self.stdout.write("Stopping workers after their current job...")
+                totals = [f.result() for f in futures]
+
+        self.stdout.write(self.style.SUCCESS(f"Workers stopped after running {sum(totals)} job(s)."))
+
+    def work_loop(self):
+        processed = 0
+        while not self.stopping.is_set():
+            # Each thread holds its own DB connection, so recycle it like a request would
+            close_old_connections()
+
+            job = claim_next()
+            if job is None:
+                if self.burst:
+                    break
+                time.sleep(self.poll_interval)
+                continue
+
+            ok = run_job(job)
+            processed += 1
+            if not ok:
+                self.stderr.write(f"{job} failed (attempt {job.attempts}/{job.max_attempts}).")
+
+        close_old_connections()
+        return processed
@@ -0,0 +1,172 @@
+import logging
+import threading
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# name -> callable(**payload)
+_registry = {}
+
+# Retry delay doubles on each failed attempt: 5s, 10s, 20s ... capped at 10 minutes
+BACKOFF_BASE_SECONDS = 5
+BACKOFF_MAX_SECONDS = 600
+
+# A RUNNING job whose lease hasn't been renewed within this window is assumed dead and reclaimed
+LEASE_SECONDS = 300
+
+# How often a worker renews the lease of the job it is running
+HEARTBEAT_SECONDS = 60
+
+
+def register(name):
+    """
+    Decorator that makes a function runnable as a background job:
+
+        @register("notifications.material_uploaded")
+        def material_uploaded(material_id): ...
+    """
+    def decorator(func):
+        _registry[name] = func
+        return func
+    return decorator
+
+
+def enqueue(name, max_attempts=5, delay=None, **payload):
+    """
+    Stores a job row in the current transaction. If the surrounding
+    transaction rolls back, the job disappears with it.
+
+    With settings.JOBS_RUN_EAGERLY the job instead runs right after commit
+    in the calling thread, which then waits for it (for tests and debugging).
+    """
+    if name not in _registry:
+        raise KeyError(f"No job registered under '{name}'")
+
+    if getattr(settings, "JOBS_RUN_EAGERLY", False):
+        transaction.on_commit(lambda: _registry[name](**payload))
+        return None
+
+    return Job.objects.create(
+        name=name,
+        payload=payload,
+        max_attempts=max_attempts,
+        run_at=timezone.now() + (delay or timedelta(0)),
+    )
+
+
+def backoff_delay(attempts):
+    return timedelta(seconds=min(BACKOFF_BASE_SECONDS * 2 ** (attempts - 1), BACKOFF_MAX_SECONDS))
+
+
+def claim_next():
+    """
+    Atomically claims one runnable job, or returns None.
+
+    The claim is a conditional UPDATE on the row's previous status and lock
+    time, so two workers can never both win the same job. This works the
+    same on SQLite and Postgres without SELECT ... SKIP LOCKED. A RUNNING
+    job is only reclaimed once its lease has not been renewed for
+    LEASE_SECONDS, i.e. its worker died.
+    """
+    now = timezone.now()
+    runnable = Job.objects.filter(
+        Q(status=Job.STATUS_PENDING, run_at__lte=now) |
+        Q(status=Job.STATUS_RUNNING, locked_at__lt=now - timedelta(seconds=LEASE_SECONDS))
+    ).order_by("run_at", "id")
+
+    # Look at a few candidates so workers racing for the head of the queue don't all give up
+    for job in runnable[:10]:
+        claimed = Job.objects.filter(
+            pk=job.pk, status=job.status, locked_at=job.locked_at
+        ).update(status=Job.STATUS_RUNNING, locked_at=now)
+
+        if claimed:
+            job.status = Job.STATUS_RUNNING
+            job.locked_at = now
+            return job
+
+    return None
+
+
+def renew_lease(job):
+    """
+    Moves a running job's lease forward. Returns False if the job is no
+    longer ours, i.e. its lease expired and another worker reclaimed it.
+    """
+    now = timezone.now()
+    renewed = Job.objects.filter(
+        pk=job.pk, status=Job.STATUS_RUNNING, locked_at=job.locked_at
+    ).update(locked_at=now)
+    if renewed:
+        job.locked_at = now
+    return bool(renewed)
+
+
+def _keep_lease(job, done):
+    # Runs in its own thread (and DB connection) while the handler works
+    try:
+        while not done.wait(HEARTBEAT_SECONDS):
+            if not renew_lease(job):
+                logger.warning("Job %s lost its lease while running", job)
+                return
+    finally:
+        connection.close()
+
+
+def run_job(job):
+    """
+    Runs a claimed job and records success, a scheduled retry, or
+    dead-lettering. The lease is renewed while the handler runs, so a slow
+    job is never reclaimed by another worker, and the outcome is only
+    recorded while the job is still ours.
+    """
+    handler = _registry.get(job.name)
+    job.attempts += 1
+
+    done = threading.Event()
+    heartbeat = threading.Thread(target=_keep_lease, args=(job, done), daemon=True)
+    heartbeat.start()
+    try:
+        if handler is None:
+            raise KeyError(f"No job registered under '{job.name}'")
+        handler(**job.payload)
+        error = None
+    except Exception:
+        error = traceback.format_exc()
+    finally:
+        done.set()
+        heartbeat.join()
+
+    changes = {"attempts": job.attempts, "locked_at": None, "updated_at": timezone.now()}
+    if error is None:
+        changes["status"] = Job.STATUS_DONE
+    else:
+        changes["last_error"] = error
+        if job.attempts >= job.max_attempts:
+            changes["status"] = Job.STATUS_DEAD
+        else:
+            changes["status"] = Job.STATUS_PENDING
+            changes["run_at"] = timezone.now() + backoff_delay(job.attempts)
+
+    owned = Job.objects.filter(
+        pk=job.pk, status=Job.STATUS_RUNNING, locked_at=job.locked_at
+    ).update(**changes)
+    if not owned:
+        logger.warning("Job %s finished after losing its lease; outcome not recorded", job)
+        return error is None
+
+    for field, value in changes.items():
+        setattr(job, field, value)
+    if job.status == Job.STATUS_DEAD:
+        logger.error("Job %s gave up after %s attempts", job, job.attempts)
+    elif job.status == Job.STATUS_PENDING:
+        logger.warning("Job %s failed, retrying at %s", job, job.run_at)
+    return error is None
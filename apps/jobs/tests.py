@@ -0,0 +1,125 @@
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from .models import Job
+from .queue import LEASE_SECONDS, claim_next, enqueue, register, renew_lease, run_job
+
+calls = []
+
+
+@register("jobs.tests.record")
+def record(**payload):
+    calls.append(payload)
+
+
+@register("jobs.tests.fail")
+def fail(**payload):
+    raise ValueError("broken")
+
+
+@register("jobs.tests.slow")
+def slow():
+    time.sleep(0.3)
+    calls.append(Job.objects.get(name="jobs.tests.slow").locked_at)
+
+
+@override_settings(JOBS_RUN_EAGERLY=False)
+class QueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def expire_lease(self, job):
+        stale = timezone.now() - timedelta(seconds=LEASE_SECONDS + 1)
+        Job.objects.filter(pk=job.pk).update(locked_at=stale)
+        return stale
+
+    def test_claimed_once_and_run(self):
+        job = enqueue("jobs.tests.record", n=1)
+
+        claimed = claim_next()
+        self.assertEqual(claimed.pk, job.pk)
+        self.assertIsNone(claim_next())
+
+        self.assertTrue(run_job(claimed))
+        self.assertEqual(calls, [{"n": 1}])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.locked_at), (Job.STATUS_DONE, 1, None))
+
+    def test_not_claimed_before_run_at(self):
+        enqueue("jobs.tests.record", delay=timedelta(minutes=1))
+        self.assertIsNone(claim_next())
+
+    def test_failure_retries_with_backoff_then_goes_dead(self):
+        job = enqueue("jobs.tests.fail", max_attempts=3)
+
+        for attempt, delay in ((1, 5), (2, 10)):
+            started = timezone.now()
+            with self.assertLogs("apps.jobs.queue", "WARNING"):
+                self.assertFalse(run_job(claim_next()))
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.attempts), (Job.STATUS_PENDING, attempt))
+            self.assertIn("ValueError: broken", job.last_error)
+            self.assertGreaterEqual(job.run_at, started + timedelta(seconds=delay))
+            self.assertIsNone(claim_next())
+            Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+
+        with self.assertLogs("apps.jobs.queue", "ERROR"):
+            self.assertFalse(run_job(claim_next()))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.STATUS_DEAD, 3))
+        self.assertIsNone(claim_next())
+
+    def test_expired_lease_is_reclaimed(self):
+        enqueue("jobs.tests.record")
+        job = claim_next()
+        self.expire_lease(job)
+
+        self.assertEqual(claim_next().pk, job.pk)
+
+    def test_renewed_lease_is_kept(self):
+        enqueue("jobs.tests.record")
+        job = claim_next()
+        job.locked_at = self.expire_lease(job)
+
+        self.assertTrue(renew_lease(job))
+        self.assertIsNone(claim_next())
+
+    def test_outcome_not_recorded_after_losing_the_lease(self):
+        enqueue("jobs.tests.record")
+        first = claim_next()
+        self.expire_lease(first)
+        second = claim_next()
+
+        # The first worker finishes late: its result must not end the second's run
+        with self.assertLogs("apps.jobs.queue", "WARNING"):
+            run_job(first)
+        self.assertFalse(renew_lease(first))
+        second.refresh_from_db()
+        self.assertEqual(second.status, Job.STATUS_RUNNING)
+
+        self.assertTrue(run_job(second))
+        second.refresh_from_db()
+        self.assertEqual(second.status, Job.STATUS_DONE)
+
+
+@override_settings(JOBS_RUN_EAGERLY=False)
+class HeartbeatTests(TransactionTestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_slow_job_keeps_renewing_its_lease(self):
+        job = enqueue("jobs.tests.slow")
+        claimed = claim_next()
+        claimed_at = claimed.locked_at
+
+        with mock.patch("apps.jobs.queue.HEARTBEAT_SECONDS", 0.05):
+            self.assertTrue(run_job(claimed))
+
+        # Read by the handler at its end: renewed since the claim
+        self.assertGreater(calls[0], claimed_at)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_DONE)
@@ -1,22 +1,53 @@
 from django.contrib import admin
-from .models import Notification
+from .models import NotificationEvent, NotificationInbox, NotificationReceipt
 
-@admin.register(Notification)
-class NotificationAdmin(admin.ModelAdmin):
+@admin.register(NotificationEvent)
+class NotificationEventAdmin(admin.ModelAdmin):
+    # Columns displayed in the main list view
+    list_display = ('id', 'notification_type', 'message', 'created_at')
+
+    # Filter sidebar for quick sorting
+    list_filter = ('notification_type', 'created_at')
+
+    search_fields = ('message',)
+    readonly_fields = ('created_at',)
+    date_hierarchy = 'created_at'
+
+
+@admin.register(NotificationReceipt)
+class NotificationReceiptAdmin(admin.ModelAdmin):
     # Columns displayed in the main list view
     list_display = ('id', 'recipient', 'notification_type', 'message', 'is_read', 'created_at')
     
     # Filter sidebar for quick sorting
-    list_filter = ('is_read', 'notification_type', 'created_at')
+    list_filter = ('is_read', 'event__notification_type', 'created_at')
     
     # Allows searching by the recipient's username or the message content
-    search_fields = ('recipient__username', 'recipient__email', 'message')
+    search_fields = ('recipient__username', 'recipient__email', 'event__message')
     
     # Performance optimization to prevent N+1 database query issues
-    list_select_related = ('recipient',)
+    list_select_related = ('recipient', 'event')
     
     # Make created_at read-only so it can be viewed inside the detail page
     readonly_fields = ('created_at',)
+    raw_id_fields = ('event', 'recipient')
     
     # Date drill-down navigation at the top
-    date_hierarchy = 'created_at'
\ No newline at end of file
+    date_hierarchy = 'created_at'
+
+    @admin.display(description='Type', ordering='event__notification_type')
+    def notification_type(self, obj):
+        return obj.event.get_notification_type_display()
+
+    @admin.display(ordering='event__message')
+    def message(self, obj):
+        return obj.event.message
+
+
+@admin.register(NotificationInbox)
+class NotificationInboxAdmin(admin.ModelAdmin):
+    # Counters are maintained by notifications/utils.py; fix drift with rebuild_notification_inbox
+    list_display = ('user', 'unread_count', 'updated_at')
+    search_fields = ('user__username', 'user__email')
+    list_select_related = ('user',)
+    readonly_fields = [f.name for f in NotificationInbox._meta.fields]
@@ -0,0 +1,16 @@
+from django.utils.functional import SimpleLazyObject
+
+from .utils import get_unread_count
+
+
+def notifications_unread_count(request):
+    """
+    Adds {{ notifications_unread_count }} (the navbar badge) to every template.
+    Lazy, and a single primary-key read of the user's NotificationInbox row
+    when used, so it costs nothing on pages that don't render it.
+    """
+    user = getattr(request, "user", None)
+    if user is None or not user.is_authenticated:
+        return {"notifications_unread_count": 0}
+
+    return {"notifications_unread_count": SimpleLazyObject(lambda: get_unread_count(user.id))}
@@ -0,0 +1,74 @@
+from apps.courses.models import Course, Enrollment, CourseMaterial, Teaching
+from apps.jobs.queue import register
+
+from .utils import fan_out_notifications
+
+
+# ========================================================
+# Background handlers queued by signals.py
+# ========================================================
+@register("notifications.enrollment_created")
+def enrollment_created(enrollment_id):
+    enrollment = (
+        Enrollment.objects
+        .select_related("course", "student")
+        .filter(id=enrollment_id)
+        .first()
+    )
+    if not enrollment:
+        # Removed again before the worker got to it
+        return
+
+    course = enrollment.course
+    teacher_ids = Teaching.objects.filter(course=course).values_list('teacher_id', flat=True)
+
+    msg = f"<b>{enrollment.student.full_name}</b> enrolled in <b>{course.title}</b>."
+    link = f"/courses/{course.id or course.course_id}/?tab=students"
+
+    fan_out_notifications(teacher_ids, 'ENROLLMENT', msg, link)
+
+
+@register("notifications.waitlist_promoted")
+def waitlist_promoted(enrollment_id):
+    enrollment = Enrollment.objects.select_related("course").filter(id=enrollment_id).first()
+    if not enrollment:
+        return
+
+    course = enrollment.course
+    msg = f"A seat opened up: you are now enrolled in <b>{course.title}</b>."
+    link = f"/courses/{course.id}/?tab=overview"
+
+    fan_out_notifications([enrollment.student_id], 'ENROLLMENT', msg, link)
+
+
+@register("notifications.enrollments_imported")
+def enrollments_imported(course_id, count):
+    """One summary per course for a bulk import, instead of one per student."""
+    course = Course.objects.filter(id=course_id).first()
+    if not course or not count:
+        return
+
+    teacher_ids = Teaching.objects.filter(course=course).values_list('teacher_id', flat=True)
+
+    students = "1 student was" if count == 1 else f"{count} students were"
+    msg = f"<b>{students}</b> enrolled in <b>{course.title}</b>."
+    link = f"/courses/{course.id}/?tab=students"
+
+    fan_out_notifications(teacher_ids, 'ENROLLMENT', msg, link)
+
+
+@register("notifications.material_uploaded")
+def material_uploaded(material_id):
+    material = CourseMaterial.objects.select_related("course").filter(id=material_id).first()
+    if not material:
+        return
+
+    course = material.course
+
+    # Only ids are needed, no need to load every student row
+    student_ids = course.enrollments.values_list('student_id', flat=True)
+
+    msg = f"New material uploaded to <b>{course.title}</b>: <b>{material.original_name}</b>"
+    link = f"/courses/{course.id or course.course_id}/?tab=materials"
+
+    fan_out_notifications(student_ids, 'MATERIAL', msg, link)
@@ -0,0 +1,84 @@
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+from django.test.utils import override_settings
+
+from apps.accounts.models import User
+from apps.core.benchmarks import BenchmarkCommand
+from apps.courses.models import Course, CourseMaterial, Enrollment
+from apps.jobs.models import Job
+from apps.notifications.models import NotificationEvent, NotificationReceipt
+from apps.notifications.utils import _live_payload, fan_out_notifications
+
+MESSAGE = "New material uploaded to <b>Benchmark</b>"
+
+
+def _one_by_one(student_ids, message, link):
+    """The old material-upload path: one INSERT and one channel-layer round trip per student."""
+    channel_layer = get_channel_layer()
+    for student_id in student_ids:
+        event = NotificationEvent.objects.create(notification_type="MATERIAL", message=message, link=link)
+        receipt = NotificationReceipt.objects.create(event=event, recipient_id=student_id)
+        async_to_sync(channel_layer.group_send)(
+            f"user_{student_id}",
+            {"type": "live_notification", "payload": _live_payload(receipt)},
+        )
+
+
+class Command(BenchmarkCommand):
+    help = (
+        "Times a material upload at several enrollment sizes, old inline notifications against "
+        "enqueue + commit, and the worker's fan-out, on throwaway data."
+    )
+    # Each upload commits, as the request does, so rows are deleted in cleanup() instead
+    rollback = False
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            "--sizes", default="10,100,1000", help="Comma-separated enrollment sizes to upload into."
+        )
+
+    def run(self, **options):
+        sizes = [int(size) for size in options["sizes"].split(",")]
+        teacher = User.objects.create(username="benchmark-teacher", role=User.Role.TEACHER)
+        students = User.objects.bulk_create([
+            User(username=f"benchmark-student-{i}", role=User.Role.STUDENT) for i in range(max(sizes))
+        ])
+        self.course_ids, self.material_ids = [], []
+
+        def upload(course, student_ids=None):
+            # The request's own work: the material row plus whatever runs before the redirect
+            with transaction.atomic():
+                material = CourseMaterial.objects.create(
+                    course=course, file="benchmark/notes.pdf", uploaded_by=teacher
+                )
+                if student_ids is not None:
+                    _one_by_one(student_ids, MESSAGE, f"/courses/{course.id}/?tab=materials")
+            self.material_ids.append(material.id)
+
+        # Uploads only store the job; the worker side is timed on its own below
+        with override_settings(JOBS_RUN_EAGERLY=False):
+            for size in sizes:
+                course = Course.objects.create(title=f"Benchmark course {size}")
+                self.course_ids.append(course.id)
+                Enrollment.objects.bulk_create([Enrollment(course=course, student=s) for s in students[:size]])
+                student_ids = [s.id for s in students[:size]]
+
+                self.stdout.write(f"Uploading to {size} enrolled students:")
+                before = self.measure("upload, notified inline (old)", lambda: upload(course, student_ids))
+                after = self.measure("upload, enqueue + commit", lambda: upload(course))
+                self.measure("worker: fan_out_notifications", lambda: fan_out_notifications(
+                    student_ids, "MATERIAL", MESSAGE, f"/courses/{course.id}/?tab=materials"
+                ))
+                self.stdout.write(self.style.SUCCESS(f"upload {before / after:.1f}x faster at {size} students"))
+
+    def cleanup(self):
+        # Enrollments, materials and receipts go with the courses and users
+        if getattr(self, "material_ids", None):
+            Job.objects.filter(
+                name="notifications.material_uploaded", payload__material_id__in=self.material_ids
+            ).delete()
+        NotificationEvent.objects.filter(message=MESSAGE).delete()
+        Course.objects.filter(id__in=getattr(self, "course_ids", [])).delete()
+        User.objects.filter(username__startswith="benchmark-").delete()
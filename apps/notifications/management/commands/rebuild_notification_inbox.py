@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from apps.notifications.models import NotificationInbox
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the per-user unread notification counters from the notifications table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "user_ids",
+            nargs="*",
+            type=int,
+            help="Only rebuild these user ids (defaults to every user).",
+        )
+
+    def handle(self, *args, **options):
+        user_ids = options["user_ids"] or None
+
+        self.stdout.write("Rebuilding notification inboxes...")
+        rebuilt = NotificationInbox.rebuild(user_ids=user_ids)
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt unread counts for {rebuilt} user(s)."))
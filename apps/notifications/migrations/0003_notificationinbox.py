@@ -0,0 +1,43 @@
+# Generated by Django 4.2.27 on 2026-10-18 02:29
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_notification_inbox(apps, schema_editor):
+    Notification = apps.get_model('notifications', 'Notification')
+    NotificationInbox = apps.get_model('notifications', 'NotificationInbox')
+
+    # Users without unread notifications get their row on first read
+    unread = (
+        Notification.objects.filter(is_read=False)
+        .values_list('recipient_id').annotate(c=models.Count('id'))
+    )
+    NotificationInbox.objects.bulk_create(
+        [NotificationInbox(user_id=user_id, unread_count=count) for user_id, count in unread],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('notifications', '0002_alter_notification_link'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationInbox',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='notification_inbox', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('unread_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'notification inboxes',
+            },
+        ),
+        migrations.RunPython(backfill_notification_inbox, migrations.RunPython.noop),
+    ]
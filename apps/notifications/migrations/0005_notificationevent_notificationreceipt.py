@@ -0,0 +1,143 @@
+# Splits Notification into a shared NotificationEvent (type, message, link)
+# and a slim per-recipient NotificationReceipt. Receipts keep the old
+# notification ids and versions, so open tabs and sync cursors stay valid.
+
+import datetime
+
+from django.conf import settings
+from django.core.management.color import no_style
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# Rows written by one fan-out share a payload, have consecutive ids and
+# were created within moments of each other; only such a run becomes one
+# event. Identical messages sent at other times stay separate events.
+FANOUT_WINDOW = datetime.timedelta(seconds=5)
+
+
+def split_notifications(apps, schema_editor):
+    Notification = apps.get_model('notifications', 'Notification')
+    NotificationEvent = apps.get_model('notifications', 'NotificationEvent')
+    NotificationReceipt = apps.get_model('notifications', 'NotificationReceipt')
+
+    event_id = None
+    run_key = run_started = None
+    run_recipients = set()
+    receipts = []
+    for n in Notification.objects.order_by('id').iterator(chunk_size=2000):
+        key = (n.notification_type, n.message, n.link)
+        # A fan-out reaches each recipient once, so a repeat starts a new run too
+        if key != run_key or n.created_at - run_started > FANOUT_WINDOW or n.recipient_id in run_recipients:
+            event_id = NotificationEvent.objects.create(
+                notification_type=n.notification_type, message=n.message, link=n.link,
+            ).id
+            run_key, run_started, run_recipients = key, n.created_at, set()
+        run_recipients.add(n.recipient_id)
+
+        receipts.append(NotificationReceipt(
+            id=n.id,
+            event_id=event_id,
+            recipient_id=n.recipient_id,
+            is_read=n.is_read,
+            version=n.version,
+        ))
+        if len(receipts) >= 2000:
+            NotificationReceipt.objects.bulk_create(receipts, batch_size=500)
+            receipts = []
+    NotificationReceipt.objects.bulk_create(receipts, batch_size=500)
+
+    # auto_now_add stamped everything with "now": copy the original times back
+    NotificationReceipt.objects.update(created_at=models.Subquery(
+        Notification.objects.filter(id=models.OuterRef('id')).values('created_at')[:1]
+    ))
+    NotificationEvent.objects.update(created_at=models.Subquery(
+        NotificationReceipt.objects.filter(event_id=models.OuterRef('id'))
+        .order_by('created_at').values('created_at')[:1]
+    ))
+
+    # Explicit ids were inserted, so move the id sequence past them
+    for sql in schema_editor.connection.ops.sequence_reset_sql(no_style(), [NotificationReceipt]):
+        schema_editor.execute(sql)
+
+
+def join_notifications(apps, schema_editor):
+    """Reverse of split_notifications: one full Notification row per receipt, same id."""
+    Notification = apps.get_model('notifications', 'Notification')
+    NotificationReceipt = apps.get_model('notifications', 'NotificationReceipt')
+
+    notifications = []
+    for r in NotificationReceipt.objects.select_related('event').order_by('id').iterator(chunk_size=2000):
+        notifications.append(Notification(
+            id=r.id,
+            recipient_id=r.recipient_id,
+            notification_type=r.event.notification_type,
+            message=r.event.message,
+            link=r.event.link,
+            is_read=r.is_read,
+            version=r.version,
+        ))
+        if len(notifications) >= 2000:
+            Notification.objects.bulk_create(notifications, batch_size=500)
+            notifications = []
+    Notification.objects.bulk_create(notifications, batch_size=500)
+
+    Notification.objects.update(created_at=models.Subquery(
+        NotificationReceipt.objects.filter(id=models.OuterRef('id')).values('created_at')[:1]
+    ))
+
+    for sql in schema_editor.connection.ops.sequence_reset_sql(no_style(), [Notification]):
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('notifications', '0004_notification_sync_versions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('notification_type', models.CharField(choices=[('ENROLLMENT', 'New Enrollment'), ('MATERIAL', 'New Course Material'), ('SYSTEM', 'System Alert')], default='SYSTEM', max_length=20)),
+                ('message', models.CharField(max_length=255)),
+                ('link', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='NotificationReceipt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_read', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('version', models.PositiveBigIntegerField(default=0)),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='receipts', to='notifications.notificationevent')),
+                ('recipient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.RunPython(split_notifications, join_notifications),
+        migrations.DeleteModel(
+            name='Notification',
+        ),
+        # The old model owned the reverse name until it was dropped
+        migrations.AlterField(
+            model_name='notificationreceipt',
+            name='recipient',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='notificationreceipt',
+            index=models.Index(fields=['recipient', 'created_at', 'id'], name='notif_rcpt_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notificationreceipt',
+            index=models.Index(fields=['recipient', 'version'], name='notif_rcpt_version_idx'),
+        ),
+    ]
@@ -1,24 +1,107 @@
 from django.db import models
 from django.conf import settings
+from django.contrib.auth import get_user_model
 
 User = settings.AUTH_USER_MODEL
 
-class Notification(models.Model):
+class NotificationEvent(models.Model):
+    """
+    What happened, stored once however many people are told about it
+    (e.g. one material upload to a 5,000-student course is one row here
+    and 5,000 slim NotificationReceipt rows).
+    """
     TYPE_CHOICES = (
         ('ENROLLMENT', 'New Enrollment'),
         ('MATERIAL', 'New Course Material'),
         ('SYSTEM', 'System Alert'),
     )
 
-    recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
     notification_type = models.CharField(max_length=20, choices=TYPE_CHOICES, default='SYSTEM')
     message = models.CharField(max_length=255)
     link = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.message
+
+
+class NotificationReceipt(models.Model):
+    """One recipient's copy of a NotificationEvent: only the per-user state."""
+    event = models.ForeignKey(NotificationEvent, on_delete=models.CASCADE, related_name='receipts')
+    recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    # The recipient's NotificationInbox.version when this row last changed
+    version = models.PositiveBigIntegerField(default=0)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Keyset "load older" pages, and delta syncs (?since=<version>)
+            models.Index(fields=['recipient', 'created_at', 'id'], name='notif_rcpt_created_idx'),
+            models.Index(fields=['recipient', 'version'], name='notif_rcpt_version_idx'),
+        ]
 
     def __str__(self):
-        return f"To {self.recipient.username}: {self.message}"
\ No newline at end of file
+        return f"To {self.recipient.username}: {self.event.message}"
+
+
+class NotificationInbox(models.Model):
+    """
+    One row per user holding their unread notification count and a change
+    version. Both are adjusted in place by the helpers in utils.py whenever
+    a notification is created, read, marked unread or deleted, so the badge
+    never counts rows and an unchanged inbox can answer 304 from this row.
+    """
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='notification_inbox'
+    )
+
+    unread_count = models.PositiveIntegerField(default=0)
+
+    # Bumped on every change; changed rows are stamped with the new value
+    version = models.PositiveBigIntegerField(default=0)
+    # Version of the last delete. Deletes leave no row to send, so clients
+    # that synced before it get a full reload instead of a delta
+    reset_version = models.PositiveBigIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "notification inboxes"
+
+    def __str__(self):
+        return f"Inbox for {self.user_id}"
+
+    @classmethod
+    def rebuild(cls, user_ids=None):
+        """
+        Recounts unread notifications from the receipts table. Used by
+        the rebuild_notification_inbox command and as a fallback for missing rows.
+        """
+        users = get_user_model().objects.all()
+        if user_ids is not None:
+            users = users.filter(id__in=user_ids)
+
+        unread = dict(
+            NotificationReceipt.objects.filter(recipient__in=users, is_read=False)
+            .values_list("recipient_id").annotate(c=models.Count("id"))
+        )
+
+        rows = [
+            cls(user_id=user_id, unread_count=unread.get(user_id, 0))
+            for user_id in users.values_list("id", flat=True)
+        ]
+
+        # Upserted so existing rows keep their version (clients sync against it)
+        cls.objects.bulk_create(
+            rows,
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=["user"],
+            update_fields=["unread_count", "updated_at"],
+        )
+        return len(rows)
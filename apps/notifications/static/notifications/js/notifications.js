@@ -15,35 +15,41 @@ function getDjangoCSRFToken() {
     return cookieValue;
 }
 
+// What this tab last got from /api/notifications/ (see syncNotifications)
+const notifSync = {
+    version: null,      // inbox version the list reflects
+    etag: null,         // sent back as If-None-Match, so an idle inbox answers 304
+    olderCursor: null,  // keyset cursor for "Load older", null when there is nothing older
+};
+
 document.addEventListener("DOMContentLoaded", () => {
     fetchUnreadNotifications();
 });
 
+// A tab coming back into view only asks for what changed (usually a 304)
+document.addEventListener("visibilitychange", () => {
+    if (!document.hidden) syncNotifications();
+});
+
 // ========================================================
 // REAL-TIME WEBSOCKET CONNECTION
 // ========================================================
-const wsProtocol = window.location.protocol === "https:" ? "wss://" : "ws://";
-const notificationSocket = new WebSocket(wsProtocol + window.location.host + '/ws/notifications/');
-
-notificationSocket.onmessage = function(e) {
-    let data;
-    try { 
-        data = JSON.parse(e.data); 
-    } catch (err) { 
-        console.error("Error parsing websocket message", err);
-        return; 
-    }
+// Frames arrive on the shared per-tab socket (core/js/socket.js)
+AppSocket.on("notification", (data) => {
+    handleRealtimeNotification(data.payload);
+    setNotificationBadge(data.unread_count);
+});
 
-    // When the consumer sends the notification, route it UI function
-    if (data.type === "notification") {
-        console.log("Live notification received!", data.payload);
-        handleRealtimeNotification(data.payload);
-    }
-};
+// The server's counter after a read/unread/delete, possibly from another tab
+AppSocket.on("unread_count", (data) => {
+    setNotificationBadge(data.count);
+    if (data.version !== notifSync.version) syncNotifications();
+});
 
-notificationSocket.onclose = function(e) {
-    console.error('Notification WebSocket closed unexpectedly.');
-};
+// Frames sent while the socket was down are lost, so catch up on reconnect
+AppSocket.on("open", () => {
+    syncNotifications();
+});
 // ========================================================
 
 window.toggleNotificationMenu = function() {
@@ -66,25 +72,65 @@ document.addEventListener("click", (e) => {
 });
 
 function fetchUnreadNotifications() {
-    fetch('/api/notifications/')
-        .then(response => response.json())
+    fetch('/api/notifications/', { cache: "no-store" })
+        .then(response => {
+            notifSync.etag = response.headers.get("ETag");
+            return response.json();
+        })
         .then(data => {
+            notifSync.version = data.version;
+            notifSync.olderCursor = data.next_cursor;
             updateNotificationUI(data.count, data.notifications);
         })
         .catch(error => console.error('Error fetching notifications:', error));
 }
 
-function updateNotificationUI(count, notifications) {
+// Fetches only what changed since the version this tab has
+function syncNotifications() {
+    if (notifSync.version === null) return;  // the first full fetch is still pending
+
+    const headers = notifSync.etag ? { "If-None-Match": notifSync.etag } : {};
+    fetch(`/api/notifications/?since=${notifSync.version}`, { headers, cache: "no-store" })
+        .then(response => {
+            if (response.status === 304) return null;
+            notifSync.etag = response.headers.get("ETag");
+            return response.json();
+        })
+        .then(data => {
+            if (!data) return;
+            notifSync.version = data.version;
+
+            if (data.reset) {
+                // Something was deleted (or a lot changed): take the fresh first page
+                notifSync.olderCursor = data.next_cursor;
+                updateNotificationUI(data.count, data.notifications);
+            } else {
+                applyNotificationChanges(data.changed);
+                setNotificationBadge(data.count);
+            }
+        })
+        .catch(error => console.error('Error syncing notifications:', error));
+}
+
+// Sets the red badge to an exact count (ignored when the server sent none)
+function setNotificationBadge(count) {
     const badge = document.getElementById("notificationBadge");
-    const list = document.getElementById("notificationList");
+    if (!badge || count === undefined || count === null) return;
 
-    // 1. Update Badge
     if (count > 0) {
         badge.textContent = count > 9 ? '9+' : count;
         badge.classList.remove("hidden");
     } else {
+        badge.textContent = "0";
         badge.classList.add("hidden");
     }
+}
+
+function updateNotificationUI(count, notifications) {
+    const list = document.getElementById("notificationList");
+
+    // 1. Update Badge
+    setNotificationBadge(count);
 
     // 2. Render List
     if (notifications.length === 0) {
@@ -96,70 +142,139 @@ function updateNotificationUI(count, notifications) {
     const fragment = document.createDocumentFragment();
 
     notifications.forEach(notif => {
-        const isRead = notif.is_read;
-        const item = document.createElement("a");
-        item.href = "javascript:void(0)";
-        item.onclick = () => handleNotificationClick(notif.id, notif.link);
-        
-        // Background: Blue tint if unread, plain white if read
-        const bgClass = isRead ? "bg-white hover:bg-gray-50" : "bg-blue-50/40 hover:bg-blue-50/60";
-        item.className = `block relative px-4 py-3.5 border-b border-gray-50 transition-colors cursor-pointer group ${bgClass}`;
-
-        // Icons: Same logic as before
-        let iconHtml = '';
-        if (notif.notification_type === 'ENROLLMENT') {
-            iconHtml = `<div class="w-9 h-9 rounded-full bg-green-100 text-green-600 flex items-center justify-center shrink-0 mt-0.5"><svg class="w-4 h-4" fill="none" viewBox="0 0 24 24" stroke="currentColor"><path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M18 9v3m0 0v3m0-3h3m-3 0h-3m-2-5a4 4 0 11-8 0 4 4 0 018 0zM3 20a6 6 0 0112 0v1H3v-1z"/></svg></div>`;
-        } else if (notif.notification_type === 'MATERIAL') {
-            iconHtml = `<div class="w-9 h-9 rounded-full bg-blue-100 text-blue-600 flex items-center justify-center shrink-0 mt-0.5"><svg class="w-4 h-4" fill="none" viewBox="0 0 24 24" stroke="currentColor"><path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M9 12h6m-6 4h6m2 5H7a2 2 0 01-2-2V5a2 2 0 012-2h5.586a1 1 0 01.707.293l5.414 5.414a1 1 0 01.293.707V19a2 2 0 01-2 2z"/></svg></div>`;
+        fragment.appendChild(buildNotificationItem(notif));
+    });
+
+    list.appendChild(fragment);
+    renderLoadOlderButton();
+}
+
+// Swaps in changed notifications in place and puts new ones on top (changes arrive newest first)
+function applyNotificationChanges(changed) {
+    const list = document.getElementById("notificationList");
+    if (!list || changed.length === 0) return;
+
+    const items = list.querySelectorAll("[data-notif-id]");
+    if (items.length === 0) {
+        list.innerHTML = "";
+    }
+    const oldestShown = items.length ? Number(items[items.length - 1].dataset.notifId) : 0;
+
+    changed.slice().reverse().forEach(notif => {
+        const existing = list.querySelector(`[data-notif-id="${notif.id}"]`);
+        if (existing) {
+            existing.replaceWith(buildNotificationItem(notif));
+        } else if (notif.id > oldestShown) {
+            list.prepend(buildNotificationItem(notif));
         }
-        
-        // Dim the icon slightly if the notification is read
-        const iconWrapperClass = isRead ? "opacity-50 grayscale" : "";
-        
-        // Unread Dot
-        const unreadDot = isRead ? "" : `<span class="absolute left-1.5 top-1/2 -translate-y-1/2 w-1.5 h-1.5 rounded-full bg-blue-600 shadow-[0_0_4px_rgba(37,99,235,0.6)]"></span>`;
-        
-        // Text Colors
-        const baseTextColor = isRead ? "text-gray-400" : "text-gray-600";
-        const timeColor = isRead ? "text-gray-400" : "text-blue-500/80";
-
-        item.innerHTML = `
-            ${unreadDot}
-            <div class="flex items-start gap-3 pl-2 w-full">
-                <div class="${iconWrapperClass}">
-                    ${iconHtml}
-                </div>
-                <div class="flex-1 min-w-0">
-                    <p class="text-sm ${baseTextColor} leading-snug group-hover:text-blue-700 transition-colors">
-                        ${formatNotificationText(notif.message, isRead)} 
-                    </p>
-                    <div class="flex items-center gap-1 mt-1.5">
-                        <svg class="w-3 h-3 ${timeColor}" fill="none" viewBox="0 0 24 24" stroke="currentColor"><path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M12 8v4l3 3m6-3a9 9 0 11-18 0 9 9 0 0118 0z" /></svg>
-                        <p class="text-[11px] font-medium ${timeColor} uppercase tracking-wide">${notif.time_ago}</p>
-                    </div>
+        // Older than anything shown: it will come with "Load older"
+    });
+}
+
+// "Load older" keeps paging with the keyset cursor from the last response
+function renderLoadOlderButton() {
+    const list = document.getElementById("notificationList");
+    const existing = document.getElementById("notifLoadOlder");
+    if (existing) existing.remove();
+    if (!list || !notifSync.olderCursor) return;
+
+    const button = document.createElement("button");
+    button.type = "button";
+    button.id = "notifLoadOlder";
+    button.className = "w-full px-4 py-3 text-xs font-medium text-blue-600 hover:bg-gray-50 transition-colors";
+    button.textContent = "Load older";
+    button.onclick = (e) => {
+        e.stopPropagation();
+        loadOlderNotifications();
+    };
+    list.appendChild(button);
+}
+
+function loadOlderNotifications() {
+    if (!notifSync.olderCursor) return;
+
+    fetch(`/api/notifications/?before=${encodeURIComponent(notifSync.olderCursor)}`)
+        .then(response => response.json())
+        .then(data => {
+            const list = document.getElementById("notificationList");
+            const fragment = document.createDocumentFragment();
+            data.notifications.forEach(notif => {
+                if (!list.querySelector(`[data-notif-id="${notif.id}"]`)) {
+                    fragment.appendChild(buildNotificationItem(notif));
+                }
+            });
+            list.appendChild(fragment);
+
+            notifSync.olderCursor = data.next_cursor;
+            renderLoadOlderButton();
+        })
+        .catch(error => console.error('Error loading older notifications:', error));
+}
+
+function buildNotificationItem(notif) {
+    const isRead = notif.is_read;
+    const item = document.createElement("a");
+    item.href = "javascript:void(0)";
+    item.onclick = () => handleNotificationClick(notif.id, notif.link);
+    
+    // Background: Blue tint if unread, plain white if read
+    const bgClass = isRead ? "bg-white hover:bg-gray-50" : "bg-blue-50/40 hover:bg-blue-50/60";
+    item.dataset.notifId = notif.id;
+    item.className = `block relative px-4 py-3.5 border-b border-gray-50 transition-colors cursor-pointer group ${bgClass}`;
+
+    // Icons: Same logic as before
+    let iconHtml = '';
+    if (notif.notification_type === 'ENROLLMENT') {
+        iconHtml = `<div class="w-9 h-9 rounded-full bg-green-100 text-green-600 flex items-center justify-center shrink-0 mt-0.5"><svg class="w-4 h-4" fill="none" viewBox="0 0 24 24" stroke="currentColor"><path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M18 9v3m0 0v3m0-3h3m-3 0h-3m-2-5a4 4 0 11-8 0 4 4 0 018 0zM3 20a6 6 0 0112 0v1H3v-1z"/></svg></div>`;
+    } else if (notif.notification_type === 'MATERIAL') {
+        iconHtml = `<div class="w-9 h-9 rounded-full bg-blue-100 text-blue-600 flex items-center justify-center shrink-0 mt-0.5"><svg class="w-4 h-4" fill="none" viewBox="0 0 24 24" stroke="currentColor"><path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M9 12h6m-6 4h6m2 5H7a2 2 0 01-2-2V5a2 2 0 012-2h5.586a1 1 0 01.707.293l5.414 5.414a1 1 0 01.293.707V19a2 2 0 01-2 2z"/></svg></div>`;
+    }
+    
+    // Dim the icon slightly if the notification is read
+    const iconWrapperClass = isRead ? "opacity-50 grayscale" : "";
+    
+    // Unread Dot
+    const unreadDot = isRead ? "" : `<span class="absolute left-1.5 top-1/2 -translate-y-1/2 w-1.5 h-1.5 rounded-full bg-blue-600 shadow-[0_0_4px_rgba(37,99,235,0.6)]"></span>`;
+    
+    // Text Colors
+    const baseTextColor = isRead ? "text-gray-400" : "text-gray-600";
+    const timeColor = isRead ? "text-gray-400" : "text-blue-500/80";
+
+    item.innerHTML = `
+        ${unreadDot}
+        <div class="flex items-start gap-3 pl-2 w-full">
+            <div class="${iconWrapperClass}">
+                ${iconHtml}
+            </div>
+            <div class="flex-1 min-w-0">
+                <p class="text-sm ${baseTextColor} leading-snug group-hover:text-blue-700 transition-colors">
+                    ${formatNotificationText(notif.message, isRead)} 
+                </p>
+                <div class="flex items-center gap-1 mt-1.5">
+                    <svg class="w-3 h-3 ${timeColor}" fill="none" viewBox="0 0 24 24" stroke="currentColor"><path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M12 8v4l3 3m6-3a9 9 0 11-18 0 9 9 0 0118 0z" /></svg>
+                    <p class="text-[11px] font-medium ${timeColor} uppercase tracking-wide">${notif.time_ago}</p>
                 </div>
+            </div>
+            
+            <div class="shrink-0 relative opacity-0 group-hover:opacity-100 transition-opacity" onclick="event.stopPropagation();">
+                <button type="button" 
+                        onclick="toggleSingleNotifMenu('notif-menu-${notif.id}')" 
+                        class="p-1 rounded-md text-gray-400 hover:text-gray-700 hover:bg-gray-200/50 transition-colors">
+                    <svg class="w-5 h-5" fill="none" viewBox="0 0 24 24" stroke="currentColor"><path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M12 5v.01M12 12v.01M12 19v.01M12 6a1 1 0 110-2 1 1 0 010 2zm0 7a1 1 0 110-2 1 1 0 010 2zm0 7a1 1 0 110-2 1 1 0 010 2z" /></svg>
+                </button>
                 
-                <div class="shrink-0 relative opacity-0 group-hover:opacity-100 transition-opacity" onclick="event.stopPropagation();">
-                    <button type="button" 
-                            onclick="toggleSingleNotifMenu('notif-menu-${notif.id}')" 
-                            class="p-1 rounded-md text-gray-400 hover:text-gray-700 hover:bg-gray-200/50 transition-colors">
-                        <svg class="w-5 h-5" fill="none" viewBox="0 0 24 24" stroke="currentColor"><path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M12 5v.01M12 12v.01M12 19v.01M12 6a1 1 0 110-2 1 1 0 010 2zm0 7a1 1 0 110-2 1 1 0 010 2zm0 7a1 1 0 110-2 1 1 0 010 2z" /></svg>
-                    </button>
-                    
-                    <div id="notif-menu-${notif.id}" class="single-notif-menu hidden absolute right-0 top-8 w-36 bg-white rounded-xl shadow-[0_4px_20px_rgb(0,0,0,0.15)] border border-gray-100 py-1 z-50">
-                        ${!isRead 
-                            ? `<button type="button" onclick="markSingleNotifRead(${notif.id}, this)" class="w-full text-left px-4 py-2.5 text-xs font-medium text-gray-700 hover:bg-gray-50">Mark as read</button>`
-                            : `<button type="button" onclick="markSingleNotifUnread(${notif.id}, this)" class="w-full text-left px-4 py-2.5 text-xs font-medium text-gray-700 hover:bg-gray-50">Mark as unread</button>`
-                        }
-                        <button type="button" onclick="deleteSingleNotif(${notif.id}, this)" class="w-full text-left px-4 py-2.5 text-xs font-medium text-red-600 hover:bg-red-50">Delete</button>
-                    </div>
+                <div id="notif-menu-${notif.id}" class="single-notif-menu hidden absolute right-0 top-8 w-36 bg-white rounded-xl shadow-[0_4px_20px_rgb(0,0,0,0.15)] border border-gray-100 py-1 z-50">
+                    ${!isRead 
+                        ? `<button type="button" onclick="markSingleNotifRead(${notif.id}, this)" class="w-full text-left px-4 py-2.5 text-xs font-medium text-gray-700 hover:bg-gray-50">Mark as read</button>`
+                        : `<button type="button" onclick="markSingleNotifUnread(${notif.id}, this)" class="w-full text-left px-4 py-2.5 text-xs font-medium text-gray-700 hover:bg-gray-50">Mark as unread</button>`
+                    }
+                    <button type="button" onclick="deleteSingleNotif(${notif.id}, this)" class="w-full text-left px-4 py-2.5 text-xs font-medium text-red-600 hover:bg-red-50">Delete</button>
                 </div>
             </div>
-        `;
-        fragment.appendChild(item);
-    });
+        </div>
+    `;
 
-    list.appendChild(fragment);
+    return item;
 }
 
 function handleNotificationClick(notifId, redirectLink) {
@@ -175,8 +290,8 @@ function handleNotificationClick(notifId, redirectLink) {
         if (redirectLink) {
             window.location.href = redirectLink;
         } else {
-            // If no link, just refresh the list
-            fetchUnreadNotifications();
+            // If no link, just pick up the change
+            syncNotifications();
         }
     });
 }
@@ -204,12 +319,8 @@ window.markAllNotificationsRead = function() {
     .then(response => response.json())
     .then(data => {
         if (data.success) {
-            // 1. Hide the red badge on the bell
-            const badge = document.getElementById("notificationBadge");
-            if (badge) {
-                badge.classList.add("hidden");
-                badge.textContent = "0";
-            }
+            // 1. Sync the red badge on the bell
+            setNotificationBadge(data.count);
 
             // 2. Instantly update all unread items to the "read" state
             const list = document.getElementById("notificationList");
@@ -264,7 +375,14 @@ window.markAllNotificationsRead = function() {
 
 
 window.handleRealtimeNotification = function(notif) {
-    // 1. Un-hide and Increment the Red Badge
+    // 1. Locate the Dropdown List
+    const list = document.getElementById("notificationList");
+    if (!list) return;
+
+    // Already shown (a sync got there first)
+    if (list.querySelector(`[data-notif-id="${notif.id}"]`)) return;
+
+    // 2. Un-hide and Increment the Red Badge (the frame's exact count replaces this)
     const badge = document.getElementById("notificationBadge");
     if (badge) {
         badge.classList.remove("hidden");
@@ -272,62 +390,11 @@ window.handleRealtimeNotification = function(notif) {
         badge.textContent = currentCount + 1;
     }
 
-    // 2. Locate the Dropdown List
-    const list = document.getElementById("notificationList");
-    if (!list) return;
-
-    // Remove the "Loading..." spinner if this is the very first notification
-    const loadingSpinner = list.querySelector(".animate-spin");
-    if (loadingSpinner) list.innerHTML = "";
-
-    // 3. Build the new HTML Element
-    const item = document.createElement("a");
-    item.href = "javascript:void(0)";
-    item.onclick = () => handleNotificationClick(notif.id, notif.link);
-    
-    // Apply the "Unread" styling (blue background)
-    item.className = "block relative px-4 py-3.5 border-b border-gray-50 transition-colors cursor-pointer group bg-blue-50/40 hover:bg-blue-50/60";
-
-    // Set the correct Icon
-    let iconHtml = '';
-    if (notif.notification_type === 'ENROLLMENT') {
-        iconHtml = `<div class="w-9 h-9 rounded-full bg-green-100 text-green-600 flex items-center justify-center shrink-0 mt-0.5"><svg class="w-4 h-4" fill="none" viewBox="0 0 24 24" stroke="currentColor"><path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M18 9v3m0 0v3m0-3h3m-3 0h-3m-2-5a4 4 0 11-8 0 4 4 0 018 0zM3 20a6 6 0 0112 0v1H3v-1z"/></svg></div>`;
-    } else if (notif.notification_type === 'MATERIAL') {
-        iconHtml = `<div class="w-9 h-9 rounded-full bg-blue-100 text-blue-600 flex items-center justify-center shrink-0 mt-0.5"><svg class="w-4 h-4" fill="none" viewBox="0 0 24 24" stroke="currentColor"><path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M9 12h6m-6 4h6m2 5H7a2 2 0 01-2-2V5a2 2 0 012-2h5.586a1 1 0 01.707.293l5.414 5.414a1 1 0 01.293.707V19a2 2 0 01-2 2z"/></svg></div>`;
-    }
-
-    const unreadDot = `<span class="absolute left-1.5 top-1/2 -translate-y-1/2 w-1.5 h-1.5 rounded-full bg-blue-600 shadow-[0_0_4px_rgba(37,99,235,0.6)]"></span>`;
+    // Remove the "Loading..." spinner or the empty message if this is the very first notification
+    if (!list.querySelector("[data-notif-id]")) list.innerHTML = "";
 
-    item.innerHTML = `
-        ${unreadDot}
-        <div class="flex items-start gap-3 pl-2 w-full"> <div>${iconHtml}</div>
-            <div class="flex-1 min-w-0">
-                <p class="text-sm text-gray-600 leading-snug group-hover:text-blue-700 transition-colors">
-                    ${formatNotificationText(notif.message, false)} 
-                </p>
-                <div class="flex items-center gap-1 mt-1.5">
-                    <svg class="w-3 h-3 text-blue-500/80" fill="none" viewBox="0 0 24 24" stroke="currentColor"><path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M12 8v4l3 3m6-3a9 9 0 11-18 0 9 9 0 0118 0z" /></svg>
-                    <p class="text-[11px] font-medium text-blue-500/80 uppercase tracking-wide">${notif.time_ago}</p>
-                </div>
-            </div>
-            
-            <div class="shrink-0 relative opacity-0 group-hover:opacity-100 transition-opacity" onclick="event.stopPropagation();">
-                <button type="button" 
-                        onclick="toggleSingleNotifMenu('notif-menu-${notif.id}')" 
-                        class="p-1 rounded-md text-gray-400 hover:text-gray-700 hover:bg-gray-200/50 transition-colors">
-                    <svg class="w-5 h-5" fill="none" viewBox="0 0 24 24" stroke="currentColor"><path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M12 5v.01M12 12v.01M12 19v.01M12 6a1 1 0 110-2 1 1 0 010 2zm0 7a1 1 0 110-2 1 1 0 010 2zm0 7a1 1 0 110-2 1 1 0 010 2z" /></svg>
-                </button>
-                
-                <div id="notif-menu-${notif.id}" class="single-notif-menu hidden absolute right-0 top-8 w-36 bg-white rounded-xl shadow-[0_4px_20px_rgb(0,0,0,0.15)] border border-gray-100 py-1 z-50">
-                    <button type="button" onclick="markSingleNotifRead(${notif.id}, this)" class="w-full text-left px-4 py-2.5 text-xs font-medium text-gray-700 hover:bg-gray-50">Mark as read</button>
-                    <button type="button" onclick="deleteSingleNotif(${notif.id}, this)" class="w-full text-left px-4 py-2.5 text-xs font-medium text-red-600 hover:bg-red-50">Delete</button>
-                </div>
-            </div>
-        </div>
-    `;
-    
-    // 4. Prepend puts the newest notification at the TOP of the list
-    list.prepend(item);
+    // 3. Prepend puts the newest notification at the TOP of the list
+    list.prepend(buildNotificationItem({ ...notif, is_read: false }));
 };
 
 
@@ -357,10 +424,7 @@ window.deleteSingleNotif = function(notifId, btnElement) {
             // Find the main <a> tag (parent of the menu) and remove it smoothly
             const item = btnElement.closest('a');
             
-            // Check if it was unread to decrement the badge
-            if (item.classList.contains('bg-blue-50/40')) {
-                decrementBadge();
-            }
+            setNotificationBadge(data.count);
             
             // Remove from DOM
             item.remove();
@@ -405,25 +469,11 @@ window.markSingleNotifRead = function(notifId, btnElement) {
             btnElement.textContent = "Mark as unread";
             btnElement.setAttribute("onclick", `markSingleNotifUnread(${notifId}, this)`);
             
-            decrementBadge();
+            setNotificationBadge(data.count);
         }
     });
 };
 
-// Helper to lower the red badge number
-function decrementBadge() {
-    const badge = document.getElementById("notificationBadge");
-    if (badge && !badge.classList.contains("hidden")) {
-        let currentCount = parseInt(badge.textContent) || 0;
-        if (currentCount > 1) {
-            badge.textContent = currentCount - 1;
-        } else {
-            badge.classList.add("hidden");
-            badge.textContent = "0";
-        }
-    }
-}
-
 // Ensure clicking anywhere else closes the mini-menus
 document.addEventListener("click", function () {
     document.querySelectorAll('.single-notif-menu').forEach(menu => {
@@ -474,18 +524,8 @@ window.markSingleNotifUnread = function(notifId, btnElement) {
             btnElement.textContent = "Mark as read";
             btnElement.setAttribute("onclick", `markSingleNotifRead(${notifId}, this)`);
             
-            // 6. Increase the red bell badge
-            incrementBadge();
+            // 6. Sync the red bell badge
+            setNotificationBadge(data.count);
         }
     });
 };
-
-// NEW: Helper to increase the red badge
-function incrementBadge() {
-    const badge = document.getElementById("notificationBadge");
-    if (badge) {
-        badge.classList.remove("hidden");
-        let currentCount = parseInt(badge.textContent) || 0;
-        badge.textContent = currentCount + 1;
-    }
-}
\ No newline at end of file
@@ -1,3 +1,191 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from apps.accounts.models import User
+from apps.courses.models import Course
+from apps.jobs.models import Job
+
+from .models import NotificationEvent, NotificationInbox, NotificationReceipt
+from .utils import fan_out_notifications, get_unread_count
+from .views import NOTIFICATIONS_PAGE_SIZE
+
+
+class FanOutTests(TestCase):
+    def setUp(self):
+        self.students = [
+            User.objects.create_user(username=f"student{i}", password="x", role=User.Role.STUDENT)
+            for i in range(3)
+        ]
+
+    def test_failed_push_keeps_the_stored_fan_out(self):
+        ids = [s.id for s in self.students]
+        with mock.patch(
+            "apps.notifications.utils.broadcast_notifications", side_effect=OSError("layer down")
+        ), self.assertLogs("apps.notifications.utils", level="ERROR"):
+            created = fan_out_notifications(ids, "SYSTEM", "Hello", "/")
+
+        # The job that called this succeeds, so it is never retried into duplicates
+        self.assertEqual(len(created), 3)
+        self.assertEqual(NotificationEvent.objects.count(), 1)
+        self.assertEqual(NotificationReceipt.objects.count(), 3)
+        self.assertEqual(get_unread_count(ids[0]), 1)
+
+
+class UnreadCounterTests(TestCase):
+    def test_mixed_writes_match_a_rebuild(self):
+        users = [User.objects.create_user(username=f"user{i}", password="x") for i in range(3)]
+        ids = [u.id for u in users]
+        self.client.force_login(users[0])
+
+        # A repeated recipient gets two receipts from one fan-out
+        fan_out_notifications(ids + [ids[0]], "SYSTEM", "First", "/")
+        fan_out_notifications(ids[:2], "SYSTEM", "Second", "/")
+        mine = list(NotificationReceipt.objects.filter(recipient=users[0]).order_by("id"))
+
+        # Double clicks included: only real state changes may move the counter
+        for _ in range(2):
+            self.client.post(f"/api/notifications/{mine[0].id}/read/")
+        self.client.post(f"/api/notifications/{mine[0].id}/unread/")
+        self.client.post(f"/api/notifications/{mine[1].id}/read/")
+        self.client.delete(f"/api/notifications/{mine[1].id}/delete/")
+        self.client.delete(f"/api/notifications/{mine[2].id}/delete/")
+        self.client.force_login(users[1])
+        self.client.post("/api/notifications/read-all/")
+        self.client.post("/api/notifications/read-all/")
+
+        maintained = dict(NotificationInbox.objects.values_list("user_id", "unread_count"))
+        NotificationInbox.rebuild()
+        self.assertEqual(maintained, dict(NotificationInbox.objects.values_list("user_id", "unread_count")))
+        self.assertEqual([maintained[i] for i in ids], [1, 0, 1])
+
+
+class GetNotificationsAPITests(TestCase):
+    URL = "/api/notifications/"
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="student", password="x")
+        self.client.force_login(self.user)
+
+    def notify(self, message="Hello"):
+        return fan_out_notifications([self.user.id], "SYSTEM", message, "/")[0]
+
+    def test_matching_etag_gets_304_until_a_new_receipt(self):
+        self.notify()
+        first = self.client.get(self.URL)
+        etag = first["ETag"]
+
+        self.assertEqual(self.client.get(self.URL, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.notify("Another")
+        response = self.client.get(self.URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.json()["count"], 2)
+
+    def test_since_returns_only_what_changed(self):
+        self.notify("Old")
+        version = self.client.get(self.URL).json()["version"]
+        new = self.notify("New")
+
+        data = self.client.get(self.URL, {"since": version}).json()
+        self.assertFalse(data["reset"])
+        self.assertEqual([n["id"] for n in data["changed"]], [new.id])
+
+        self.client.post(f"/api/notifications/{new.id}/read/")
+        data = self.client.get(self.URL, {"since": data["version"]}).json()
+        self.assertEqual([(n["id"], n["is_read"]) for n in data["changed"]], [(new.id, True)])
+
+    def test_since_resets_after_a_delete(self):
+        old = self.notify("Old")
+        self.notify("Kept")
+        version = self.client.get(self.URL).json()["version"]
+        self.client.delete(f"/api/notifications/{old.id}/delete/")
+
+        data = self.client.get(self.URL, {"since": version}).json()
+        self.assertTrue(data["reset"])
+        self.assertEqual([n["message"] for n in data["notifications"]], ["Kept"])
+
+    def test_before_pages_back_without_gaps(self):
+        created = [self.notify(f"n{i}") for i in range(NOTIFICATIONS_PAGE_SIZE + 2)]
+        # Same timestamp everywhere: the id tie-break alone has to order the pages
+        NotificationReceipt.objects.update(created_at=timezone.now())
+
+        first = self.client.get(self.URL).json()
+        second = self.client.get(self.URL, {"before": first["next_cursor"]}).json()
+        ids = [n["id"] for n in first["notifications"] + second["notifications"]]
+
+        self.assertEqual(ids, sorted((r.id for r in created), reverse=True))
+        self.assertIsNone(second["next_cursor"])
+
+    def test_malformed_cursor_or_version_is_400(self):
+        for params in ({"before": "not-a-cursor"}, {"before": "bm9waXBl"}, {"since": "abc"}):
+            response = self.client.get(self.URL, params)
+            self.assertEqual(response.status_code, 400, params)
+
+
+class FanOutBenchmarkTests(TestCase):
+    def test_benchmark_reports_each_size_and_leaves_nothing_behind(self):
+        out = StringIO()
+        call_command("benchmark_notification_fanout", sizes="2,5", repeat=1, stdout=out)
+
+        for size in (2, 5):
+            self.assertIn(f"Uploading to {size} enrolled students:", out.getvalue())
+        self.assertEqual(out.getvalue().count("upload, enqueue + commit"), 2)
+        self.assertFalse(User.objects.filter(username__startswith="benchmark-").exists())
+        self.assertFalse(Course.objects.exists())
+        self.assertFalse(Job.objects.exists())
+        self.assertFalse(NotificationEvent.objects.exists())
+
+
+class SplitNotificationsMigrationTests(TransactionTestCase):
+    before = [("notifications", "0004_notification_sync_versions")]
+    after = [("notifications", "0005_notificationevent_notificationreceipt")]
+
+    def migrate(self, target):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(target)
+        return executor.loader.project_state(target).apps
+
+    def tearDown(self):
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def notification_rows(self, apps):
+        return list(
+            apps.get_model("notifications", "Notification").objects.order_by("id")
+            .values_list("id", "recipient_id", "message", "is_read", "created_at", "version")
+        )
+
+    def test_split_groups_by_fan_out_and_reverses(self):
+        apps = self.migrate(self.before)
+        Notification = apps.get_model("notifications", "Notification")
+        users = [User.objects.create_user(username=f"user{i}", password="x") for i in range(2)]
+
+        # The same message fanned out twice, a day apart, plus an unrelated one
+        yesterday = timezone.now() - timedelta(days=1)
+        for when in (yesterday, timezone.now()):
+            ids = [
+                Notification.objects.create(recipient_id=u.id, message="Hello", link="/", version=1).id
+                for u in users
+            ]
+            Notification.objects.filter(id__in=ids).update(created_at=when)
+        Notification.objects.create(recipient_id=users[0].id, message="Other", is_read=True, version=2)
+        original = self.notification_rows(apps)
+
+        apps = self.migrate(self.after)
+        NotificationEvent = apps.get_model("notifications", "NotificationEvent")
+        self.assertEqual(
+            sorted(NotificationEvent.objects.values_list("message", flat=True)),
+            ["Hello", "Hello", "Other"],
+        )
+        self.assertEqual(apps.get_model("notifications", "NotificationReceipt").objects.count(), 5)
+
+        apps = self.migrate(self.before)
+        self.assertEqual(self.notification_rows(apps), original)
@@ -0,0 +1,251 @@
+import logging
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from channels.layers import get_channel_layer
+from asgiref.sync import async_to_sync
+
+from .models import NotificationEvent, NotificationInbox, NotificationReceipt
+
+logger = logging.getLogger(__name__)
+
+
+# Rows per INSERT when fanning out to large courses
+FANOUT_BATCH_SIZE = 500
+
+
+def broadcast_notification(user_id, notif_data):
+    """Helper function to send WebSocket data to a specific user."""
+    channel_layer = get_channel_layer()
+    async_to_sync(channel_layer.group_send)(
+        f"user_{user_id}",
+        {
+            "type": "live_notification", # This tells the consumer which method to run
+            "payload": notif_data
+        }
+    )
+
+
+def _live_payload(receipt):
+    """The shape notifications.js expects for a freshly created notification."""
+    event = receipt.event
+    return {
+        "id": receipt.id,
+        "is_read": False,
+        "message": event.message,
+        "link": event.link,
+        "notification_type": event.notification_type,
+        "time_ago": "Just now"
+    }
+
+
+def broadcast_notifications(receipts, unread_counts=None):
+    """
+    Sends saved receipts (with their event attached) over the channel layer in a single event
+    loop pass, instead of one async_to_sync hop per recipient. Each frame
+    carries the recipient's new unread count when `unread_counts` is given.
+    """
+    channel_layer = get_channel_layer()
+    unread_counts = unread_counts or {}
+    messages = [(r.recipient_id, _live_payload(r)) for r in receipts]
+
+    async def _send_all():
+        for user_id, payload in messages:
+            await channel_layer.group_send(
+                f"user_{user_id}",
+                {
+                    "type": "live_notification",
+                    "payload": payload,
+                    "unread_count": unread_counts.get(user_id),
+                }
+            )
+
+    async_to_sync(_send_all)()
+
+
+def fan_out_notifications(recipient_ids, notification_type, message, link):
+    """
+    Stores the payload once as a NotificationEvent, gives each recipient a
+    slim NotificationReceipt in batched INSERTs, then pushes them live.
+    """
+    recipient_ids = list(recipient_ids)
+    recipients = Counter(recipient_ids)
+    if not recipients:
+        return []
+
+    with transaction.atomic():
+        # bulk_create sends no signals, so the inboxes are updated here in the same transaction
+        versions = _next_versions(recipients)
+        event = NotificationEvent.objects.create(
+            notification_type=notification_type,
+            message=message,
+            link=link
+        )
+        receipts = [
+            NotificationReceipt(
+                event=event,
+                recipient_id=recipient_id,
+                version=versions[recipient_id]
+            )
+            for recipient_id in recipient_ids
+        ]
+        created = NotificationReceipt.objects.bulk_create(receipts, batch_size=FANOUT_BATCH_SIZE)
+        _add_unread(recipients)
+
+    # The rows are committed now: a failed push must not fail the job, or its
+    # retry would store the whole fan-out a second time. Open tabs pick the
+    # receipts up on their next sync instead.
+    try:
+        broadcast_notifications(created, _read_unread_counts(recipients))
+    except Exception:
+        logger.exception("Live push of notification event %s failed", event.id)
+    return created
+
+
+# =========================
+# Inbox counters (one NotificationInbox row per user)
+# =========================
+def _next_versions(user_ids, deleted=False):
+    """
+    Bumps each user's change version and returns {user_id: new version}.
+
+    Call it first inside the transaction that changes the notifications:
+    the UPDATE holds the inbox rows until commit, so a user's versions are
+    handed out one transaction at a time and a row stamped with version N
+    is visible as soon as the inbox says N.
+    """
+    user_ids = set(user_ids)
+    changes = {"version": F("version") + 1}
+    if deleted:
+        changes["reset_version"] = F("version") + 1
+
+    if NotificationInbox.objects.filter(user_id__in=user_ids).update(**changes) < len(user_ids):
+        # First change for some users: create their rows, then bump those too
+        have_row = set(
+            NotificationInbox.objects.filter(user_id__in=user_ids).values_list("user_id", flat=True)
+        )
+        missing = user_ids - have_row
+        NotificationInbox.rebuild(user_ids=missing)
+        NotificationInbox.objects.filter(user_id__in=missing).update(**changes)
+
+    return dict(
+        NotificationInbox.objects.filter(user_id__in=user_ids).values_list("user_id", "version")
+    )
+
+
+def _add_unread(deltas):
+    """
+    Applies {user_id: delta} to the unread counters, one UPDATE per distinct
+    delta. Users without a row yet are recounted from the receipts table,
+    which already includes the change.
+    """
+    if not deltas:
+        return
+
+    have_row = set(
+        NotificationInbox.objects.filter(user_id__in=list(deltas)).values_list("user_id", flat=True)
+    )
+
+    by_delta = {}
+    for user_id, delta in deltas.items():
+        if user_id in have_row and delta:
+            by_delta.setdefault(delta, []).append(user_id)
+
+    for delta, user_ids in by_delta.items():
+        # Greatest() keeps a drifted counter from going below zero
+        NotificationInbox.objects.filter(user_id__in=user_ids).update(
+            unread_count=Greatest(F("unread_count") + delta, 0)
+        )
+
+    missing = set(deltas) - have_row
+    if missing:
+        NotificationInbox.rebuild(user_ids=missing)
+
+
+def _read_unread_counts(user_ids):
+    """Returns {user_id: unread count} with one primary-key lookup per batch."""
+    return dict(
+        NotificationInbox.objects.filter(user_id__in=list(user_ids)).values_list("user_id", "unread_count")
+    )
+
+
+def get_inbox(user_id):
+    """The user's NotificationInbox row (created on first use)."""
+    inbox = NotificationInbox.objects.filter(user_id=user_id).first()
+    if inbox is None:
+        NotificationInbox.rebuild(user_ids=[user_id])
+        inbox = NotificationInbox.objects.get(user_id=user_id)
+    return inbox
+
+
+def get_unread_count(user_id):
+    """A user's unread notification count, read from their NotificationInbox row."""
+    count = _read_unread_counts([user_id]).get(user_id)
+    if count is None:
+        count = get_inbox(user_id).unread_count
+    return count
+
+
+def update_notifications(user_id, notifications, unread_delta, **fields):
+    """
+    Runs notifications.update(**fields) on some of one user's receipts,
+    stamps the changed rows with a new version and moves the unread counter
+    by `unread_delta` per changed row, all in one transaction.
+
+    The queryset should only match rows the update really changes (e.g.
+    is_read=False when marking read), so repeated clicks change nothing.
+    Returns how many rows changed.
+    """
+    with transaction.atomic():
+        version = _next_versions([user_id])[user_id]
+        changed = notifications.update(version=version, **fields)
+        if not changed:
+            # Don't hand out a version for a change that didn't happen
+            transaction.set_rollback(True)
+            return 0
+        _add_unread({user_id: unread_delta * changed})
+    return changed
+
+
+def delete_notifications(user_id, notifications):
+    """
+    Deletes some of one user's receipts, keeping the inbox in step, and
+    drops events nobody holds a receipt for anymore. Returns rows deleted.
+    """
+    with transaction.atomic():
+        _next_versions([user_id], deleted=True)
+        event_ids = set(notifications.values_list("event_id", flat=True))
+        # Unread first, so the counter only drops for unread rows that went away
+        deleted_unread, _ = notifications.filter(is_read=False).delete()
+        deleted_read, _ = notifications.delete()
+        if not (deleted_unread or deleted_read):
+            transaction.set_rollback(True)
+            return 0
+        _add_unread({user_id: -deleted_unread})
+        NotificationEvent.objects.filter(id__in=event_ids, receipts__isnull=True).delete()
+    return deleted_unread + deleted_read
+
+
+def broadcast_unread_count(user_id, inbox):
+    """Pushes the inbox's count and version to every open tab of the user."""
+    channel_layer = get_channel_layer()
+    async_to_sync(channel_layer.group_send)(
+        f"user_{user_id}",
+        {
+            "type": "unread_count_changed",
+            "count": inbox.unread_count,
+            "version": inbox.version
+        }
+    )
+
+
+def push_unread_count(user_id):
+    """Reads the user's inbox, pushes it to their open tabs and returns the unread count."""
+    inbox = get_inbox(user_id)
+    try:
+        broadcast_unread_count(user_id, inbox)
+    except Exception:
+        logger.exception("Live push of the unread count for user %s failed", user_id)
+    return inbox.unread_count
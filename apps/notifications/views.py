@@ -1,16 +1,32 @@
 from rest_framework import serializers, views, status
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.db.models import Q
 from django.shortcuts import get_object_or_404
-from .models import Notification
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags
+
+from apps.core.utils import encode_keyset_cursor, decode_keyset_cursor
+
+from .models import NotificationReceipt
+from .utils import (
+    delete_notifications, get_inbox, get_unread_count, push_unread_count, update_notifications,
+)
+
+# Notifications per page (the dropdown, and each "load older" page)
+NOTIFICATIONS_PAGE_SIZE = 30
 
 # --- Serializer ---
 class NotificationSerializer(serializers.ModelSerializer):
+    # The shared payload lives on the event (select_related it)
+    notification_type = serializers.CharField(source='event.notification_type')
+    message = serializers.CharField(source='event.message')
+    link = serializers.CharField(source='event.link')
     # Format the time nicely for the frontend (e.g., "Oct 24, 2:30 PM")
     time_ago = serializers.SerializerMethodField()
 
     class Meta:
-        model = Notification
+        model = NotificationReceipt
         fields = ['id', 'notification_type', 'message', 'link', 'is_read', 'time_ago']
 
     def get_time_ago(self, obj):
@@ -18,35 +34,110 @@ class NotificationSerializer(serializers.ModelSerializer):
 
 # --- Views ---
 class GetNotificationsAPI(views.APIView):
+    """
+    GET /api/notifications/ in three modes, all answering from the user's
+    NotificationInbox row first:
+
+    - no parameters: the newest page, plus the inbox version to sync from
+    - ?since=<version>: only notifications created or changed after that
+      version ("changed"), or the newest page with reset=true when a delete
+      (or too many changes) happened since
+    - ?before=<cursor>: the next older page (keyset on created_at, id)
+
+    Every change to a user's notifications bumps the inbox version, so it
+    doubles as the ETag: a matching If-None-Match gets a 304 without
+    touching the notification rows.
+    """
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        # Fetch the latest 30 notifications, BOTH read and unread
-        notifications = Notification.objects.filter(recipient=request.user).order_by('-created_at')[:30]
-        
-        serializer = NotificationSerializer(notifications, many=True)
-        return Response({
-            "count": Notification.objects.filter(recipient=request.user, is_read=False).count(),
-            "notifications": serializer.data
-        })
-
-
+        inbox = get_inbox(request.user.id)
+        etag = f'"{request.user.id}.{inbox.version}"'
+
+        if etag in parse_etags(request.headers.get("If-None-Match", "")):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            try:
+                data = self.get_data(request, inbox)
+            except ValueError:
+                return Response({"error": "Invalid cursor."}, status=status.HTTP_400_BAD_REQUEST)
+            response = Response({"count": inbox.unread_count, "version": inbox.version, **data})
+
+        response["ETag"] = etag
+        # Per-user data: let the browser keep it, but always revalidate
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ["Cookie"])
+        return response
+
+    def get_data(self, request, inbox):
+        # Receipts joined to their event in the same query
+        notifications = NotificationReceipt.objects.filter(recipient=request.user).select_related("event")
+
+        since = request.query_params.get("since")
+        if since is not None:
+            since = int(since)
+            # A delete can't be sent as a delta, and a version from the future means the inbox was reset
+            if inbox.reset_version <= since <= inbox.version:
+                changed = list(
+                    notifications.filter(version__gt=since)
+                    .order_by("-created_at", "-id")[:NOTIFICATIONS_PAGE_SIZE + 1]
+                )
+                if len(changed) <= NOTIFICATIONS_PAGE_SIZE:
+                    return {
+                        "reset": False,
+                        "changed": NotificationSerializer(changed, many=True).data,
+                    }
+            return {"reset": True, **self.get_page(notifications)}
+
+        return self.get_page(notifications, request.query_params.get("before"))
+
+    def get_page(self, notifications, before=None):
+        if before:
+            created_at, notification_id = decode_keyset_cursor(before)
+            notifications = notifications.filter(
+                Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=notification_id)
+            )
+
+        # Fetch one extra row to know whether another page exists
+        page = list(notifications.order_by("-created_at", "-id")[:NOTIFICATIONS_PAGE_SIZE + 1])
+        next_cursor = None
+        if len(page) > NOTIFICATIONS_PAGE_SIZE:
+            page = page[:NOTIFICATIONS_PAGE_SIZE]
+            next_cursor = encode_keyset_cursor(page[-1].created_at, page[-1].id)
+
+        return {
+            "notifications": NotificationSerializer(page, many=True).data,
+            "next_cursor": next_cursor,
+        }
+
+
+# The write endpoints below only match rows whose state really changes, and
+# update_notifications()/delete_notifications() adjust the inbox in the same
+# transaction, so a double click changes nothing. They answer with the new
+# count, and the new count and version are pushed to the user's other tabs.
 class MarkNotificationReadAPI(views.APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request, pk):
-        notification = get_object_or_404(Notification, id=pk, recipient=request.user)
-        notification.is_read = True
-        notification.save(update_fields=['is_read'])
-        return Response({"success": True})
+        unread = NotificationReceipt.objects.filter(id=pk, recipient=request.user, is_read=False)
+        if update_notifications(request.user.id, unread, -1, is_read=True):
+            return Response({"success": True, "count": push_unread_count(request.user.id)})
+
+        # Already read (or not theirs, which 404s)
+        get_object_or_404(NotificationReceipt, id=pk, recipient=request.user)
+        return Response({"success": True, "count": get_unread_count(request.user.id)})
 
 class MarkAllNotificationsReadAPI(views.APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
         # Find all unread notifications for this user and mark them read
-        Notification.objects.filter(recipient=request.user, is_read=False).update(is_read=True)
-        return Response({"success": True})
+        unread = NotificationReceipt.objects.filter(recipient=request.user, is_read=False)
+        if update_notifications(request.user.id, unread, -1, is_read=True):
+            count = push_unread_count(request.user.id)
+        else:
+            count = get_unread_count(request.user.id)
+        return Response({"success": True, "count": count})
 
 
 class DeleteNotificationAPI(views.APIView):
@@ -54,9 +145,9 @@ class DeleteNotificationAPI(views.APIView):
 
     def delete(self, request, pk):
         # Filter by user to ensure they only delete their own!
-        deleted, _ = Notification.objects.filter(id=pk, recipient=request.user).delete()
-        if deleted:
-            return Response({"success": True})
+        mine = NotificationReceipt.objects.filter(id=pk, recipient=request.user)
+        if delete_notifications(request.user.id, mine):
+            return Response({"success": True, "count": push_unread_count(request.user.id)})
         return Response({"success": False}, status=404)
 
 
@@ -64,5 +155,9 @@ class MarkNotificationUnreadAPI(views.APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request, pk):
-        Notification.objects.filter(id=pk, recipient=request.user).update(is_read=False)
-        return Response({"success": True})
\ No newline at end of file
+        read = NotificationReceipt.objects.filter(id=pk, recipient=request.user, is_read=True)
+        if update_notifications(request.user.id, read, 1, is_read=False):
+            count = push_unread_count(request.user.id)
+        else:
+            count = get_unread_count(request.user.id)
+        return Response({"success": True, "count": count})
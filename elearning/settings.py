@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -58,6 +61,7 @@ INSTALLED_APPS = [
     "apps.chat.apps.ChatConfig",
     "apps.notifications.apps.NotificationsConfig",
     "apps.api.apps.ApiConfig",
+    "apps.jobs.apps.JobsConfig",
 ]
 
 MIDDLEWARE = [
@@ -83,25 +87,96 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'apps.notifications.context_processors.notifications_unread_count',
             ],
         },
     },
 ]
 
-# TEMPLATES[0]["OPTIONS"]["context_processors"] += [
-#     "notifications.context_processors.notifications_unread_count",
-# ]
-
 WSGI_APPLICATION = 'elearning.wsgi.application'
 ASGI_APPLICATION = "elearning.asgi.application"
 
-# Development (no Redis required)
-CHANNEL_LAYERS = {
-    "default": {
-        "BACKEND": "channels.layers.InMemoryChannelLayer",
+# Channel layer, picked with the CHANNEL_LAYER environment variable:
+#   memory        in-process only (default, single Daphne process, no Redis required)
+#   redis         channels_redis list-based layer, needs a real Redis
+#   redis-pubsub  channels_redis pub/sub layer; also works against the bundled
+#                 stand-in started with `python manage.py fake_redis_server`
+# Anything other than "memory" is needed for several ASGI workers, or for
+# `run_workers` pushes to reach sockets held by Daphne.
+CHANNEL_LAYER = os.environ.get("CHANNEL_LAYER", "memory").lower()
+REDIS_URL = os.environ.get("REDIS_URL", "redis://127.0.0.1:6379/0")
+
+if CHANNEL_LAYER == "memory":
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels.layers.InMemoryChannelLayer",
+        }
+    }
+elif CHANNEL_LAYER == "redis":
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels_redis.core.RedisChannelLayer",
+            "CONFIG": {"hosts": [REDIS_URL]},
+        }
+    }
+elif CHANNEL_LAYER == "redis-pubsub":
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels_redis.pubsub.RedisPubSubChannelLayer",
+            "CONFIG": {"hosts": [REDIS_URL]},
+        }
+    }
+else:
+    raise ImproperlyConfigured(
+        f"Unknown CHANNEL_LAYER '{CHANNEL_LAYER}' (expected memory, redis or redis-pubsub)"
+    )
+
+# Default cache, picked with the CACHE_BACKEND environment variable:
+#   locmem    per-process memory (default)
+#   database  table in the main database, shared by every process
+#   redis     Redis at REDIS_URL; needs a real Redis, the bundled stand-in
+#             only speaks pub/sub
+CACHE_BACKEND = os.environ.get("CACHE_BACKEND", "locmem").lower()
+
+if CACHE_BACKEND == "locmem":
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+elif CACHE_BACKEND == "database":
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+            "LOCATION": "cache_entries",
+        }
     }
+elif CACHE_BACKEND == "redis":
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    raise ImproperlyConfigured(
+        f"Unknown CACHE_BACKEND '{CACHE_BACKEND}' (expected locmem, database or redis)"
+    )
+
+# Rendered course page fragments (apps/courses/fragments.py). Always
+# per-process memory: their keys carry a version read from the database,
+# so a process never serves a copy older than the rows it reads.
+CACHES["fragments"] = {
+    "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    "LOCATION": "fragments",
 }
 
+# Background jobs (DB-backed queue, processed by `python manage.py run_workers`,
+# which must be running). JOBS_RUN_EAGERLY=1 runs each job in the calling
+# thread right after commit instead, so requests wait for it: only for tests
+# and debugging.
+JOBS_RUN_EAGERLY = os.environ.get("JOBS_RUN_EAGERLY", "0").lower() in ("1", "true", "yes")
+
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
@@ -109,6 +184,15 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Seconds a writer waits for another process's lock before failing
+            'timeout': 20,
+        },
+        'TEST': {
+            # A file rather than shared in-memory SQLite, whose concurrent
+            # writers fail instead of waiting (see the parallel enrollment tests)
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        },
     }
 }
 
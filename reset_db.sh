@@ -3,4 +3,5 @@ rm db.sqlite3
 find . -path "*/migrations/*.py" -not -name "__init__.py" -delete
 find . -path "*/migrations/*.pyc" -delete
 python manage.py makemigrations
-python manage.py migrate
\ No newline at end of file
+python manage.py migrate
+python manage.py createcachetable